@@ -1,5 +1,6 @@
 import sys
 import json
+import logging
 import os
 from dotenv import load_dotenv
 import re
@@ -17,13 +18,19 @@ nltk.download('punkt')
 nltk.download('averaged_perceptron_tagger')
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from json_provider import install_json_provider
+from structured_logging import configure_logging, fields, install_request_ids
 from SYSTEM_PROMPT import PROMPT
 
 load_dotenv()
+configure_logging()
+logger = logging.getLogger(__name__)
 
 os.environ["GOOGLE_API_KEY"] = os.environ["GEMINI_API_KEY"]
 app=Flask(__name__)
 CORS(app)
+install_json_provider(app)
+install_request_ids(app)
 text_splitter=CharacterTextSplitter(
     separator='\n',
     chunk_size=1000,
@@ -95,20 +102,18 @@ def prepare():
 def scrape():
     global chain
     data = request.args.get("question")
-    print(data)
     try:
         que=data
         result=chain({"question":f"Answer in English:{que} (If the query is about images or photos, mention that the property has uploaded photos which can be viewed through the image service.)"},return_only_outputs=True)
-        print(result)
         # Format output: bold **...** and newlines
         ans = re.sub(r"\*\*(.*?)\*\*", r"\n<b>\1</b>", result['answer'])
         ans = ans.replace("\\n", "\n")
         ans = ans.replace("\\*", "/")
 
-        print(ans)
+        logger.info("🤖 Answer", extra=fields(sampled=True, answerChars=len(ans)))
         return jsonify({"answer": ans}) 
     except Exception as err:
-        print(err)
+        logger.exception(f"❌ Error in askIt: {str(err)}")
         return jsonify({"answer":"Not able to extract data from the page"})
 
 @app.route("/getImage/<image_id>", methods=["GET"])
@@ -5,63 +5,138 @@ Integrated Flask application with AI Chat Assistant and Image Upload Service
 
 import sys
 import json
+import logging
 import os
+import threading
 from datetime import datetime
 from dotenv import load_dotenv
 import re
 import requests
-from pymongo import MongoClient
 from bson import ObjectId
 from langchain.text_splitter import CharacterTextSplitter
 from langchain.memory import ConversationBufferMemory
 from langchain_core.documents import Document
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.vectorstores import FAISS
-from langchain.chains import ConversationalRetrievalChain
-from langchain.embeddings import HuggingFaceEmbeddings
 import nltk
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 
 # Import our image service
 from image_service import ImageService
+from json_provider import install_json_provider
+from structured_logging import configure_logging, fields, install_request_ids
+from server_timing import STAGE_SECONDS, install_server_timing, stage
+from service_metrics import (
+    install_metrics, cache_samples, llm_guard_samples, mongo_pool_samples, vector_index_samples
+)
+from vector_index import describe_index
+from mongo_connection import get_connection_manager
+from db_migrations import run_migrations
+from pricing import price_fields, build_property_filter
+from locality import locality_fields
+from response_cache import CatalogVersion, ResponseCache
+from listing_cards import VIEW_FIELDS, build_listing_views, load_listing_cards
 from SYSTEM_PROMPT import PROMPT
+from chat_pipeline import ChatPipeline
+from context_assembler import ContextAssembler
+from embedding_backends import create_embedder
+from embedding_cache import CachedQueryEmbeddings, normalize_query
+from llm_guard import LLMGuard, LLMUnavailable
+from single_flight import SingleFlight
+from rag_state import IndexWriter, RagSnapshot, RagState
 
 # Property Database Class
 class PropertyDatabase:
     def __init__(self, mongodb_uri="mongodb://localhost:27017", db_name="imageupload"):
-        self.client = MongoClient(mongodb_uri)
-        self.db = self.client[db_name]
-        self.properties = self.db.properties  # Properties collection
+        # Shared, pooled client (also used by the image service)
+        self.connection = get_connection_manager(mongodb_uri)
+        self.db_name = db_name
+        self.catalog_version = CatalogVersion(lambda: self.db.catalog_meta)
+        self._migrations_lock = threading.Lock()
+        self._migrated = False
+    
+    @property
+    def client(self):
+        return self.connection.get_client()
+    
+    @property
+    def db(self):
+        return self.connection.get_database(self.db_name)
+    
+    @property
+    def properties(self):
+        return self.db.properties  # Properties collection
+    
+    def ensure_indexes(self):
+        """
+        Run startup migrations (index bootstrap) for the properties collection.
+        Runs once per process; later calls are no-ops unless it failed.
+        """
+        with self._migrations_lock:
+            if self._migrated:
+                return True
+            try:
+                run_migrations(self.db)
+                self._migrated = True
+                return True
+            except Exception as e:
+                logger.warning(f"⚠️ Could not ensure property indexes: {str(e)}")
+                return False
         
     def add_property(self, property_data):
         """Add a new property to the database"""
         property_data['created_at'] = datetime.utcnow()
         property_data['updated_at'] = datetime.utcnow()
-        result = self.properties.insert_one(property_data)
+        
+        # Numeric price bounds and the locality, for indexed filters
+        property_data.update(price_fields(property_data))
+        property_data.update(locality_fields(property_data))
+        
+        # Precompute the frontend views once, at write time
+        document = {'_id': ObjectId(), **property_data}
+        document.update(build_listing_views(document))
+        result = self.properties.insert_one(document)
+        self.catalog_version.bump()
         return str(result.inserted_id)
     
     def get_all_properties(self):
         """Get all properties from database"""
-        properties = list(self.properties.find())
-        # Convert ObjectId to string for JSON serialization
-        for prop in properties:
-            prop['_id'] = str(prop['_id'])
-        return properties
+        # ObjectIds and datetimes are handled by the JSON provider
+        with stage("mongo"):
+            return list(self.properties.find({}, {field: 0 for field in VIEW_FIELDS}))
     
     def get_property_by_id(self, property_id):
         """Get a specific property by ID"""
         try:
             if ObjectId.is_valid(property_id):
-                property_data = self.properties.find_one({"_id": ObjectId(property_id)})
+                property_data = self.properties.find_one({"_id": ObjectId(property_id)}, {field: 0 for field in VIEW_FIELDS})
             else:
-                property_data = self.properties.find_one({"propertyId": property_id})
+                property_data = self.properties.find_one({"propertyId": property_id}, {field: 0 for field in VIEW_FIELDS})
             
-            if property_data:
-                property_data['_id'] = str(property_data['_id'])
             return property_data
         except Exception:
             return None
+    
+    def find_properties(self, min_price=None, max_price=None, bedrooms=None, min_bedrooms=None,
+                        status=None, locality=None, has_vr_tour=None, projection=None, limit=50):
+        """Structured listing query on the indexed price/bedroom fields"""
+        query = build_property_filter(
+            min_price=min_price,
+            max_price=max_price,
+            bedrooms=bedrooms,
+            min_bedrooms=min_bedrooms,
+            status=status,
+            locality=locality,
+            has_vr_tour=has_vr_tour
+        )
+        if projection is None:
+            projection = {field: 0 for field in VIEW_FIELDS}
+        return list(self.properties.find(query, projection).limit(limit))
+    
+    def get_listing_cards(self):
+        """Get the precomputed listing cards for all properties"""
+        return load_listing_cards(self.properties)
 
 # Download required NLTK data
 try:
@@ -73,9 +148,16 @@ except:
 # Load environment variables
 load_dotenv()
 
+# Queue-backed structured logging (LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_RATE) for every module
+configure_logging()
+logger = logging.getLogger(__name__)
+
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app, origins=['http://localhost:8080', 'http://localhost:3000'])
+install_json_provider(app)
+install_server_timing(app)
+install_request_ids(app)
 
 # Configure Google API
 os.environ["GOOGLE_API_KEY"] = os.environ.get("GEMINI_API_KEY", "")
@@ -87,16 +169,29 @@ text_splitter = CharacterTextSplitter(
     chunk_overlap=100
 )
 
-model_name = "sentence-transformers/all-MiniLM-L6-v2"
-embedder = HuggingFaceEmbeddings(model_name=model_name)
+# PyTorch, ONNX or ONNX int8 MiniLM per EMBEDDING_BACKEND, behind the query
+# embedding LRU so repeated questions skip the model
+embedder = CachedQueryEmbeddings(create_embedder())
 geminiLlm = ChatGoogleGenerativeAI(
     model="gemini-2.0-flash", 
     temperature=0.4,
     system_prompt=PROMPT
 )
-
-# Global variables for AI chain
-chain = None
+# Concurrency gate, per-call deadline and circuit breaker for every Gemini call
+llm_guard = LLMGuard()
+
+# AI chain, vector store and memory, published together as one snapshot so
+# a refresh never swaps the chain out from under a question in progress
+rag_state = RagState()
+# Chain refreshes (startup, new listings, lazy init) run one at a time on this thread
+index_writer = IndexWriter()
+# Concurrent first questions after a deploy share one chain initialisation,
+# and identical concurrent questions share one answer
+chain_init_flight = SingleFlight("chain_init")
+question_flights = SingleFlight("questions")
+# Set while a chain refresh is queued, so a burst of new listings shares one rebuild
+_chain_refresh_lock = threading.Lock()
+_chain_refresh_queued = False
 
 # Initialize Image Service
 mongo_uri = os.environ.get("MONGODB_URI", "mongodb://localhost:27017/imageupload")
@@ -104,36 +199,57 @@ image_service = ImageService(mongo_uri=mongo_uri, db_name="imageupload", bucket_
 
 # Initialize Property Database
 db = PropertyDatabase(mongodb_uri=mongo_uri, db_name="imageupload")
+# At import so WSGI servers (gunicorn) run migrations too, not only __main__
+db.ensure_indexes()
+
+# Pre-serialized /getListings responses
+listings_cache = ResponseCache(dumps=app.json.dumps_bytes)
+
+def service_metric_samples():
+    """Component stats read at /metrics scrape time"""
+    snapshot = rag_state.snapshot
+    yield from vector_index_samples(
+        describe_index(snapshot.vector_store.index) if snapshot.vector_store else None,
+        properties=snapshot.property_count
+    )
+    yield from cache_samples("images", image_service.cache.stats())
+    yield from cache_samples("query_embedding", embedder.stats())
+    yield from cache_samples("listings", listings_cache.stats())
+    yield from llm_guard_samples(llm_guard.stats())
+    yield from mongo_pool_samples(db.connection.stats())
+
+# Per-route request latency and GET /metrics for Prometheus
+install_metrics(app, service_metric_samples)
 
 def init_services():
     """Initialize all services"""
     try:
         # Initialize image service
         image_service.init()
-        print("✅ Image Service initialized")
+        logger.info("✅ Image Service initialized")
+        
+        # Ensure indexes for hot property queries (retried if the import-time run failed)
+        db.ensure_indexes()
         
         # Initialize AI chain with existing properties
-        init_ai_chain()
+        index_writer.apply(init_ai_chain)
         
-        print("✅ CribConcierge Backend ready!")
+        logger.info("✅ CribConcierge Backend ready!")
         return True
     except Exception as e:
-        print(f"❌ Failed to initialize services: {str(e)}")
+        logger.exception(f"❌ Failed to initialize services: {str(e)}")
         return False
 
 def init_ai_chain():
-    """Initialize AI chain with all properties from database"""
-    global chain
+    """Initialize AI chain with all properties from database (run on the index writer)"""
     try:
-        print("🤖 Initializing AI system with database properties...")
-        
         # Get all properties from database
         properties = db.get_all_properties()
-        print(f"📊 Found {len(properties)} properties in database")
+        logger.info("🤖 Initializing AI system with database properties", extra=fields(properties=len(properties)))
         
         if len(properties) == 0:
-            print("⚠️  No properties found in database. AI will work with empty context.")
-            chain = None
+            logger.warning("⚠️ No properties found in database. AI will work with empty context.")
+            rag_state.publish(RagSnapshot())
             return
         
         # Build comprehensive content from all properties
@@ -169,17 +285,51 @@ Property {i}:
             return_messages=True
         )
         
-        chain = ConversationalRetrievalChain.from_llm(
+        chain = ChatPipeline(
             llm=geminiLlm,
             memory=memory,
-            retriever=vector_store.as_retriever()
+            retriever=vector_store.as_retriever(),
+            context_assembler=ContextAssembler(),
+            llm_guard=llm_guard
         )
+        rag_state.publish(RagSnapshot(
+            vector_store=vector_store,
+            chain=chain,
+            memory=memory,
+            property_count=len(properties)
+        ))
         
-        print("✅ AI chain initialized with all database properties")
+        logger.info("✅ AI chain initialized with all database properties")
         
     except Exception as e:
-        print(f"❌ Error initializing AI chain: {str(e)}")
-        chain = None
+        logger.exception(f"❌ Error initializing AI chain: {str(e)}")
+        rag_state.publish(RagSnapshot())
+
+def init_ai_chain_if_missing():
+    """Cold-start initialisation; skipped when a chain was published while this task was queued"""
+    if rag_state.snapshot.chain is None:
+        init_ai_chain()
+
+def schedule_chain_refresh():
+    """
+    Queue a chain rebuild on the index writer without waiting for it. The chain
+    is built over one combined document of every listing, so a new listing
+    cannot be added incrementally; instead, listings added while a rebuild is
+    still queued are picked up by that same rebuild.
+    """
+    global _chain_refresh_queued
+    with _chain_refresh_lock:
+        if _chain_refresh_queued:
+            return
+        _chain_refresh_queued = True
+    index_writer.submit(_run_chain_refresh)
+
+def _run_chain_refresh():
+    global _chain_refresh_queued
+    # Cleared before reading the database, so a listing added during the rebuild queues another
+    with _chain_refresh_lock:
+        _chain_refresh_queued = False
+    init_ai_chain()
 
 # ==================== IMAGE UPLOAD ROUTES ====================
 
@@ -219,7 +369,6 @@ def get_image_legacy(image_id):
 @app.route("/api/addListing", methods=['POST'])
 def add_listing():
     """Add property listing with AI processing"""
-    global chain
     data = request.get_json()
     try:
         # Extract property data and image IDs
@@ -234,36 +383,6 @@ def add_listing():
         drawing_room_photo_id = data.get('drawingRoomPhotoId')
         kitchen_photo_id = data.get('kitchenPhotoId')
         
-        # Build comprehensive content including image references
-        page_content = f"""
-        Property Name: {property_name}
-        Property Address: {property_address}
-        Property Cost: ₹{property_cost}
-        Description: {description}
-        
-        Available Images:
-        {f"Room Photo ID: {room_photo_id}" if room_photo_id else ""}
-        {f"Bathroom Photo ID: {bathroom_photo_id}" if bathroom_photo_id else ""}
-        {f"Drawing Room Photo ID: {drawing_room_photo_id}" if drawing_room_photo_id else ""}
-        {f"Kitchen Photo ID: {kitchen_photo_id}" if kitchen_photo_id else ""}
-        """
-        
-        docs = [Document(page_content=page_content)]
-        
-        text_chunks = text_splitter.split_documents(docs)
-        vector_store = FAISS.from_documents(text_chunks, embedder)
-        
-        memory = ConversationBufferMemory(
-            memory_key="chat_history", 
-            return_messages=True
-        )
-        
-        chain = ConversationalRetrievalChain.from_llm(
-            llm=geminiLlm,
-            memory=memory,
-            retriever=vector_store.as_retriever()
-        )
-        
         # Save property to database
         property_data = {
             'propertyName': property_name,
@@ -281,11 +400,10 @@ def add_listing():
         }
         
         property_id = db.add_property(property_data)
-        print(f"✅ Property saved to database with ID: {property_id}")
+        logger.info("✅ Property saved to database", extra=fields(sampled=True, propertyId=property_id))
         
-        # Refresh AI chain with updated database
-        print("🔄 Refreshing AI system with new property...")
-        init_ai_chain()
+        # Refresh AI chain in the background; questions keep the current chain until it is swapped in
+        schedule_chain_refresh()
         
         # Return success with image IDs for reference
         return jsonify({
@@ -300,29 +418,31 @@ def add_listing():
         }), 200
         
     except Exception as e:
-        print(f"❌ Add listing error: {str(e)}")
+        logger.exception(f"❌ Add listing error: {str(e)}")
         return jsonify({"error": str(e)}), 400
 
 @app.route("/api/askIt", methods=["GET"])
 def ask_question():
     """Process AI chat questions with enhanced property card responses"""
-    global chain
+    # One consistent chain for the whole request, even if a refresh swaps it mid-way
+    snapshot = rag_state.snapshot
     question = request.args.get("question")
     
     if not question:
         return jsonify({"error": "No question provided"}), 400
         
     try:
-        # Get all properties for potential card display
-        all_properties = db.get_all_properties()
+        # Get precomputed cards for potential card display
+        all_properties = db.get_listing_cards()
         
         # Check if chain is initialized, if not, initialize it
-        if chain is None:
-            print("🔄 AI chain not initialized, initializing with current database...")
-            init_ai_chain()
+        if snapshot.chain is None:
+            logger.info("🔄 AI chain not initialized, initializing with current database...")
+            chain_init_flight.do("init_ai_chain", index_writer.apply, init_ai_chain_if_missing)
+            snapshot = rag_state.snapshot
             
             # If still no chain after initialization, return helpful message
-            if chain is None:
+            if snapshot.chain is None:
                 properties_count = len(all_properties)
                 if properties_count == 0:
                     return jsonify({
@@ -334,70 +454,58 @@ def ask_question():
                     }), 200
             
         # Process question with AI
-        result = chain({
-            "question": f"Answer in English: {question} (If showing properties, provide a brief summary and mention that detailed property cards will be displayed below. For VR tours, mention that 3D tour buttons are available.)"
-        }, return_only_outputs=True)
-        
-        print(f"AI Response: {result}")
-        
-        # Format output: bold **...** and newlines
-        answer = re.sub(r"\*\*(.*?)\*\*", r"**\1**", result['answer'])
-        answer = answer.replace("\\n", "\n")
-        answer = answer.replace("\\*", "*")
-        
-        # Determine if we should include property cards based on the question/answer
-        properties_to_show = []
-        show_properties = False
-        
-        # Check if the question or answer indicates property listings should be shown
-        property_keywords = ['property', 'properties', 'listing', 'listings', 'show', 'recommend', 'available', 'vr', 'tour', 'photos']
-        question_lower = question.lower()
-        answer_lower = answer.lower()
-        
-        if any(keyword in question_lower for keyword in property_keywords) or any(keyword in answer_lower for keyword in property_keywords):
-            show_properties = True
-        
-        # If we should show properties, format them for the frontend
-        if show_properties and all_properties:
-            for prop in all_properties:
-                # Format property for frontend PropertyCard component
-                formatted_property = {
-                    "id": prop.get('_id', ''),
-                    "title": prop.get('propertyName', 'Unknown Property'),
-                    "price": f"₹{prop.get('propertyCostRange', 'Price not specified')}",
-                    "location": prop.get('propertyAddress', 'Location not specified'),
-                    "bedrooms": prop.get('bedrooms', 2),
-                    "bathrooms": prop.get('bathrooms', 1),
-                    "area": prop.get('area', 'Area not specified'),
-                    "features": prop.get('features', []),
-                    "description": prop.get('description', ''),
-                    # VR Tour data - include both individual props and nested object
-                    "hasVRTour": bool(prop.get('roomPhotoId') or prop.get('bathroomPhotoId') or prop.get('drawingRoomPhotoId') or prop.get('kitchenPhotoId')),
-                    "roomPhotoId": prop.get('roomPhotoId'),
-                    "bathroomPhotoId": prop.get('bathroomPhotoId'),
-                    "drawingRoomPhotoId": prop.get('drawingRoomPhotoId'),
-                    "kitchenPhotoId": prop.get('kitchenPhotoId'),
-                    "vrTourData": {
-                        "roomPhotoId": prop.get('roomPhotoId'),
-                        "bathroomPhotoId": prop.get('bathroomPhotoId'),
-                        "drawingRoomPhotoId": prop.get('drawingRoomPhotoId'),
-                        "kitchenPhotoId": prop.get('kitchenPhotoId')
-                    },
-                    # Use a placeholder image or the first available room image
-                    "image": f"/api/images/{prop.get('roomPhotoId')}" if prop.get('roomPhotoId') else "/placeholder-property.jpg"
-                }
-                properties_to_show.append(formatted_property)
+        try:
+            result = question_flights.do((snapshot.version, normalize_query(question)), snapshot.chain, {
+                "question": question,
+                # Kept out of retrieval and history so "VR"/"3D" here never becomes a search constraint
+                "instructions": "Answer in English. If showing properties, provide a brief summary and mention that detailed property cards will be displayed below. For VR tours, mention that 3D tour buttons are available."
+            }, return_only_outputs=True)
+        except LLMUnavailable as e:
+            # Gemini is slow, saturated or failing: show the listings instead of hanging the request
+            logger.warning(f"⚠️ Gemini unavailable ({e.reason}), answering without the LLM")
+            response_data = {
+                "answer": "Our assistant is busy right now. Here are our current listings; ask again in a moment for a detailed answer.",
+                "source": "database_fallback",
+                "degraded": e.reason
+            }
+            if all_properties:
+                response_data["properties"] = all_properties[:6]
+                response_data["showPropertyCards"] = True
+            return jsonify(response_data), 200
+        
+        with stage("postprocess"):
+            # Format output: bold **...** and newlines
+            answer = re.sub(r"\*\*(.*?)\*\*", r"**\1**", result['answer'])
+            answer = answer.replace("\\n", "\n")
+            answer = answer.replace("\\*", "*")
+            
+            # Determine if we should include property cards based on the question/answer
+            properties_to_show = []
+            show_properties = False
             
-            # Limit to 6 properties to avoid overwhelming the chat
-            properties_to_show = properties_to_show[:6]
+            # Check if the question or answer indicates property listings should be shown
+            property_keywords = ['property', 'properties', 'listing', 'listings', 'show', 'recommend', 'available', 'vr', 'tour', 'photos']
+            question_lower = question.lower()
+            answer_lower = answer.lower()
+            
+            if any(keyword in question_lower for keyword in property_keywords) or any(keyword in answer_lower for keyword in property_keywords):
+                show_properties = True
+            
+            # If we should show properties, format them for the frontend
+            if show_properties and all_properties:
+                # Limit to 6 properties to avoid overwhelming the chat
+                properties_to_show = all_properties[:6]
         
-        print(f"🤖 RAG Answer: {answer}")
-        print(f"📊 Properties to show: {len(properties_to_show)}")
+        # Sizes only: the answer text itself is large and already in the response
+        logger.info("🤖 RAG answer", extra=fields(
+            sampled=True, source="rag_enhanced", answerChars=len(answer), properties=len(properties_to_show)
+        ))
         
         response_data = {
             "answer": answer,
             "source": "rag_enhanced",
-            "properties_in_knowledge_base": len(all_properties)
+            "properties_in_knowledge_base": len(all_properties),
+            "timings": result.get('timings', {})
         }
         
         # Add properties if we found relevant ones
@@ -408,7 +516,7 @@ def ask_question():
         return jsonify(response_data), 200
         
     except Exception as err:
-        print(f"❌ Ask question error: {str(err)}")
+        logger.exception(f"❌ Ask question error: {str(err)}")
         return jsonify({
             "answer": "Sorry, I couldn't process your question. Please try again."
         }), 500
@@ -420,54 +528,28 @@ def get_listings_api():
     """Get all property listings from MongoDB (API route)"""
     return get_listings()
 
+def build_listings_payload():
+    """Listing page payload, built only when the catalog changes"""
+    # Cards are precomputed at write time
+    formatted_properties = db.get_listing_cards()
+    
+    logger.debug("📊 Retrieved properties from database", extra=fields(properties=len(formatted_properties)))
+    
+    return {
+        "success": True,
+        "count": len(formatted_properties),
+        "properties": formatted_properties
+    }
+
 @app.route("/getListings", methods=['GET'])
 def get_listings():
     """Get all property listings from MongoDB"""
     try:
-        properties = db.get_all_properties()
-        
-        # Transform data for frontend compatibility
-        formatted_properties = []
-        for prop in properties:
-            # Handle description JSON formatting
-            description_data = prop.get('description', '')
-            if isinstance(description_data, dict):
-                # For frontend display, use the text content
-                description_for_frontend = description_data.get('text', '')
-            else:
-                # Fallback for string descriptions
-                description_for_frontend = str(description_data)
-                
-            formatted_prop = {
-                "id": prop['_id'],
-                "title": prop.get('propertyName', ''),
-                "price": f"₹{prop.get('propertyCostRange', '')}",
-                "location": prop.get('propertyAddress', ''),
-                "bedrooms": prop.get('bedrooms', 2),
-                "bathrooms": prop.get('bathrooms', 1),
-                "area": prop.get('area', ''),
-                "features": prop.get('features', []),
-                "roomPhotoId": prop.get('roomPhotoId'),
-                "bathroomPhotoId": prop.get('bathroomPhotoId'),
-                "drawingRoomPhotoId": prop.get('drawingRoomPhotoId'),
-                "kitchenPhotoId": prop.get('kitchenPhotoId'),
-                "description": description_for_frontend,
-                "descriptionJson": prop.get('description'),  # Include full JSON for advanced features
-                "created_at": prop.get('created_at'),
-                "updated_at": prop.get('updated_at')
-            }
-            formatted_properties.append(formatted_prop)
-        
-        print(f"📊 Retrieved {len(formatted_properties)} properties from database")
-        
-        return jsonify({
-            "success": True,
-            "count": len(formatted_properties),
-            "properties": formatted_properties
-        }), 200
+        # Serve the pre-serialized body while the catalog version is unchanged
+        return listings_cache.respond("listings", db.catalog_version.current(), build_listings_payload)
         
     except Exception as e:
-        print(f"❌ Error in getListings: {str(e)}")
+        logger.exception(f"❌ Error in getListings: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 # ==================== LEGACY ROUTES ====================
@@ -497,8 +579,20 @@ def health_check():
         "status": "healthy",
         "services": {
             "image_service": image_service.initialized,
-            "ai_service": chain is not None
-        }
+            "ai_service": rag_state.snapshot.chain is not None
+        },
+        "image_cache": image_service.cache.stats(),
+        "single_flight": {
+            "images": image_service.flights.stats(),
+            "chain_init": chain_init_flight.stats(),
+            "questions": question_flights.stats()
+        },
+        "listings_cache": listings_cache.stats(),
+        "mongo_pool": db.connection.stats(),
+        "llm_guard": llm_guard.stats(),
+        "index_writer": index_writer.stats(),
+        "query_embedding_cache": embedder.stats(),
+        "stage_timings": STAGE_SECONDS.summary()
     }), 200
 
 @app.route("/", methods=["GET"])
@@ -519,7 +613,8 @@ def root():
                 "add_listing": "POST /api/addListing",
                 "ask_question": "GET /api/askIt?question={query}"
             },
-            "health": "GET /api/health"
+            "health": "GET /api/health",
+            "metrics": "GET /metrics"
         },
         "frontend_url": "http://localhost:8080"
     }), 200
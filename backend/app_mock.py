@@ -10,6 +10,7 @@ from dotenv import load_dotenv
 import re
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from json_provider import install_json_provider
 
 # Load environment variables
 load_dotenv()
@@ -17,6 +18,7 @@ load_dotenv()
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app, origins=['http://localhost:8080', 'http://localhost:3000'])
+install_json_provider(app)
 
 # Mock data storage (for testing without MongoDB)
 mock_images = {}
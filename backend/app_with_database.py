@@ -1,9 +1,11 @@
 import os
 import json
+import logging
 import re
+import threading
+import time
 from datetime import datetime
 from dotenv import load_dotenv
-from pymongo import MongoClient
 from bson import ObjectId
 from flask import Flask, request, jsonify
 from flask_cors import CORS
@@ -14,10 +16,36 @@ from langchain.text_splitter import CharacterTextSplitter
 from langchain.memory import ConversationBufferMemory
 from langchain_core.documents import Document
 from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.vectorstores import FAISS
-from langchain.chains import ConversationalRetrievalChain
-from langchain.embeddings import HuggingFaceEmbeddings
 from SYSTEM_PROMPT import PROMPT
+from chat_pipeline import ChatPipeline
+from context_assembler import ContextAssembler
+from llm_guard import LLMGuard, LLMUnavailable
+from json_provider import install_json_provider
+from structured_logging import configure_logging, fields, install_request_ids
+from server_timing import STAGE_SECONDS, install_server_timing, stage
+from service_metrics import (
+    install_metrics, cache_samples, llm_guard_samples, mongo_pool_samples, vector_index_samples
+)
+from mongo_connection import get_connection_manager
+from db_migrations import run_migrations
+from pricing import PRICE_MIN_FIELD, PRICE_MAX_FIELD, price_fields, parse_price_range, build_property_filter
+from query_understanding import extract_constraints
+from locality import LOCALITY_FIELD, locality_fields
+from hybrid_retrieval import HybridPropertyRetriever, PropertyChunkMap
+from embedding_cache import CachedQueryEmbeddings, normalize_query
+from embedding_backends import create_embedder
+from single_flight import SingleFlight
+from keyword_index import BM25Index
+from vector_index import build_vector_store, describe_index
+from rag_state import IndexWriter, RagSnapshot, RagState
+from rebuild_jobs import RebuildJobManager
+from index_sync import PropertyChangeQueue, PropertyChangeWatcher, apply_property_changes, chunk_ids, indexed_version
+from property_search import hybrid_search
+from response_cache import CatalogVersion, ResponseCache
+from listing_cards import (
+    PHOTO_FIELDS, VIEW_FIELDS, DETAIL_FIELD,
+    build_listing_views, refresh_listing_views, backfill_listing_views, load_listing_cards, load_listing_view
+)
 import nltk
 
 # Download required NLTK data
@@ -30,6 +58,10 @@ except:
 # Load environment variables
 load_dotenv()
 
+# Queue-backed structured logging (LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_RATE) for every module
+configure_logging()
+logger = logging.getLogger(__name__)
+
 # Set Google API key for Gemini
 os.environ["GOOGLE_API_KEY"] = os.environ.get("GEMINI_API_KEY", "")
 
@@ -39,89 +71,246 @@ text_splitter = CharacterTextSplitter(
     chunk_size=1000,
     chunk_overlap=100
 )
-embedder = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+# PyTorch, ONNX or ONNX int8 MiniLM per EMBEDDING_BACKEND, behind the query
+# embedding LRU so repeated search and chat questions skip the model
+embedder = CachedQueryEmbeddings(create_embedder())
 geminiLlm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", temperature=0.4, system_prompt=PROMPT)
+# Concurrency gate, per-call deadline and circuit breaker for every Gemini call
+llm_guard = LLMGuard()
 
-# Global RAG components
-global_vector_store = None
-global_chain = None
-global_memory = None
+# Global RAG components (vector store, BM25 keyword index, chain, memory),
+# published together as one snapshot so readers never see a half-built state
+rag_state = RagState(RagSnapshot(keyword_index=BM25Index()))
+# Every publish (rebuild swaps and incremental updates) runs on this one thread
+index_writer = IndexWriter()
+# property_id -> FAISS rows, shared by the chat retriever and /api/search
+global_chunk_map = PropertyChunkMap()
+# Identical concurrent questions share one chain run
+question_flights = SingleFlight("questions")
 
 # MongoDB Setup
 class PropertyDatabase:
     def __init__(self, mongodb_uri="mongodb://localhost:27017", db_name="imageupload"):
-        self.client = MongoClient(mongodb_uri)
-        self.db = self.client[db_name]
-        self.properties = self.db.properties  # Properties collection
+        # Shared, pooled client (also used by the image service)
+        self.connection = get_connection_manager(mongodb_uri)
+        self.db_name = db_name
+        self.catalog_version = CatalogVersion(lambda: self.db.catalog_meta)
+        self._migrations_lock = threading.Lock()
+        self._migrated = False
+        self._localities = None
+        # A locality only becomes a hard filter once this many listings carry it
+        self.locality_min_listings = int(os.environ.get("RAG_LOCALITY_MIN_LISTINGS", "1"))
+        self.detail_flights = SingleFlight("property_detail")
+    
+    @property
+    def client(self):
+        return self.connection.get_client()
+    
+    @property
+    def db(self):
+        return self.connection.get_database(self.db_name)
+    
+    @property
+    def properties(self):
+        return self.db.properties  # Properties collection
+    
+    def ensure_indexes(self):
+        """
+        Run startup migrations (index bootstrap) for the properties collection.
+        Runs once per process; later calls are no-ops unless it failed.
+        """
+        with self._migrations_lock:
+            if self._migrated:
+                return True
+            try:
+                run_migrations(self.db)
+                self._migrated = True
+                return True
+            except Exception as e:
+                logger.warning(f"⚠️ Could not ensure property indexes: {str(e)}")
+                return False
         
     def add_property(self, property_data):
         """Add a new property to the database"""
         property_data['created_at'] = datetime.utcnow()
         property_data['updated_at'] = datetime.utcnow()
-        result = self.properties.insert_one(property_data)
+        
+        # Numeric price bounds and the locality, for indexed filters
+        property_data.update(price_fields(property_data))
+        property_data.update(locality_fields(property_data))
+        
+        # Precompute the frontend views once, at write time
+        document = {'_id': ObjectId(), **property_data}
+        document.update(build_listing_views(document))
+        result = self.properties.insert_one(document)
+        self.catalog_version.bump()
         return str(result.inserted_id)
     
     def get_all_properties(self):
         """Get all properties from database"""
-        properties = list(self.properties.find())
-        # Convert ObjectId to string for JSON serialization
-        for prop in properties:
-            prop['_id'] = str(prop['_id'])
-        return properties
+        # ObjectIds and datetimes are handled by the JSON provider
+        with stage("mongo"):
+            return list(self.properties.find({}, {field: 0 for field in VIEW_FIELDS}))
     
     def get_property_by_id(self, property_id):
         """Get a specific property by ID"""
         try:
-            if ObjectId.is_valid(property_id):
-                property_data = self.properties.find_one({"_id": ObjectId(property_id)})
-            else:
-                property_data = self.properties.find_one({"propertyId": property_id})
+            property_data = self.properties.find_one(
+                self._property_query(property_id),
+                {field: 0 for field in VIEW_FIELDS}
+            )
             
-            if property_data:
-                property_data['_id'] = str(property_data['_id'])
             return property_data
         except Exception:
             return None
     
+    def _property_query(self, property_id):
+        """Lookup by ObjectId, falling back to the propertyId field"""
+        if ObjectId.is_valid(property_id):
+            return {"_id": ObjectId(property_id)}
+        return {"propertyId": property_id}
+    
+    def get_listing_cards(self):
+        """Get the precomputed listing cards for all properties"""
+        return load_listing_cards(self.properties)
+    
+    def get_listing_cards_by_ids(self, property_ids):
+        """Listing cards for the given IDs, in the same order"""
+        object_ids = [ObjectId(pid) for pid in property_ids if ObjectId.is_valid(pid)]
+        cards = load_listing_cards(self.properties, {"_id": {"$in": object_ids}})
+        by_id = {card['id']: card for card in cards}
+        return [by_id[pid] for pid in property_ids if pid in by_id]
+    
+    def get_property_detail(self, property_id):
+        """Get the precomputed detail view of a specific property"""
+        # A popular listing's concurrent page loads share one query
+        return self.detail_flights.do(property_id, self._load_property_detail, property_id)
+    
+    def _load_property_detail(self, property_id):
+        try:
+            with stage("mongo"):
+                return load_listing_view(self.properties, self._property_query(property_id), DETAIL_FIELD)
+        except Exception:
+            return None
+    
+    def find_properties(self, min_price=None, max_price=None, bedrooms=None, min_bedrooms=None,
+                        status=None, locality=None, has_vr_tour=None, projection=None, limit=50):
+        """Structured listing query on the indexed price/bedroom fields"""
+        query = build_property_filter(
+            min_price=min_price,
+            max_price=max_price,
+            bedrooms=bedrooms,
+            min_bedrooms=min_bedrooms,
+            status=status,
+            locality=locality,
+            has_vr_tour=has_vr_tour
+        )
+        if projection is None:
+            projection = {field: 0 for field in VIEW_FIELDS}
+        return list(self.properties.find(query, projection).limit(limit))
+    
     def update_property(self, property_id, update_data):
         """Update a property"""
         update_data['updated_at'] = datetime.utcnow()
+        if 'propertyCostRange' in update_data:
+            update_data.update(price_fields(update_data))
+        if 'propertyAddress' in update_data:
+            update_data.update(locality_fields(update_data))
         result = self.properties.update_one(
             {"_id": ObjectId(property_id)}, 
             {"$set": update_data}
         )
+        if result.modified_count > 0:
+            refresh_listing_views(self.properties, ObjectId(property_id))
+            self.catalog_version.bump()
         return result.modified_count > 0
     
     def delete_property(self, property_id):
         """Delete a property"""
         result = self.properties.delete_one({"_id": ObjectId(property_id)})
+        if result.deleted_count > 0:
+            if rag_state.snapshot.vector_store is not None:
+                # Out of search results now rather than at the next index sync batch
+                future = property_changes.submit([], [property_id])
+                future.add_done_callback(self._rebuild_if_delete_failed)
+            self.catalog_version.bump()
         return result.deleted_count > 0
     
-    def get_properties_as_documents(self):
-        """Convert MongoDB properties to LangChain Documents for RAG"""
-        properties = self.get_all_properties()
-        documents = []
-        
-        for prop in properties:
-            # Handle description as JSON or fallback to string
-            description_data = prop.get('description', 'N/A')
-            if isinstance(description_data, dict):
-                # Extract text content from JSON description
-                description_text = description_data.get('text', 'N/A')
-                description_summary = description_data.get('summary', '')
-                description_sections = description_data.get('sections', [])
-                
-                # Build enhanced description content
-                formatted_description = f"{description_text}"
-                if description_sections:
-                    formatted_description += "\n\nKey Sections:\n"
-                    formatted_description += "\n".join([f"- {section.get('content', '')}" for section in description_sections])
-            else:
-                # Fallback for string descriptions
-                formatted_description = str(description_data)
+    def _rebuild_if_delete_failed(self, future):
+        """Index types that cannot remove vectors (IVF/HNSW/quantized) drop the listing by a rebuild"""
+        error = future.exception()
+        if isinstance(error, (RuntimeError, ValueError)):
+            logger.warning(f"⚠️ Incremental index update unavailable ({str(error)}), rebuilding")
+            rebuild_jobs.submit(reason="listing deleted")
+    
+    def _filter_metadata(self, prop):
+        """Structured fields carried on every chunk for filtered retrieval"""
+        return {
+            "price_min": prop.get(PRICE_MIN_FIELD),
+            "price_max": prop.get(PRICE_MAX_FIELD),
+            "bedrooms": prop.get('bedrooms'),
+            "has_vr_tour": any(prop.get(field) for field in PHOTO_FIELDS),
+            # Lets index sync skip changes that are already indexed
+            "updated_at": self._index_version(prop)
+        }
+    
+    def _index_version(self, prop):
+        """updated_at at MongoDB's millisecond precision, as stored in chunk metadata"""
+        updated_at = prop.get('updated_at')
+        if isinstance(updated_at, datetime):
+            return updated_at.isoformat(timespec='milliseconds')
+        return str(updated_at)
+    
+    def known_localities(self):
+        """Stored locality values with enough listings, recomputed when the catalog changes"""
+        version = self.catalog_version.current()
+        if self._localities is None or self._localities[0] != version:
+            counts = self.properties.aggregate([
+                {"$match": {LOCALITY_FIELD: {"$type": "string"}}},
+                {"$group": {"_id": f"${LOCALITY_FIELD}", "listings": {"$sum": 1}}}
+            ])
+            self._localities = (version, {
+                doc["_id"] for doc in counts if doc["listings"] >= self.locality_min_listings
+            })
+        return self._localities[1]
+    
+    def matching_property_ids(self, question, **filters):
+        """
+        IDs of listings satisfying the hard constraints in a question, or None
+        when it has none and plain vector search should run. Explicit filters
+        override what was understood from the question.
+        """
+        constraints = extract_constraints(question, self.known_localities())
+        for name, value in filters.items():
+            if value is not None:
+                setattr(constraints, name, value)
+        if constraints.is_empty():
+            return None
+        logger.debug(f"🔎 Pre-filtering retrieval with {constraints}")
+        matches = self.find_properties(**constraints.to_dict(), projection={"_id": 1}, limit=0)
+        return {str(prop["_id"]) for prop in matches}
+    
+    def property_to_document(self, prop):
+        """Convert one MongoDB property to a LangChain Document for RAG"""
+        # Handle description as JSON or fallback to string
+        description_data = prop.get('description', 'N/A')
+        if isinstance(description_data, dict):
+            # Extract text content from JSON description
+            description_text = description_data.get('text', 'N/A')
+            description_summary = description_data.get('summary', '')
+            description_sections = description_data.get('sections', [])
             
-            # Build comprehensive content for each property
-            content = f"""
+            # Build enhanced description content
+            formatted_description = f"{description_text}"
+            if description_sections:
+                formatted_description += "\n\nKey Sections:\n"
+                formatted_description += "\n".join([f"- {section.get('content', '')}" for section in description_sections])
+        else:
+            # Fallback for string descriptions
+            formatted_description = str(description_data)
+        
+        # Build comprehensive content for each property
+        content = f"""
 Property Name: {prop.get('propertyName', 'N/A')}
 Property Address: {prop.get('propertyAddress', 'N/A')}
 Property Cost: ₹{prop.get('propertyCostRange', 'N/A')}
@@ -141,134 +330,260 @@ Available Images for VR Tour:
 Property ID: {prop.get('_id')}
 Created: {prop.get('created_at', 'N/A')}
 Updated: {prop.get('updated_at', 'N/A')}
-            """.strip()
-            
-            # Create LangChain Document
-            doc = Document(
-                page_content=content,
-                metadata={
-                    "property_id": prop.get('_id'),
-                    "property_name": prop.get('propertyName', ''),
-                    "address": prop.get('propertyAddress', ''),
-                    "price": prop.get('propertyCostRange', ''),
-                    "type": "property_listing"
-                }
-            )
-            documents.append(doc)
+        """.strip()
         
-        return documents
+        # Create LangChain Document
+        doc = Document(
+            page_content=content,
+            metadata={
+                "property_id": str(prop.get('_id')),
+                "property_name": prop.get('propertyName', ''),
+                "address": prop.get('propertyAddress', ''),
+                "price": prop.get('propertyCostRange', ''),
+                "type": "property_listing",
+                **self._filter_metadata(prop)
+            }
+        )
+        return doc
     
-    def build_rag_knowledge_base(self):
-        """Build FAISS vector store from all properties in database"""
-        global global_vector_store, global_chain, global_memory
+    def get_properties_as_documents(self):
+        """Convert MongoDB properties to LangChain Documents for RAG"""
+        return [self.property_to_document(prop) for prop in self.get_all_properties()]
+    
+    def build_rag_snapshot(self, job=None):
+        """Build a complete RAG snapshot from the database without touching the live one"""
+        def report(stage, progress):
+            logger.info(f"🔄 {stage}...")
+            if job:
+                job.update(stage, progress)
+        
+        report("Loading properties", 0.0)
+        documents = self.get_properties_as_documents()
+        
+        if not documents:
+            logger.warning("⚠️ No properties found in database for RAG")
+            return RagSnapshot(keyword_index=BM25Index())
+        
+        # Split documents into chunks
+        report("Splitting documents", 0.05)
+        text_chunks = text_splitter.split_documents(documents)
+        logger.info("📄 Split properties into text chunks", extra=fields(chunks=len(text_chunks), properties=len(documents)))
+        
+        # Create vector store (index type per RAG_INDEX_TYPE); embedding is most of the work
+        report("Embedding chunks", 0.1)
+        vector_store = build_vector_store(
+            text_chunks,
+            embedder,
+            ids=chunk_ids(text_chunks),
+            progress=(lambda fraction: job.update("Embedding chunks", 0.1 + 0.75 * fraction)) if job else None
+        )
+        logger.info("✅ FAISS vector store created successfully")
+        
+        # Keyword index over the unsplit property documents
+        report("Building keyword index", 0.85)
+        keyword_index = BM25Index()
+        keyword_index.rebuild(
+            (doc.metadata['property_id'], doc.page_content) for doc in documents
+        )
+        logger.info("✅ Keyword index built", extra=fields(**keyword_index.stats()))
+        
+        # Initialize conversation memory
+        memory = ConversationBufferMemory(
+            memory_key="chat_history", 
+            return_messages=True
+        )
         
+        report("Initializing chain", 0.9)
+        return RagSnapshot(
+            vector_store=vector_store,
+            keyword_index=keyword_index,
+            chain=self.build_chain(vector_store, memory),
+            memory=memory,
+            property_count=len(documents)
+        )
+    
+    def build_chain(self, vector_store, memory):
+        """Conversational retrieval pipeline over a vector store (CHAT_STRATEGY picks the follow-up handling)"""
+        return ChatPipeline(
+            llm=geminiLlm,
+            memory=memory,
+            # Budget/bedroom/locality/VR constraints narrow the candidates before ranking
+            retriever=HybridPropertyRetriever(
+                vector_store=vector_store,
+                allowlist_fn=self.matching_property_ids,
+                chunk_map=global_chunk_map,
+                k=8  # Candidates for the context assembler, which packs them to the token budget
+            ),
+            context_assembler=ContextAssembler(),
+            llm_guard=llm_guard
+        )
+    
+    def build_rag_knowledge_base(self):
+        """Build FAISS vector store from all properties in database and publish it"""
         try:
-            print("🔄 Building RAG knowledge base from database...")
-            
-            # Get all properties as documents
-            documents = self.get_properties_as_documents()
-            
-            if not documents:
-                print("⚠️ No properties found in database for RAG")
-                return False
-            
-            # Split documents into chunks
-            text_chunks = text_splitter.split_documents(documents)
-            print(f"📄 Created {len(text_chunks)} text chunks from {len(documents)} properties")
-            
-            # Create vector store
-            global_vector_store = FAISS.from_documents(text_chunks, embedder)
-            print("✅ FAISS vector store created successfully")
-            
-            # Initialize conversation memory
-            global_memory = ConversationBufferMemory(
-                memory_key="chat_history", 
-                return_messages=True
-            )
-            
-            # Create conversational retrieval chain
-            global_chain = ConversationalRetrievalChain.from_llm(
-                llm=geminiLlm,
-                memory=global_memory,
-                retriever=global_vector_store.as_retriever(
-                    search_kwargs={"k": 5}  # Retrieve top 5 most relevant chunks
-                )
-            )
-            print("✅ RAG conversational chain initialized")
-            
-            return True
+            logger.info("🔄 Building RAG knowledge base from database...")
+            snapshot = self.build_rag_snapshot()
+            index_writer.apply(rag_state.publish, snapshot)
+            if snapshot.ready:
+                logger.info("✅ RAG conversational chain initialized")
+            return snapshot.ready
             
         except Exception as e:
-            print(f"❌ Error building RAG knowledge base: {str(e)}")
+            logger.exception(f"❌ Error building RAG knowledge base: {str(e)}")
             return False
     
+    def run_rebuild_job(self, job):
+        """Background rebuild: build off to the side, then swap in atomically"""
+        snapshot = self.build_rag_snapshot(job)
+        job.update("Publishing", 0.95)
+        # Queued behind any incremental update in progress
+        index_writer.apply(rag_state.publish, snapshot)
+        logger.info("✅ RAG knowledge base swapped in", extra=fields(properties=snapshot.property_count))
+        return {
+            "properties": snapshot.property_count,
+            "vectors": snapshot.vector_store.index.ntotal if snapshot.vector_store else 0
+        }
+    
+    def publish_property_changes(self, documents, deleted_ids, skip_indexed=()):
+        """
+        Index writer task: apply upserts/deletes to copies of the live indexes
+        and publish them as a new snapshot. Readers keep the snapshot they hold.
+        Documents whose property ID is in skip_indexed are left out when that
+        version is already indexed. Queued through property_changes, which
+        batches writes so the indexes are copied once per batch.
+        """
+        snapshot = rag_state.snapshot
+        if skip_indexed:
+            # Already indexed at this version, e.g. by /addListing
+            documents = [
+                doc for doc in documents
+                if doc.metadata['property_id'] not in skip_indexed
+                or indexed_version(snapshot.vector_store, global_chunk_map, doc.metadata['property_id']) != doc.metadata.get('updated_at')
+            ]
+        # Deletes seen twice (delete_property, then the watcher) are applied once
+        deleted_ids = [str(pid) for pid in deleted_ids if str(pid) in snapshot.keyword_index]
+        if not documents and not deleted_ids:
+            return None
+        
+        vector_store, keyword_index, result = apply_property_changes(
+            snapshot, documents, deleted_ids, text_splitter, global_chunk_map
+        )
+        rag_state.publish(RagSnapshot(
+            vector_store=vector_store,
+            keyword_index=keyword_index,
+            chain=self.build_chain(vector_store, snapshot.memory),
+            memory=snapshot.memory,  # Conversation carries over
+            property_count=len(keyword_index),
+            built_at=snapshot.built_at
+        ))
+        return result
+    
     def update_rag_with_property(self, property_data):
         """Add single property to existing RAG knowledge base"""
-        global global_vector_store
+        snapshot = rag_state.snapshot
         
         try:
-            if not global_vector_store:
-                print("⚠️ No existing vector store, rebuilding entire knowledge base...")
-                return self.build_rag_knowledge_base()
-            
-            # Convert single property to document
-            # Handle description as JSON or string
-            description_data = property_data.get('description', 'N/A')
-            if isinstance(description_data, dict):
-                # Extract text content from JSON description
-                formatted_description = description_data.get('text', 'N/A')
-                description_sections = description_data.get('sections', [])
-                
-                # Add section details if available
-                if description_sections:
-                    formatted_description += "\n\nKey Sections:\n"
-                    formatted_description += "\n".join([f"- {section.get('content', '')}" for section in description_sections])
-            else:
-                # Fallback for string descriptions
-                formatted_description = str(description_data)
-            
-            content = f"""
-Property Name: {property_data.get('propertyName', 'N/A')}
-Property Address: {property_data.get('propertyAddress', 'N/A')}
-Property Cost: ₹{property_data.get('propertyCostRange', 'N/A')}
-Bedrooms: {property_data.get('bedrooms', 'N/A')}
-Bathrooms: {property_data.get('bathrooms', 'N/A')}
-Area: {property_data.get('area', 'N/A')}
-Description: {formatted_description}
-Features: {', '.join(property_data.get('features', []))}
-
-Available Images for VR Tour:
-{f"Room Photo ID: {property_data.get('roomPhotoId')}" if property_data.get('roomPhotoId') else "Room Photo: Not available"}
-{f"Bathroom Photo ID: {property_data.get('bathroomPhotoId')}" if property_data.get('bathroomPhotoId') else "Bathroom Photo: Not available"}
-{f"Drawing Room Photo ID: {property_data.get('drawingRoomPhotoId')}" if property_data.get('drawingRoomPhotoId') else "Drawing Room Photo: Not available"}
-{f"Kitchen Photo ID: {property_data.get('kitchenPhotoId')}" if property_data.get('kitchenPhotoId') else "Kitchen Photo: Not available"}
-            """.strip()
+            if not snapshot.vector_store:
+                logger.warning("⚠️ No existing vector store, queueing a full knowledge base rebuild...")
+                rebuild_jobs.submit(reason="first listing")
+                return False
             
-            doc = Document(
-                page_content=content,
-                metadata={
-                    "property_name": property_data.get('propertyName', ''),
-                    "address": property_data.get('propertyAddress', ''),
-                    "price": property_data.get('propertyCostRange', ''),
-                    "type": "property_listing"
-                }
-            )
+            # Same document a rebuild or index sync would produce for this listing
+            doc = self.property_to_document({**property_data, '_id': property_data.get('propertyId')})
             
             # Split and add to existing vector store
-            chunks = text_splitter.split_documents([doc])
-            global_vector_store.add_documents(chunks)
+            try:
+                property_changes.apply([doc], [])
+            except (RuntimeError, ValueError) as e:
+                logger.warning(f"⚠️ Incremental index update unavailable ({str(e)}), rebuilding")
+                rebuild_jobs.submit(reason="listing added")
+                return False
             
-            print(f"✅ Added property '{property_data.get('propertyName', 'Unknown')}' to RAG knowledge base")
+            if rebuild_jobs.running:
+                # The running rebuild may have read the catalog before this listing existed
+                rebuild_jobs.submit(reason="listing added during rebuild")
+            
+            logger.info("✅ Added property to RAG knowledge base", extra=fields(
+                sampled=True, propertyId=str(property_data.get('propertyId', ''))
+            ))
             return True
             
         except Exception as e:
-            print(f"❌ Error updating RAG with new property: {str(e)}")
+            logger.exception(f"❌ Error updating RAG with new property: {str(e)}")
             return False
+    
+    def sync_property_changes(self, upsert_ids, delete_ids):
+        """Apply a batch of catalog changes from the watcher to the listing views and live indexes"""
+        # Direct MongoDB edits bypass update_property, so the stored card/detail
+        # views and the /getListings version are refreshed here
+        if upsert_ids:
+            backfill_listing_views(self.properties, upsert_ids)
+        if upsert_ids or delete_ids:
+            self.catalog_version.bump()
+        
+        snapshot = rag_state.snapshot
+        if rebuild_jobs.running:
+            # The running rebuild may already have read past these changes
+            rebuild_jobs.submit(reason="catalog changed during rebuild")
+        if not snapshot.vector_store:
+            rebuild_jobs.submit(reason="catalog changed before first build")
+            return
+        
+        projection = {field: 0 for field in VIEW_FIELDS}
+        documents = [
+            self.property_to_document(prop)
+            for prop in self.properties.find({"_id": {"$in": list(upsert_ids)}}, projection)
+        ]
+        deleted = [str(object_id) for object_id in delete_ids]
+        
+        if not documents and not deleted:
+            return
+        try:
+            result = property_changes.apply(documents, deleted, skip_indexed=True)
+            if result:
+                logger.info("🔁 Index sync applied", extra=fields(**result))
+        except (RuntimeError, ValueError) as e:
+            # Index types that cannot remove vectors (IVF/HNSW/quantized) are refreshed by a rebuild
+            logger.warning(f"⚠️ Incremental index update unavailable ({str(e)}), rebuilding")
+            rebuild_jobs.submit(reason="index sync")
 
 # Initialize Flask app and database
 app = Flask(__name__)
 CORS(app)
+install_json_provider(app)
+install_server_timing(app)
+install_request_ids(app)
 db = PropertyDatabase()
+# At import so WSGI servers (gunicorn) run migrations too, not only __main__
+db.ensure_indexes()
+
+# Knowledge base rebuilds run in the background, one at a time
+rebuild_jobs = RebuildJobManager(db.run_rebuild_job)
+
+# Listing writes batched into one copy-on-write publish (RAG_WRITE_BATCH_MAX)
+property_changes = PropertyChangeQueue(index_writer, db.publish_property_changes)
+
+# Keeps the indexes in step with direct MongoDB edits, updates and deletes (RAG_SYNC_MODE)
+index_watcher = PropertyChangeWatcher(lambda: db.properties, db.sync_property_changes, ignore_fields=VIEW_FIELDS)
+
+# Pre-serialized /getListings responses
+listings_cache = ResponseCache(dumps=app.json.dumps_bytes)
+
+def service_metric_samples():
+    """Component stats read at /metrics scrape time"""
+    snapshot = rag_state.snapshot
+    yield from vector_index_samples(
+        describe_index(snapshot.vector_store.index) if snapshot.vector_store else None,
+        keyword_documents=len(snapshot.keyword_index),
+        properties=snapshot.property_count
+    )
+    yield from cache_samples("query_embedding", embedder.stats())
+    yield from cache_samples("listings", listings_cache.stats())
+    yield from llm_guard_samples(llm_guard.stats())
+    yield from mongo_pool_samples(db.connection.stats())
+
+# Per-route request latency and GET /metrics for Prometheus
+install_metrics(app, service_metric_samples)
 
 @app.route("/addListing", methods=['POST'])
 def add_listing():
@@ -320,9 +635,9 @@ def add_listing():
         # Update RAG knowledge base with new property
         rag_updated = db.update_rag_with_property(property_data)
         
-        print(f"✅ Added property to MongoDB: {property_data['propertyName']}")
-        print(f"📄 Property ID: {property_id}")
-        print(f"🧠 RAG updated: {'✅' if rag_updated else '❌'}")
+        logger.info("✅ Added property to MongoDB", extra=fields(
+            sampled=True, propertyId=property_id, ragUpdated=rag_updated
+        ))
         
         return jsonify({
             "msg": "Success", 
@@ -338,108 +653,56 @@ def add_listing():
         }), 200
         
     except Exception as e:
-        print(f"❌ Error in addListing: {str(e)}")
+        logger.exception(f"❌ Error in addListing: {str(e)}")
         return jsonify({"error": str(e)}), 400
 
+def build_listings_payload():
+    """Listing page payload, built only when the catalog changes"""
+    # Cards are precomputed at write time
+    formatted_properties = db.get_listing_cards()
+    
+    logger.debug("📊 Retrieved properties from database", extra=fields(properties=len(formatted_properties)))
+    
+    return {
+        "success": True,
+        "count": len(formatted_properties),
+        "properties": formatted_properties
+    }
+
 @app.route("/getListings", methods=['GET'])
 def get_listings():
     """Get all property listings from MongoDB"""
     try:
-        properties = db.get_all_properties()
-        
-        # Transform data for frontend compatibility
-        formatted_properties = []
-        for prop in properties:
-            # Handle description JSON formatting
-            description_data = prop.get('description', '')
-            if isinstance(description_data, dict):
-                # For frontend display, use the text content
-                description_for_frontend = description_data.get('text', '')
-            else:
-                # Fallback for string descriptions
-                description_for_frontend = str(description_data)
-                
-            formatted_prop = {
-                "id": prop['_id'],
-                "title": prop.get('propertyName', ''),
-                "price": f"₹{prop.get('propertyCostRange', '')}",
-                "location": prop.get('propertyAddress', ''),
-                "bedrooms": prop.get('bedrooms', 2),
-                "bathrooms": prop.get('bathrooms', 1),
-                "area": prop.get('area', ''),
-                "features": prop.get('features', []),
-                "roomPhotoId": prop.get('roomPhotoId'),
-                "bathroomPhotoId": prop.get('bathroomPhotoId'),
-                "drawingRoomPhotoId": prop.get('drawingRoomPhotoId'),
-                "kitchenPhotoId": prop.get('kitchenPhotoId'),
-                "description": description_for_frontend,
-                "descriptionJson": prop.get('description'),  # Include full JSON for advanced features
-                "created_at": prop.get('created_at'),
-                "updated_at": prop.get('updated_at')
-            }
-            formatted_properties.append(formatted_prop)
-        
-        print(f"📊 Retrieved {len(formatted_properties)} properties from database")
-        
-        return jsonify({
-            "success": True,
-            "count": len(formatted_properties),
-            "properties": formatted_properties
-        }), 200
+        # Serve the pre-serialized body while the catalog version is unchanged
+        return listings_cache.respond("listings", db.catalog_version.current(), build_listings_payload)
         
     except Exception as e:
-        print(f"❌ Error in getListings: {str(e)}")
+        logger.exception(f"❌ Error in getListings: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 @app.route("/getProperty/<property_id>", methods=['GET'])
 def get_property(property_id):
     """Get a specific property by ID"""
     try:
-        property_data = db.get_property_by_id(property_id)
+        formatted_property = db.get_property_detail(property_id)
         
-        if not property_data:
+        if not formatted_property:
             return jsonify({"error": "Property not found"}), 404
         
-        # Handle description JSON formatting
-        description_data = property_data.get('description', '')
-        if isinstance(description_data, dict):
-            # For frontend display, use the text content
-            description_for_frontend = description_data.get('text', '')
-        else:
-            # Fallback for string descriptions
-            description_for_frontend = str(description_data)
-        
-        # Format for frontend
-        formatted_property = {
-            "id": property_data['_id'],
-            "propertyName": property_data.get('propertyName', ''),
-            "propertyAddress": property_data.get('propertyAddress', ''),
-            "propertyCostRange": property_data.get('propertyCostRange', ''),
-            "roomPhotoId": property_data.get('roomPhotoId'),
-            "bathroomPhotoId": property_data.get('bathroomPhotoId'),
-            "drawingRoomPhotoId": property_data.get('drawingRoomPhotoId'),
-            "kitchenPhotoId": property_data.get('kitchenPhotoId'),
-            "description": description_for_frontend,
-            "descriptionJson": property_data.get('description'),  # Include full JSON structure
-            "bedrooms": property_data.get('bedrooms', 2),
-            "bathrooms": property_data.get('bathrooms', 1),
-            "area": property_data.get('area', ''),
-            "features": property_data.get('features', [])
-        }
-        
         return jsonify({
             "success": True,
             "property": formatted_property
         }), 200
         
     except Exception as e:
-        print(f"❌ Error in getProperty: {str(e)}")
+        logger.exception(f"❌ Error in getProperty: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 @app.route("/askIt", methods=["GET"])
 def intelligent_qa():
     """Enhanced Q&A using RAG + Database queries for intelligent property assistance"""
-    global global_chain, global_vector_store
+    # One consistent snapshot for the whole request, even if a rebuild swaps mid-way
+    snapshot = rag_state.snapshot
     
     question = request.args.get("question", "")
     
@@ -447,77 +710,60 @@ def intelligent_qa():
         return jsonify({"answer": "Please provide a question."}), 400
     
     try:
-        # Get all properties for potential card display
-        all_properties = db.get_all_properties()
+        # Get precomputed cards for potential card display
+        all_properties = db.get_listing_cards()
         
+        result = None
+        degraded_reason = None
         # If RAG chain is available, use it for intelligent responses
-        if global_chain and global_vector_store:
-            print(f"🤖 Processing question with RAG: {question}")
-            
+        if snapshot.ready:
             # Use RAG for intelligent context-aware responses
-            result = global_chain({
-                "question": f"Answer in English: {question} (If showing properties, provide a brief summary and mention that detailed property cards will be displayed below. For VR tours, mention that 3D tour buttons are available.)"
-            }, return_only_outputs=True)
-            
-            # Format the response
-            answer = result.get('answer', '')
-            answer = re.sub(r"\*\*(.*?)\*\*", r"**\1**", answer)
-            answer = answer.replace("\\n", "\n")
-            answer = answer.replace("\\*", "*")
-            
-            # Determine if we should include property cards based on the question/answer
-            properties_to_show = []
-            show_properties = False
-            
-            # Check if the question or answer indicates property listings should be shown
-            property_keywords = ['property', 'properties', 'listing', 'listings', 'show', 'recommend', 'available', 'vr', 'tour', 'photos']
-            question_lower = question.lower()
-            answer_lower = answer.lower()
-            
-            if any(keyword in question_lower for keyword in property_keywords) or any(keyword in answer_lower for keyword in property_keywords):
-                show_properties = True
-            
-            # If we should show properties, format them for the frontend
-            if show_properties and all_properties:
-                for prop in all_properties:
-                    # Format property for frontend PropertyCard component
-                    formatted_property = {
-                        "id": prop.get('_id', ''),
-                        "title": prop.get('propertyName', 'Unknown Property'),
-                        "price": f"₹{prop.get('propertyCostRange', 'Price not specified')}",
-                        "location": prop.get('propertyAddress', 'Location not specified'),
-                        "bedrooms": prop.get('bedrooms', 2),
-                        "bathrooms": prop.get('bathrooms', 1),
-                        "area": prop.get('area', 'Area not specified'),
-                        "features": prop.get('features', []),
-                        "description": prop.get('description', ''),
-                        # VR Tour data - include both individual props and nested object
-                        "hasVRTour": bool(prop.get('roomPhotoId') or prop.get('bathroomPhotoId') or prop.get('drawingRoomPhotoId') or prop.get('kitchenPhotoId')),
-                        "roomPhotoId": prop.get('roomPhotoId'),
-                        "bathroomPhotoId": prop.get('bathroomPhotoId'),
-                        "drawingRoomPhotoId": prop.get('drawingRoomPhotoId'),
-                        "kitchenPhotoId": prop.get('kitchenPhotoId'),
-                        "vrTourData": {
-                            "roomPhotoId": prop.get('roomPhotoId'),
-                            "bathroomPhotoId": prop.get('bathroomPhotoId'),
-                            "drawingRoomPhotoId": prop.get('drawingRoomPhotoId'),
-                            "kitchenPhotoId": prop.get('kitchenPhotoId')
-                        },
-                        # Use a placeholder image or the first available room image
-                        "image": f"/api/images/{prop.get('roomPhotoId')}" if prop.get('roomPhotoId') else "/placeholder-property.jpg"
-                    }
-                    properties_to_show.append(formatted_property)
+            try:
+                result = question_flights.do((snapshot.version, normalize_query(question)), snapshot.chain, {
+                    "question": question,
+                    # Kept out of retrieval and history so "VR"/"3D" here never becomes a search constraint
+                    "instructions": "Answer in English. If showing properties, provide a brief summary and mention that detailed property cards will be displayed below. For VR tours, mention that 3D tour buttons are available."
+                }, return_only_outputs=True)
+            except LLMUnavailable as e:
+                # Gemini is slow, saturated or failing: answer without it instead of hanging the request
+                degraded_reason = e.reason
+                logger.warning(f"⚠️ Gemini unavailable ({e.reason}), answering without the LLM")
+        
+        if result is not None:
+            with stage("postprocess"):
+                # Format the response
+                answer = result.get('answer', '')
+                answer = re.sub(r"\*\*(.*?)\*\*", r"**\1**", answer)
+                answer = answer.replace("\\n", "\n")
+                answer = answer.replace("\\*", "*")
+                
+                # Determine if we should include property cards based on the question/answer
+                properties_to_show = []
+                show_properties = False
                 
-                # Limit to 6 properties to avoid overwhelming the chat
-                properties_to_show = properties_to_show[:6]
+                # Check if the question or answer indicates property listings should be shown
+                property_keywords = ['property', 'properties', 'listing', 'listings', 'show', 'recommend', 'available', 'vr', 'tour', 'photos']
+                question_lower = question.lower()
+                answer_lower = answer.lower()
+                
+                if any(keyword in question_lower for keyword in property_keywords) or any(keyword in answer_lower for keyword in property_keywords):
+                    show_properties = True
+                
+                # If we should show properties, format them for the frontend
+                if show_properties and all_properties:
+                    # Limit to 6 properties to avoid overwhelming the chat
+                    properties_to_show = all_properties[:6]
             
-            print(f"🤖 RAG Answer: {answer}")
-            print(f"📊 Properties to show: {len(properties_to_show)}")
+            # Sizes only: the answer text itself is large and already in the response
+            logger.info("🤖 RAG answer", extra=fields(
+                sampled=True, source="rag_enhanced", answerChars=len(answer), properties=len(properties_to_show)
+            ))
             
             response_data = {
                 "answer": answer,
                 "source": "rag_enhanced",
-                "properties_in_knowledge_base": len(all_properties)
+                "properties_in_knowledge_base": len(all_properties),
+                "timings": result.get('timings', {})
             }
             
             # Add properties if we found relevant ones
@@ -528,81 +774,160 @@ def intelligent_qa():
             return jsonify(response_data), 200
             
         else:
-            # Fallback to database-only responses
-            print(f"🤖 Processing question with database fallback: {question}")
+            if degraded_reason is not None:
+                degraded = search_fallback_answer(question, snapshot, degraded_reason)
+                if degraded is not None:
+                    return jsonify(degraded), 200
             
+            # Fallback to database-only responses
             if not all_properties:
                 answer = "No property listings found in the database. Please add properties first."
                 return jsonify({
                     "answer": answer,
                     "source": "database_fallback",
+                    "degraded": degraded_reason,
                     "suggestion": "For more intelligent responses, please ensure the RAG system is properly initialized."
                 }), 200
             else:
                 latest_property = all_properties[-1]  # Get most recent property
                 
                 if "cost" in question.lower() or "price" in question.lower():
-                    answer = f"The latest property '{latest_property['propertyName']}' is priced at ₹{latest_property['propertyCostRange']}."
+                    answer = f"The latest property '{latest_property['title']}' is priced at {latest_property['price']}."
                 elif "address" in question.lower() or "location" in question.lower():
-                    answer = f"The property is located at {latest_property['propertyAddress']}."
+                    answer = f"The property is located at {latest_property['location']}."
                 elif "photo" in question.lower() or "image" in question.lower() or "vr" in question.lower() or "tour" in question.lower():
-                    photo_count = sum(1 for photo_id in [
-                        latest_property.get('roomPhotoId'),
-                        latest_property.get('bathroomPhotoId'), 
-                        latest_property.get('drawingRoomPhotoId'),
-                        latest_property.get('kitchenPhotoId')
-                    ] if photo_id)
-                    answer = f"The property '{latest_property['propertyName']}' has {photo_count} uploaded photos available for VR tour viewing."
+                    photo_count = sum(1 for photo_id in latest_property['vrTourData'].values() if photo_id)
+                    answer = f"The property '{latest_property['title']}' has {photo_count} uploaded photos available for VR tour viewing."
                 elif "count" in question.lower() or "how many" in question.lower():
                     answer = f"We currently have {len(all_properties)} properties in our database."
                 else:
-                    answer = f"**{latest_property['propertyName']}**\n\nLocation: {latest_property['propertyAddress']}\nPrice: ₹{latest_property['propertyCostRange']}\n\n{latest_property.get('description', 'Contact us for more details!')}"
+                    answer = f"**{latest_property['title']}**\n\nLocation: {latest_property['location']}\nPrice: {latest_property['price']}\n\n{latest_property['description'] or 'Contact us for more details!'}"
                 
                 # For property-related questions, also show property cards
                 if any(keyword in question.lower() for keyword in ['property', 'properties', 'show', 'list', 'available']):
-                    properties_to_show = []
-                    for prop in all_properties[:3]:  # Show top 3 properties
-                        formatted_property = {
-                            "id": prop.get('_id', ''),
-                            "title": prop.get('propertyName', 'Unknown Property'),
-                            "price": f"₹{prop.get('propertyCostRange', 'Price not specified')}",
-                            "location": prop.get('propertyAddress', 'Location not specified'),
-                            "bedrooms": prop.get('bedrooms', 2),
-                            "bathrooms": prop.get('bathrooms', 1),
-                            "area": prop.get('area', 'Area not specified'),
-                            "features": prop.get('features', []),
-                            "hasVRTour": bool(prop.get('roomPhotoId') or prop.get('bathroomPhotoId') or prop.get('drawingRoomPhotoId') or prop.get('kitchenPhotoId')),
-                            "roomPhotoId": prop.get('roomPhotoId'),
-                            "bathroomPhotoId": prop.get('bathroomPhotoId'),
-                            "drawingRoomPhotoId": prop.get('drawingRoomPhotoId'),
-                            "kitchenPhotoId": prop.get('kitchenPhotoId'),
-                            "image": f"/api/images/{prop.get('roomPhotoId')}" if prop.get('roomPhotoId') else "/placeholder-property.jpg"
-                        }
-                        properties_to_show.append(formatted_property)
+                    properties_to_show = all_properties[:3]  # Show top 3 properties
                     
                     return jsonify({
                         "answer": answer,
                         "source": "database_fallback",
+                        "degraded": degraded_reason,
                         "properties": properties_to_show,
                         "showPropertyCards": True,
                         "suggestion": "For more intelligent responses, please ensure the RAG system is properly initialized."
                     }), 200
             
-            print(f"🤖 Database Answer: {answer}")
+            logger.info("🤖 Database answer", extra=fields(
+                sampled=True, source="database_fallback", answerChars=len(answer), degraded=degraded_reason
+            ))
             
             return jsonify({
                 "answer": answer,
                 "source": "database_fallback",
+                "degraded": degraded_reason,
                 "suggestion": "For more intelligent responses, please ensure the RAG system is properly initialized."
             }), 200
         
     except Exception as e:
-        print(f"❌ Error in intelligent_qa: {str(e)}")
+        logger.exception(f"❌ Error in intelligent_qa: {str(e)}")
         return jsonify({
             "answer": "Sorry, I encountered an error processing your question. Please try again.",
             "error": str(e)
         }), 500
 
+def search_filters(args):
+    """Explicit /api/search filters; prices accept lakh/crore notation"""
+    def price(name):
+        return parse_price_range(args[name])[0] if args.get(name) else None
+    
+    def integer(name):
+        return int(args[name]) if args.get(name) else None
+    
+    vr_tour = args.get('vrTour')
+    return {
+        "min_price": price('minPrice'),
+        "max_price": price('maxPrice'),
+        "bedrooms": integer('bedrooms'),
+        "min_bedrooms": integer('minBedrooms'),
+        "locality": args.get('locality') or None,
+        "has_vr_tour": vr_tour.lower() in ('1', 'true', 'yes') if vr_tour else None
+    }
+
+def search_fallback_answer(question, snapshot, reason):
+    """Best-matching listing cards for a chat question, used when Gemini cannot answer in time"""
+    if snapshot.vector_store is None and len(snapshot.keyword_index) == 0:
+        return None
+    try:
+        ranked = hybrid_search(
+            question,
+            snapshot.vector_store,
+            snapshot.keyword_index,
+            k=6,
+            query_embeddings=embedder,
+            allowlist=db.matching_property_ids(question),
+            chunk_map=global_chunk_map
+        )
+    except Exception as e:
+        logger.exception(f"❌ Search fallback failed: {str(e)}")
+        return None
+    cards = db.get_listing_cards_by_ids([property_id for property_id, _ in ranked])
+    if not cards:
+        return None
+    
+    return {
+        "answer": "Our assistant is busy right now, so here are the listings that best match your question. Ask again in a moment for a detailed answer.",
+        "source": "search_fallback",
+        "degraded": reason,
+        "properties": cards,
+        "showPropertyCards": True
+    }
+
+@app.route("/api/search", methods=["GET"])
+@app.route("/search", methods=["GET"])
+def search_properties():
+    """Rank property cards for a query with FAISS + BM25, without calling the LLM"""
+    started = time.perf_counter()
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Query parameter 'q' is required"}), 400
+    
+    try:
+        k = min(max(int(request.args.get('k', 10)), 1), 50)
+        filters = search_filters(request.args)
+    except ValueError:
+        return jsonify({"error": "Invalid search parameter"}), 400
+    
+    try:
+        snapshot = rag_state.snapshot
+        if snapshot.vector_store is None and len(snapshot.keyword_index) == 0:
+            return jsonify({"error": "Search index not initialized"}), 503
+        
+        # Budget/bedroom/locality/VR constraints from the query text and the explicit filters
+        allowlist = db.matching_property_ids(query, **filters)
+        ranked = hybrid_search(
+            query,
+            snapshot.vector_store,
+            snapshot.keyword_index,
+            k=k,
+            query_embeddings=embedder,
+            allowlist=allowlist,
+            chunk_map=global_chunk_map
+        )
+        scores = dict(ranked)
+        cards = db.get_listing_cards_by_ids([property_id for property_id, _ in ranked])
+        
+        return jsonify({
+            "success": True,
+            "query": query,
+            "filtered": allowlist is not None,
+            "count": len(cards),
+            "properties": [{**card, "score": round(scores[card['id']], 6)} for card in cards],
+            "tookMs": round((time.perf_counter() - started) * 1000, 1)
+        }), 200
+        
+    except Exception as e:
+        logger.exception(f"❌ Error in search: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route("/getImage/<image_id>", methods=["GET"])
 def get_image(image_id):
     """Proxy endpoint to retrieve images from the Node.js image service"""
@@ -618,44 +943,63 @@ def get_image(image_id):
 
 @app.route("/rebuildRAG", methods=["POST"])
 def rebuild_rag():
-    """Manually rebuild the RAG knowledge base from current database"""
+    """Start a background rebuild of the RAG knowledge base from current database"""
     try:
-        success = db.build_rag_knowledge_base()
+        job = rebuild_jobs.submit(reason="manual")
         
-        if success:
-            property_count = len(db.get_all_properties())
-            return jsonify({
-                "success": True,
-                "message": f"RAG knowledge base rebuilt successfully with {property_count} properties",
-                "properties_count": property_count
-            }), 200
-        else:
-            return jsonify({
-                "success": False,
-                "message": "Failed to rebuild RAG knowledge base"
-            }), 500
+        return jsonify({
+            "success": True,
+            "message": "RAG knowledge base rebuild started",
+            "job": job.to_dict(),
+            "statusUrl": f"/rebuildRAG/{job.id}"
+        }), 202
             
     except Exception as e:
-        print(f"❌ Error rebuilding RAG: {str(e)}")
+        logger.exception(f"❌ Error rebuilding RAG: {str(e)}")
         return jsonify({
             "success": False,
             "error": str(e)
         }), 500
 
+@app.route("/rebuildRAG/<job_id>", methods=["GET"])
+def rebuild_rag_status(job_id):
+    """Progress of a background RAG rebuild"""
+    job = rebuild_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Rebuild job not found"}), 404
+    return jsonify({"success": True, "job": job.to_dict()}), 200
+
 @app.route("/ragStatus", methods=["GET"])
 def rag_status():
     """Get current status of RAG system"""
-    global global_chain, global_vector_store, global_memory
+    snapshot = rag_state.snapshot
     
     try:
-        properties_count = len(db.get_all_properties())
+        properties_count = db.properties.count_documents({})
+        latest_job = rebuild_jobs.latest()
         
         return jsonify({
-            "rag_initialized": global_chain is not None,
-            "vector_store_ready": global_vector_store is not None,
-            "memory_initialized": global_memory is not None,
+            "rag_initialized": snapshot.chain is not None,
+            "vector_store_ready": snapshot.vector_store is not None,
+            "vector_index": describe_index(snapshot.vector_store.index) if snapshot.vector_store else None,
+            "keyword_index": snapshot.keyword_index.stats(),
+            "memory_initialized": snapshot.memory is not None,
             "properties_in_database": properties_count,
-            "system_status": "Ready" if global_chain else "Not initialized"
+            "properties_in_knowledge_base": snapshot.property_count,
+            "built_at": snapshot.built_at,
+            "rebuild_job": latest_job.to_dict() if latest_job else None,
+            "index_sync": index_watcher.stats(),
+            "index_writer": index_writer.stats(),
+            "index_write_batches": property_changes.stats(),
+            "query_embedding_cache": embedder.stats(),
+            "stage_timings": STAGE_SECONDS.summary(),
+            "llm_guard": llm_guard.stats(),
+            "single_flight": {
+                "property_detail": db.detail_flights.stats(),
+                "questions": question_flights.stats()
+            },
+            "mongo_pool": db.connection.stats(),
+            "system_status": "Ready" if snapshot.chain else "Not initialized"
         }), 200
         
     except Exception as e:
@@ -682,13 +1026,19 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"⚠️ RAG initialization error: {str(e)} - will use database fallback")
     
+    # Incremental index sync from here on
+    if index_watcher.start():
+        print(f"🔁 Index sync watcher started ({index_watcher.mode})")
+    
     print("\n📚 Available Endpoints:")
     print("  POST /addListing - Add property (with RAG update)")
     print("  GET  /getListings - Get all properties")
     print("  GET  /getProperty/<id> - Get specific property")
     print("  GET  /askIt?question=<query> - RAG-powered Q&A")
-    print("  POST /rebuildRAG - Rebuild RAG knowledge base")
+    print("  POST /rebuildRAG - Rebuild RAG knowledge base (background job)")
+    print("  GET  /rebuildRAG/<job_id> - Rebuild job progress")
     print("  GET  /ragStatus - Check RAG system status")
+    print("  GET  /metrics - Prometheus metrics")
     print("  GET  /getImage/<id> - Proxy to image service")
     
     app.run(port=5090, debug=True)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Price Backfill Job for CribConcierge
+Parses propertyCostRange on existing listings into the numeric priceMin/priceMax
+fields used by PropertyDatabase.find_properties
+
+Usage: python backfill_prices.py [--all] [--dry-run]
+"""
+
+import os
+import sys
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+
+from mongo_connection import get_connection_manager
+from pricing import PRICE_MIN_FIELD, price_fields
+
+BATCH_SIZE = 500
+
+def backfill_prices(db, reparse_all=False, dry_run=False):
+    """Fill numeric price fields; only documents missing them unless reparse_all"""
+    query = {} if reparse_all else {PRICE_MIN_FIELD: {"$exists": False}}
+    cursor = db.properties.find(query, {"propertyCostRange": 1})
+
+    scanned = updated = unparsed = 0
+    batch = []
+
+    for prop in cursor:
+        scanned += 1
+        fields = price_fields(prop)
+        if fields[PRICE_MIN_FIELD] is None:
+            unparsed += 1
+            print(f"⚠️ Could not parse price for {prop['_id']}: {prop.get('propertyCostRange')!r}")
+
+        batch.append(UpdateOne({"_id": prop["_id"]}, {"$set": fields}))
+        if len(batch) >= BATCH_SIZE:
+            updated += _flush(db, batch, dry_run)
+            batch = []
+
+    if batch:
+        updated += _flush(db, batch, dry_run)
+
+    return {"scanned": scanned, "updated": updated, "unparsed": unparsed}
+
+def _flush(db, batch, dry_run):
+    if dry_run:
+        return len(batch)
+    result = db.properties.bulk_write(batch, ordered=False)
+    return result.modified_count
+
+def main():
+    load_dotenv()
+    reparse_all = "--all" in sys.argv
+    dry_run = "--dry-run" in sys.argv
+
+    print("🏠 CribConcierge Price Backfill")
+    print("=" * 50)
+
+    try:
+        manager = get_connection_manager(os.environ.get("MONGODB_URI"))
+        stats = backfill_prices(manager.get_database(), reparse_all=reparse_all, dry_run=dry_run)
+    except Exception as e:
+        print(f"❌ Backfill failed: {e}")
+        return False
+
+    print(f"📊 Scanned: {stats['scanned']}")
+    print(f"✅ Updated: {stats['updated']}{' (dry run)' if dry_run else ''}")
+    print(f"⚠️ Unparsed: {stats['unparsed']}")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
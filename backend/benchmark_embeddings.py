@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Embedding Backend Parity and Latency Check for CribConcierge
+Compares the ONNX and ONNX int8 backends against the PyTorch embeddings the
+RAG index is built with: vector dimensions, cosine similarity per text,
+top-k retrieval agreement, and single-query / batch latency
+
+Usage: python benchmark_embeddings.py [--backends onnx,onnx-int8] [--min-cosine 0.98] [--k 5] [--runs 50]
+Exits non-zero if a backend changes the dimension or falls below --min-cosine.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from embedding_backends import create_embedder
+
+LOCALITIES = ["Koregaon Park", "Baner", "Hinjewadi", "Kothrud", "Viman Nagar", "Wakad", "Aundh", "Hadapsar"]
+FEATURES = ["covered parking", "gym", "swimming pool", "power backup", "modular kitchen", "balcony", "24x7 security"]
+
+QUERIES = [
+    "2 BHK under 50 lakh in Baner",
+    "show me flats with a VR tour",
+    "cheapest three bedroom apartment",
+    "property near Hinjewadi IT park with parking",
+    "luxury villa with swimming pool",
+    "what is the price of the Kothrud apartment?",
+    "any 1 bedroom flats for rent in Wakad",
+    "homes with a modular kitchen and balcony",
+]
+
+
+def sample_listings(count=200, seed=3):
+    """Listing texts in the shape of the RAG property documents"""
+    rng = np.random.default_rng(seed)
+    listings = []
+    for i in range(count):
+        bedrooms = int(rng.integers(1, 5))
+        locality = LOCALITIES[i % len(LOCALITIES)]
+        features = ", ".join(rng.choice(FEATURES, size=3, replace=False))
+        price = int(rng.integers(30, 250))
+        listings.append(
+            f"Property Name: {bedrooms} BHK Residence {i}\n"
+            f"Property Address: Lane {i}, {locality}, Pune\n"
+            f"Property Cost: ₹{price} Lakh\n"
+            f"Bedrooms: {bedrooms}\n"
+            f"Description: Well lit {bedrooms} bedroom home in {locality} close to schools and markets.\n"
+            f"Features: {features}"
+        )
+    return listings
+
+
+def latency(fn, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return np.percentile(timings, 50), np.percentile(timings, 95)
+
+
+def top_k(query_vectors, document_vectors, k):
+    return np.argsort(-(query_vectors @ document_vectors.T), axis=1)[:, :k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check ONNX embedding backends against PyTorch")
+    parser.add_argument("--backends", default="onnx,onnx-int8")
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    print("🧪 CribConcierge Embedding Backend Check")
+    print("=" * 50)
+
+    listings = sample_listings()
+    texts = listings + QUERIES
+    embedders = {"torch": create_embedder("torch")}
+    for backend in args.backends.split(","):
+        # No silent PyTorch fallback here: a missing export must fail the check
+        embedders[backend.strip()] = create_embedder(backend.strip(), fallback=False)
+
+    reference = np.array(embedders["torch"].embed_documents(texts), dtype=np.float32)
+    reference_top = top_k(reference[len(listings):], reference[:len(listings)], args.k)
+
+    success = True
+    for backend, embedder in embedders.items():
+        vectors = np.array(embedder.embed_documents(texts), dtype=np.float32)
+        query_p50, query_p95 = latency(lambda: embedder.embed_query(QUERIES[0]), args.runs)
+        batch_p50, _ = latency(lambda: embedder.embed_documents(listings[:32]), max(3, args.runs // 10))
+        print(f"\n🔹 {type(embedder).__name__} ({backend})")
+        print(f"   query  p50={query_p50:.2f}ms  p95={query_p95:.2f}ms")
+        print(f"   batch of 32  p50={batch_p50:.1f}ms")
+
+        if backend == "torch":
+            continue
+        if vectors.shape != reference.shape:
+            print(f"   ❌ Dimension mismatch: {vectors.shape} vs {reference.shape}")
+            success = False
+            continue
+
+        cosines = np.sum(vectors * reference, axis=1) / (
+            np.linalg.norm(vectors, axis=1) * np.linalg.norm(reference, axis=1)
+        )
+        found = top_k(vectors[len(listings):], vectors[:len(listings)], args.k)
+        overlap = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(found, reference_top)])
+        print(f"   cosine vs torch  min={cosines.min():.4f}  mean={cosines.mean():.4f}")
+        print(f"   top-{args.k} retrieval overlap with torch: {overlap:.1%}")
+        if cosines.min() < args.min_cosine:
+            print(f"   ❌ Below --min-cosine {args.min_cosine}")
+            success = False
+        else:
+            print("   ✅ Parity OK")
+
+    return success
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
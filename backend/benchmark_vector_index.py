@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Vector Index Benchmark for CribConcierge
+Recall@k, query latency and memory of IVF/HNSW/SQ8/PQ settings against the
+exact flat index, used to pick RAG_INDEX_TYPE, RAG_IVF_NPROBE,
+RAG_HNSW_EF_SEARCH and RAG_RERANK_FACTOR
+
+Usage: python benchmark_vector_index.py [--vectors embeddings.npy] [--count 200000] [--queries 500] [--k 5]
+Without --vectors, clustered random 384-d vectors stand in for MiniLM embeddings.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from vector_index import IndexConfig, MappedVectors, RerankingIndex, apply_search_params, build_index, describe_index
+
+IVF_NPROBES = (1, 4, 8, 16, 32, 64)
+HNSW_EF_SEARCHES = (16, 32, 64, 128, 256)
+RERANK_FACTORS = (0, 2, 4, 8, 16)
+
+
+def synthetic_vectors(count, dimension=384, clusters=256, seed=7):
+    """Clustered vectors; uniform noise would make every ANN index look bad"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimension)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=count)
+    vectors = centers[labels] + 0.35 * rng.normal(size=(count, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def timed_search(index, queries, k):
+    latencies = []
+    results = []
+    for query in queries:
+        started = time.perf_counter()
+        _, ids = index.search(query.reshape(1, -1), k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append(ids[0])
+    return np.array(results), np.array(latencies)
+
+
+def recall(results, truth):
+    hits = sum(len(set(found) & set(expected)) for found, expected in zip(results, truth))
+    return hits / truth.size
+
+
+def report(label, results, latencies, truth):
+    print(f"{label:<28} recall={recall(results, truth):.3f}  "
+          f"p50={np.percentile(latencies, 50):.3f}ms  p95={np.percentile(latencies, 95):.3f}ms")
+
+
+def report_memory(index):
+    description = describe_index(index)
+    mapped = description.get("mappedVectorBytes", 0)
+    print(f"💾 {description['type']}: {description['indexBytes'] / 2**20:.1f} MiB in RAM"
+          + (f" + {mapped / 2**20:.1f} MiB memory-mapped" if mapped else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FAISS index types against the flat index")
+    parser.add_argument("--vectors", help=".npy file of embeddings (rows are vectors)")
+    parser.add_argument("--count", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    print("📐 CribConcierge Vector Index Benchmark")
+    print("=" * 50)
+
+    vectors = np.load(args.vectors, mmap_mode="r") if args.vectors else synthetic_vectors(args.count)
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    rng = np.random.default_rng(11)
+    queries = vectors[rng.choice(len(vectors), size=args.queries, replace=False)]
+    queries = queries + 0.05 * rng.normal(size=queries.shape).astype(np.float32)
+    print(f"📊 {len(vectors)} vectors x {vectors.shape[1]}d, {len(queries)} queries, k={args.k}")
+
+    started = time.perf_counter()
+    flat = build_index(vectors, IndexConfig('flat'))
+    print(f"🏗 flat built in {time.perf_counter() - started:.1f}s")
+    truth, latencies = timed_search(flat, queries, args.k)
+    report("flat (exact)", truth, latencies, truth)
+    report_memory(flat)
+
+    config = IndexConfig('ivf', min_vectors=0)
+    started = time.perf_counter()
+    ivf = build_index(vectors, config)
+    print(f"🏗 ivf built in {time.perf_counter() - started:.1f}s (nlist={ivf.nlist})")
+    report_memory(ivf)
+    for nprobe in IVF_NPROBES:
+        config.nprobe = nprobe
+        apply_search_params(ivf, config)
+        report(f"ivf nprobe={nprobe}", *timed_search(ivf, queries, args.k), truth)
+
+    config = IndexConfig('hnsw', min_vectors=0)
+    started = time.perf_counter()
+    hnsw = build_index(vectors, config)
+    print(f"🏗 hnsw built in {time.perf_counter() - started:.1f}s (M={config.hnsw_m})")
+    report_memory(hnsw)
+    for ef_search in HNSW_EF_SEARCHES:
+        config.ef_search = ef_search
+        apply_search_params(hnsw, config)
+        report(f"hnsw efSearch={ef_search}", *timed_search(hnsw, queries, args.k), truth)
+
+    for index_type in ("sq8", "pq"):
+        # Trained and filled once; each re-rank factor wraps the same codes
+        started = time.perf_counter()
+        base = build_index(vectors, IndexConfig(index_type, min_vectors=0, rerank_factor=0))
+        print(f"🏗 {index_type} built in {time.perf_counter() - started:.1f}s")
+        report_memory(base)
+        report(f"{index_type} (no rerank)", *timed_search(base, queries, args.k), truth)
+
+        full_vectors = MappedVectors(vectors.shape[1])
+        full_vectors.append(vectors)
+        for rerank_factor in RERANK_FACTORS:
+            if not rerank_factor:
+                continue
+            index = RerankingIndex(base, full_vectors, rerank_factor)
+            if rerank_factor == RERANK_FACTORS[1]:
+                report_memory(index)
+            report(f"{index_type} rerank={rerank_factor}", *timed_search(index, queries, args.k), truth)
+
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
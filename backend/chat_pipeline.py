@@ -0,0 +1,181 @@
+"""
+Chat Pipeline for CribConcierge
+Replacement for ConversationalRetrievalChain with a configurable strategy for
+follow-up questions. The LangChain chain spends a full Gemini round trip
+condensing every follow-up into a standalone question before answering it;
+the cheaper strategies here answer in one LLM call.
+
+Strategies (CHAT_STRATEGY):
+  condense     LLM rewrite of follow-ups, then answer (legacy behaviour, 2 calls)
+  heuristic    local rewrite for retrieval, then answer (1 call)
+  single_call  local rewrite for retrieval, answer prompt carries the history (1 call)
+"""
+
+import logging
+import os
+import re
+import time
+
+from server_timing import stage
+
+logger = logging.getLogger(__name__)
+
+STRATEGIES = ('condense', 'heuristic', 'single_call')
+
+CONDENSE_PROMPT = """Given the following conversation and a follow up question, rephrase the follow up question to be a standalone question, in its original language.
+
+Chat History:
+{chat_history}
+Follow Up Input: {question}
+Standalone question:"""
+
+ANSWER_PROMPT = """Use the following pieces of context to answer the question at the end. If you don't know the answer, just say that you don't know, don't try to make up an answer.
+
+{context}
+
+Question: {question}
+Helpful Answer:"""
+
+HISTORY_ANSWER_PROMPT = """Use the following pieces of context and the conversation so far to answer the latest question. Resolve references such as "it" or "the second one" using the conversation. If you don't know the answer, just say that you don't know, don't try to make up an answer.
+
+{context}
+
+Conversation so far:
+{chat_history}
+
+Latest question: {question}
+Helpful Answer:"""
+
+# Words that make a follow-up depend on earlier turns
+_REFERENCE_PATTERN = re.compile(
+    r"\b(it|its|it's|that|this|those|these|them|they|their|there|one|ones|same|above|previous|"
+    r"first|second|third|last|cheaper|bigger|smaller|other|another|else|more)\b"
+)
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+# Follow-ups with at least this many words and no references are treated as standalone
+_STANDALONE_WORDS = 6
+
+
+def heuristic_standalone_question(question, previous_questions):
+    """
+    Retrieval query for a follow-up without an LLM call: questions that lean
+    on earlier turns are prefixed with the previous question, which usually
+    carries the location/budget/bedroom context the follow-up omits.
+    """
+    if not previous_questions:
+        return question
+    lowered = question.lower()
+    if len(_WORD_PATTERN.findall(lowered)) >= _STANDALONE_WORDS and not _REFERENCE_PATTERN.search(lowered):
+        return question
+    return f"{previous_questions[-1]} {question}"
+
+
+class ChatPipeline:
+    """
+    Retrieval-augmented chat over a retriever and a ConversationBufferMemory.
+    Called like the LangChain chain it replaces:
+    pipeline({"question": ...}, return_only_outputs=True) -> {"answer": ...}
+    with per-stage timings in milliseconds and the number of LLM calls made.
+    Optional "instructions" reach the answer prompt only, never retrieval or
+    the stored history. With a context_assembler, retrieved chunks are
+    compressed and packed to its token budget instead of pasted raw. With an
+    llm_guard, LLM calls go through it and LLMUnavailable reaches the caller;
+    nothing is saved to memory for a turn that was not answered.
+    """
+
+    def __init__(self, llm, retriever, memory, strategy=None, max_history_turns=None, context_assembler=None,
+                 llm_guard=None):
+        self.llm = llm
+        self.llm_guard = llm_guard
+        self.retriever = retriever
+        self.memory = memory
+        self.context_assembler = context_assembler
+        self.strategy = (strategy or os.environ.get("CHAT_STRATEGY", "single_call")).lower()
+        if self.strategy not in STRATEGIES:
+            raise ValueError(f"Unknown chat strategy '{self.strategy}', expected one of {', '.join(STRATEGIES)}")
+        self.max_history_turns = max_history_turns or int(os.environ.get("CHAT_HISTORY_TURNS", "6"))
+
+    def __call__(self, inputs, return_only_outputs=True):
+        return self.invoke(inputs["question"], inputs.get("instructions"))
+
+    def _history(self):
+        return self.memory.chat_memory.messages[-2 * self.max_history_turns:]
+
+    def _format_history(self, messages):
+        lines = []
+        for message in messages:
+            speaker = "Human" if message.type == "human" else "Assistant"
+            lines.append(f"{speaker}: {message.content}")
+        return "\n".join(lines)
+
+    def _complete(self, prompt):
+        with stage("llm"):
+            if self.llm_guard is not None:
+                response = self.llm_guard.call(self.llm.invoke, prompt)
+            else:
+                response = self.llm.invoke(prompt)
+        return getattr(response, "content", response)
+
+    def invoke(self, question, instructions=None):
+        timings = {}
+        llm_calls = 0
+        started = time.perf_counter()
+        history = self._history()
+
+        # 1. Standalone question for retrieval
+        stage_started = time.perf_counter()
+        if not history:
+            # First turn never needs condensing
+            retrieval_question = question
+        elif self.strategy == 'condense':
+            retrieval_question = self._complete(
+                CONDENSE_PROMPT.format(chat_history=self._format_history(history), question=question)
+            ).strip()
+            llm_calls += 1
+        else:
+            previous_questions = [message.content for message in history if message.type == "human"]
+            retrieval_question = heuristic_standalone_question(question, previous_questions)
+        timings["rewrite"] = (time.perf_counter() - stage_started) * 1000
+
+        # 2. Retrieval
+        stage_started = time.perf_counter()
+        documents = self.retriever.invoke(retrieval_question)
+        timings["retrieve"] = (time.perf_counter() - stage_started) * 1000
+
+        # 3. Context
+        stage_started = time.perf_counter()
+        if self.context_assembler is not None:
+            context, context_stats = self.context_assembler.assemble(documents)
+        else:
+            context = "\n\n".join(doc.page_content for doc in documents)
+            context_stats = {"chunksIn": len(documents), "chunksUsed": len(documents)}
+        timings["assemble"] = (time.perf_counter() - stage_started) * 1000
+
+        # 4. Answer
+        stage_started = time.perf_counter()
+        suffix = f" ({instructions})" if instructions else ""
+        if self.strategy == 'single_call' and history:
+            prompt = HISTORY_ANSWER_PROMPT.format(
+                context=context,
+                chat_history=self._format_history(history),
+                question=question + suffix
+            )
+        else:
+            prompt = ANSWER_PROMPT.format(context=context, question=retrieval_question + suffix)
+        answer = self._complete(prompt)
+        llm_calls += 1
+        timings["generate"] = (time.perf_counter() - stage_started) * 1000
+
+        self.memory.save_context({"question": question}, {"answer": answer})
+        timings["total"] = (time.perf_counter() - started) * 1000
+
+        timings = {stage: round(ms, 1) for stage, ms in timings.items()}
+        logger.info(f"⏱ Chat pipeline ({self.strategy}, {llm_calls} LLM call(s)): {timings}")
+        return {
+            "question": question,
+            "answer": answer,
+            "source_documents": documents,
+            "timings": timings,
+            "context": context_stats,
+            "llm_calls": llm_calls
+        }
@@ -0,0 +1,141 @@
+"""
+Context Assembler for CribConcierge
+Turns retrieved chunks into the LLM context: strips lines that carry no
+meaning for the model (photo IDs, "Not available" placeholders, timestamps),
+drops near-duplicate chunks with maximal marginal relevance, and packs the
+most relevant listings into a fixed token budget
+"""
+
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    # Downloads the BPE file on first use, which fails offline
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except ImportError:
+    _ENCODING = None
+except Exception as e:
+    logger.warning(f"⚠️ tiktoken encoding unavailable ({str(e)}), estimating token counts")
+    _ENCODING = None
+
+# Whole lines the model never needs
+_DROP_LINE_PATTERNS = [
+    re.compile(r'^\s*-?\s*(?:Property ID|Created|Updated)\s*:', re.IGNORECASE),
+    re.compile(r'Photo:\s*Not available\s*$', re.IGNORECASE),
+    re.compile(r'^\s*-?\s*No [\w ]+ photo\s*$', re.IGNORECASE),
+    re.compile(r'^\s*-?\s*Available Images.*:\s*$', re.IGNORECASE),
+]
+# "Kitchen Photo ID: 66b..." -> the room has a VR tour photo
+_PHOTO_ID_PATTERN = re.compile(r'^\s*-?\s*([\w ]+?) Photo ID\s*:', re.IGNORECASE)
+_WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+def count_tokens(text):
+    """Token count with tiktoken when installed, else the ~4 characters/token estimate"""
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return len(text) // 4 + 1
+
+
+def compress_chunk(text):
+    """Chunk text without boilerplate; photo ID lines collapse into one summary line"""
+    lines = []
+    photo_rooms = []
+    for line in text.splitlines():
+        photo = _PHOTO_ID_PATTERN.match(line)
+        if photo:
+            photo_rooms.append(photo.group(1).strip())
+            continue
+        if not line.strip() or any(pattern.search(line) for pattern in _DROP_LINE_PATTERNS):
+            continue
+        lines.append(line.strip())
+    if photo_rooms:
+        lines.append(f"VR Tour Photos: {', '.join(photo_rooms)}")
+    return lines
+
+
+def _similarity(words, other_words):
+    if not words or not other_words:
+        return 0.0
+    return len(words & other_words) / len(words | other_words)
+
+
+class ContextAssembler:
+    """
+    Builds the context block for the answer prompt. Chunks arrive in
+    retrieval order; relevance is taken from that rank and redundancy from
+    word overlap, so assembly costs no extra embedding calls.
+    """
+
+    def __init__(self, token_budget=None, mmr_lambda=0.7, duplicate_threshold=0.9):
+        self.token_budget = token_budget or int(os.environ.get("RAG_CONTEXT_TOKEN_BUDGET", "1500"))
+        self.mmr_lambda = mmr_lambda
+        # Chunks this similar to one already selected are dropped outright
+        self.duplicate_threshold = duplicate_threshold
+
+    def _mmr_order(self, candidates):
+        remaining = list(range(len(candidates)))
+        selected = []
+        while remaining:
+            best, best_score = None, None
+            for i in remaining:
+                relevance = 1.0 - i / len(candidates)
+                redundancy = max((_similarity(candidates[i]['words'], candidates[j]['words']) for j in selected), default=0.0)
+                if redundancy >= self.duplicate_threshold:
+                    continue
+                score = self.mmr_lambda * relevance - (1 - self.mmr_lambda) * redundancy
+                if best_score is None or score > best_score:
+                    best, best_score = i, score
+            if best is None:
+                break
+            selected.append(best)
+            remaining.remove(best)
+        return [candidates[i] for i in selected]
+
+    def assemble(self, documents):
+        """Context text and stats (chunks in/used, tokens of the used chunks before/after compression)"""
+        candidates = []
+        for doc in documents:
+            lines = compress_chunk(doc.page_content)
+            if lines:
+                candidates.append({
+                    "property_id": doc.metadata.get('property_id'),
+                    "text": doc.page_content,
+                    "lines": lines,
+                    # Field values only; the shared "Label:" template would make every listing look alike
+                    "words": set(_WORD_PATTERN.findall(" ".join(line.split(':', 1)[-1] for line in lines).lower()))
+                })
+
+        sections = []
+        seen_lines = {}   # property_id -> lines already in the context (chunk overlap)
+        used_tokens = 0
+        raw_tokens = 0
+        for candidate in self._mmr_order(candidates):
+            seen = seen_lines.setdefault(candidate['property_id'], set())
+            lines = [line for line in candidate['lines'] if line not in seen]
+            if not lines:
+                continue
+            section = "\n".join(lines)
+            tokens = count_tokens(section)
+            if used_tokens + tokens > self.token_budget:
+                if sections:
+                    continue
+                # Always keep the best chunk, truncated to the budget
+                section = section[:self.token_budget * 4]
+                tokens = count_tokens(section)
+            sections.append(section)
+            seen.update(lines)
+            used_tokens += tokens
+            raw_tokens += count_tokens(candidate['text'])
+
+        stats = {
+            "chunksIn": len(documents),
+            "chunksUsed": len(sections),
+            "tokensIn": raw_tokens,
+            "tokensUsed": used_tokens
+        }
+        return "\n\n".join(sections), stats
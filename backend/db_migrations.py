@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Database Migrations for CribConcierge
+Ensures the indexes behind PropertyDatabase's hot queries exist. Runs on
+application startup and can also be run by hand: python db_migrations.py
+"""
+
+import logging
+import sys
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel, UpdateOne
+
+from locality import LOCALITY_FIELD, locality_fields
+
+logger = logging.getLogger(__name__)
+
+PROPERTY_INDEXES = [
+    IndexModel([("propertyId", ASCENDING)], name="propertyId", sparse=True),
+    IndexModel([("status", ASCENDING), ("created_at", DESCENDING)], name="status_created_at"),
+    IndexModel([("created_at", DESCENDING)], name="created_at"),
+    IndexModel([("updated_at", DESCENDING)], name="updated_at"),
+    # Numeric price bounds from pricing.py; bedrooms-first serves exact bedroom counts
+    IndexModel([("bedrooms", ASCENDING), ("priceMin", ASCENDING)], name="bedrooms_priceMin"),
+    IndexModel([("priceMin", ASCENDING), ("bedrooms", ASCENDING)], name="priceMin_bedrooms"),
+    IndexModel([("priceMax", ASCENDING)], name="priceMax"),
+    # Locality filters from query_understanding; price second for "in baner under 80 lakh"
+    IndexModel([(LOCALITY_FIELD, ASCENDING), ("priceMin", ASCENDING)], name="locality_priceMin"),
+]
+
+# Queries the app issues on every request or write; checked by mongodb_diagnostic.py
+HOT_PROPERTY_QUERIES = [
+    ("get_property_by_id (_id)", {"_id": ObjectId()}, None),
+    ("get_property_by_id (propertyId)", {"propertyId": "sample-property"}, None),
+    ("active listings, newest first", {"status": "active"}, [("created_at", DESCENDING)]),
+    ("recently updated", {"updated_at": {"$gte": datetime.utcnow()}}, [("updated_at", DESCENDING)]),
+    ("bedroom filter", {"bedrooms": {"$gte": 2}}, None),
+    ("budget filter", {"priceMin": {"$lte": 5_000_000}}, None),
+    ("budget + bedrooms filter", {"priceMin": {"$lte": 5_000_000}, "bedrooms": 3}, None),
+    ("locality filter", {LOCALITY_FIELD: "baner"}, None),
+]
+
+
+def ensure_property_indexes(db):
+    """Create any missing properties-collection indexes; existing ones are left alone"""
+    names = db.properties.create_indexes(PROPERTY_INDEXES)
+    logger.info(f"✅ Property indexes ensured: {', '.join(names)}")
+    return names
+
+
+def backfill_localities(db, batch_size=500):
+    """Derive the locality field for listings stored before it existed"""
+    batch = []
+    updated = 0
+    for prop in db.properties.find({LOCALITY_FIELD: {"$exists": False}}, {"propertyAddress": 1}):
+        batch.append(UpdateOne({"_id": prop["_id"]}, {"$set": locality_fields(prop)}))
+        if len(batch) >= batch_size:
+            updated += db.properties.bulk_write(batch, ordered=False).modified_count
+            batch = []
+    if batch:
+        updated += db.properties.bulk_write(batch, ordered=False).modified_count
+    if updated:
+        logger.info(f"✅ Backfilled locality on {updated} listing(s)")
+    return updated
+
+
+def run_migrations(db):
+    """All startup migrations, in order"""
+    return {
+        "property_indexes": ensure_property_indexes(db),
+        "localities": backfill_localities(db)
+    }
+
+
+if __name__ == "__main__":
+    import os
+    from dotenv import load_dotenv
+    from mongo_connection import get_connection_manager
+
+    logging.basicConfig(level=logging.INFO)
+    load_dotenv()
+
+    try:
+        manager = get_connection_manager(os.environ.get("MONGODB_URI"))
+        results = run_migrations(manager.get_database())
+        print(f"✅ Migrations complete: {results}")
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        sys.exit(1)
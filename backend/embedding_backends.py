@@ -0,0 +1,188 @@
+"""
+Embedding Backends for CribConcierge
+Selects the sentence embedder used for ingest and queries (EMBEDDING_BACKEND):
+  torch      HuggingFaceEmbeddings on PyTorch (default)
+  onnx       the same model exported to ONNX, run with onnxruntime
+  onnx-int8  the ONNX export with dynamic int8 weight quantization (fastest on CPU)
+All backends return the same 384-dimension normalized vectors; check parity
+and latency with benchmark_embeddings.py before switching, and rebuild the
+RAG index afterwards so stored and query vectors come from the same backend.
+
+The ONNX models are exported ahead of time, never while the app starts:
+  python embedding_backends.py export [--no-quantize]
+Until they exist (or if onnxruntime is missing) the ONNX backends fall back
+to PyTorch with a warning.
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+BACKENDS = ('torch', 'onnx', 'onnx-int8')
+# all-MiniLM-L6-v2 was trained on sequences up to 256 tokens
+MAX_SEQUENCE_LENGTH = 256
+
+_INPUT_NAMES = ['input_ids', 'attention_mask', 'token_type_ids']
+
+
+def default_onnx_dir(model_name=MODEL_NAME):
+    return os.environ.get("EMBEDDING_ONNX_DIR") or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "models", model_name.split('/')[-1] + "-onnx"
+    )
+
+
+def onnx_model_path(model_dir, quantized):
+    return os.path.join(model_dir, "model.int8.onnx" if quantized else "model.onnx")
+
+
+def export_onnx(model_name=MODEL_NAME, model_dir=None, quantize=True):
+    """
+    Export the transformer to ONNX (dynamic batch and sequence axes) with its
+    tokenizer, plus a dynamically int8-quantized copy. Needs torch and
+    transformers (installed by sentence-transformers) and the onnx package.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    model_dir = model_dir or default_onnx_dir(model_name)
+    os.makedirs(model_dir, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    tokenizer.save_pretrained(model_dir)
+    model = AutoModel.from_pretrained(model_name).eval()
+
+    sample = tokenizer(["2 BHK apartment near the metro"], return_tensors="pt")
+    fp32_path = onnx_model_path(model_dir, quantized=False)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in _INPUT_NAMES),
+            fp32_path,
+            input_names=_INPUT_NAMES,
+            output_names=['last_hidden_state'],
+            dynamic_axes={name: {0: 'batch', 1: 'sequence'} for name in _INPUT_NAMES + ['last_hidden_state']},
+            opset_version=14
+        )
+    logger.info(f"✅ Exported {model_name} to {fp32_path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = onnx_model_path(model_dir, quantized=True)
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        logger.info(f"✅ Quantized to {int8_path}")
+    return model_dir
+
+
+class ONNXEmbeddings(Embeddings):
+    """
+    LangChain Embeddings over an ONNX export of a sentence-transformers model:
+    mean pooling over the attention mask and L2 normalization, matching the
+    model's own pipeline. The model must already be exported (export_onnx).
+    """
+
+    def __init__(self, model_name=MODEL_NAME, model_dir=None, quantized=True, batch_size=32, threads=None):
+        if onnxruntime is None:
+            raise ImportError("onnxruntime is required for the ONNX embedding backend")
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.model_dir = model_dir or default_onnx_dir(model_name)
+        self.quantized = quantized
+        self.batch_size = batch_size
+
+        path = onnx_model_path(self.model_dir, quantized)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found; run `python embedding_backends.py export` first")
+
+        options = onnxruntime.SessionOptions()
+        threads = threads or int(os.environ.get("EMBEDDING_THREADS", "0"))
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = onnxruntime.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self._input_names = {item.name for item in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+
+    def _embed(self, texts):
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = self.tokenizer(
+                texts[start:start + self.batch_size],
+                padding=True,
+                truncation=True,
+                max_length=MAX_SEQUENCE_LENGTH,
+                return_tensors="np"
+            )
+            inputs = {name: batch[name].astype(np.int64) for name in _INPUT_NAMES if name in self._input_names}
+            hidden = self.session.run(None, inputs)[0]
+
+            mask = batch['attention_mask'][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            vectors.append(pooled)
+        return np.vstack(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
+
+    def embed_documents(self, texts):
+        return self._embed(list(texts)).tolist()
+
+    def embed_query(self, text):
+        return self._embed([text])[0].tolist()
+
+
+def create_embedder(backend=None, model_name=MODEL_NAME, fallback=True):
+    """
+    Embedder for EMBEDDING_BACKEND. An ONNX backend that cannot load
+    (onnxruntime missing, model not exported) falls back to PyTorch unless
+    fallback=False, in which case the error is raised.
+    """
+    backend = (backend or os.environ.get("EMBEDDING_BACKEND", "torch")).lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}', expected one of {', '.join(BACKENDS)}")
+
+    if backend != 'torch':
+        try:
+            embedder = ONNXEmbeddings(model_name, quantized=backend == 'onnx-int8')
+            logger.info(f"✅ Using {backend} embeddings from {embedder.model_dir}")
+            return embedder
+        except Exception as e:
+            if not fallback:
+                raise
+            logger.warning(f"⚠️ {backend} embeddings unavailable ({str(e)}), using PyTorch embeddings")
+
+    from langchain.embeddings import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=model_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX")
+    parser.add_argument("command", choices=["export"])
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--dir", default=None, help="Output directory (default EMBEDDING_ONNX_DIR or backend/models/)")
+    parser.add_argument("--no-quantize", action="store_true", help="Skip the int8 copy")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        model_dir = export_onnx(args.model, args.dir, quantize=not args.no_quantize)
+    except ImportError as e:
+        logger.error(f"❌ Export needs torch, transformers, onnx and onnxruntime: {str(e)}")
+        return False
+    print(f"✅ ONNX models written to {model_dir}")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,94 @@
+"""
+Query Embedding Cache for CribConcierge
+Bounded LRU of question text -> query vector in front of an embedder, so
+repeated searches and chat questions skip the model forward pass
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from langchain_core.embeddings import Embeddings
+
+from metrics import counter
+from server_timing import stage
+
+_WHITESPACE = re.compile(r'\s+')
+
+# Texts run through the model; rate() over this is the embedding throughput
+EMBEDDED_TEXTS = counter(
+    "cribconcierge_embedded_texts_total",
+    "Texts embedded by the model (cache misses and ingest)",
+    labelnames=("kind",)
+)
+
+
+def normalize_query(text):
+    """Cache key: case- and whitespace-insensitive question text"""
+    return _WHITESPACE.sub(' ', (text or '').strip().lower())
+
+
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Wraps a LangChain Embeddings object. embed_query is memoized; document
+    embedding is passed straight through since ingest text is rarely repeated.
+    Used as the vector stores' embedding function, so every retrieval path
+    shares one cache.
+    """
+
+    def __init__(self, embedder, max_entries=None):
+        self.embedder = embedder
+        self.max_entries = max_entries if max_entries is not None else int(
+            os.environ.get("QUERY_EMBEDDING_CACHE_SIZE", "2048")
+        )
+        self._vectors = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def embed_query(self, text):
+        key = normalize_query(text)
+        with self._lock:
+            vector = self._vectors.get(key)
+            if vector is not None:
+                self._vectors.move_to_end(key)
+                self.hits += 1
+                return vector
+            self.misses += 1
+
+        # MiniLM is uncased, so embedding the normalized text changes nothing
+        with stage("embed"):
+            vector = self.embedder.embed_query(key)
+        EMBEDDED_TEXTS.inc(kind="query")
+
+        with self._lock:
+            self._vectors[key] = vector
+            self._vectors.move_to_end(key)
+            while len(self._vectors) > self.max_entries:
+                self._vectors.popitem(last=False)
+                self.evictions += 1
+        return vector
+
+    def embed_documents(self, texts):
+        with stage("embed"):
+            vectors = self.embedder.embed_documents(texts)
+        EMBEDDED_TEXTS.inc(len(texts), kind="document")
+        return vectors
+
+    def clear(self):
+        with self._lock:
+            self._vectors.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._vectors),
+                "maxEntries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hitRate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
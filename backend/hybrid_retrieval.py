@@ -0,0 +1,143 @@
+"""
+Hybrid Retrieval for CribConcierge
+Structured pre-filter plus vector ranking: hard constraints from the question
+select an allowlist of property IDs, and only the chunks of those properties
+are ranked by embedding similarity
+"""
+
+import logging
+import threading
+import weakref
+from typing import Any, Callable, List, Optional
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from server_timing import stage
+
+logger = logging.getLogger(__name__)
+
+
+class PropertyChunkMap:
+    """
+    property_id -> FAISS row positions per vector store, rebuilt only when the
+    index grows or shrinks so allowlisted search never walks the whole docstore.
+    Entries are held weakly, so stores retired by a snapshot swap drop out.
+    """
+
+    def __init__(self):
+        self._entries = weakref.WeakKeyDictionary()   # vector store -> (ntotal, positions)
+        self._lock = threading.Lock()
+
+    def positions(self, vector_store):
+        ntotal = vector_store.index.ntotal
+        entry = self._entries.get(vector_store)
+        if entry is None or entry[0] != ntotal:
+            with self._lock:
+                entry = self._entries.get(vector_store)
+                if entry is None or entry[0] != ntotal:
+                    positions = {}
+                    docstore = vector_store.docstore
+                    for position, doc_id in vector_store.index_to_docstore_id.items():
+                        doc = docstore.search(doc_id)
+                        property_id = doc.metadata.get('property_id') if isinstance(doc, Document) else None
+                        if property_id:
+                            positions.setdefault(str(property_id), []).append(position)
+                    entry = (ntotal, positions)
+                    self._entries[vector_store] = entry
+        return entry[1]
+
+    def invalidate(self):
+        """Force a rebuild after rows were removed or replaced in place"""
+        with self._lock:
+            self._entries.clear()
+
+
+def embed_query(vector_store, text):
+    """Query vector from the store's embedder, whichever form it was given in"""
+    embedder = vector_store.embedding_function
+    if hasattr(embedder, 'embed_query'):
+        return embedder.embed_query(text)
+    return embedder(text)
+
+
+def search_allowlisted(vector_store, query_vector, allowlist, k, chunk_map):
+    """
+    Rank only the chunks belonging to allowlisted properties. Cost is
+    proportional to the number of matching chunks, not the catalog size.
+    """
+    positions = chunk_map.positions(vector_store)
+    candidate_rows = [row for property_id in allowlist for row in positions.get(property_id, [])]
+    if not candidate_rows:
+        return []
+
+    vectors = np.vstack([vector_store.index.reconstruct(int(row)) for row in candidate_rows])
+    query = np.asarray(query_vector, dtype=np.float32)
+    distances = np.sum((vectors - query) ** 2, axis=1)
+
+    top = np.argsort(distances)[:k]
+    docstore = vector_store.docstore
+    index_to_id = vector_store.index_to_docstore_id
+    return [docstore.search(index_to_id[candidate_rows[i]]) for i in top]
+
+
+class HybridPropertyRetriever(BaseRetriever):
+    """
+    LangChain retriever that applies a metadata allowlist before vector search.
+    allowlist_fn(question) returns None when the question carries no hard
+    constraints, otherwise the set of property IDs that satisfy them.
+    """
+
+    vector_store: Any
+    allowlist_fn: Callable[[str], Optional[set]]
+    k: int = 5
+    # Above this share of the catalog a filtered FAISS scan beats reconstructing vectors
+    dense_allowlist_ratio: float = 0.5
+    chunk_map: Any = None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        if self.chunk_map is None:
+            self.chunk_map = PropertyChunkMap()
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        try:
+            allowlist = self.allowlist_fn(query)
+        except Exception as e:
+            logger.warning(f"⚠️ Constraint pre-filter failed, using plain vector search: {str(e)}")
+            allowlist = None
+
+        if allowlist is not None and not allowlist:
+            return []
+
+        # Embedded once up front, so the faiss stage times the search alone
+        query_vector = embed_query(self.vector_store, query)
+        with stage("faiss"):
+            return self._search(query_vector, allowlist)
+
+    def _search(self, query_vector, allowlist):
+        if allowlist is None:
+            return self.vector_store.similarity_search_by_vector(query_vector, k=self.k)
+
+        total = max(1, len(self.chunk_map.positions(self.vector_store)))
+        if len(allowlist) / total > self.dense_allowlist_ratio:
+            return self.vector_store.similarity_search_by_vector(
+                query_vector,
+                k=self.k,
+                filter={"property_id": list(allowlist)},
+                fetch_k=max(self.k * 4, self.vector_store.index.ntotal)
+            )
+
+        try:
+            return search_allowlisted(self.vector_store, query_vector, allowlist, self.k, self.chunk_map)
+        except RuntimeError as e:
+            # Index types without reconstruct support fall back to a filtered scan
+            logger.warning(f"⚠️ Allowlisted search unavailable ({str(e)}), using filtered scan")
+            return self.vector_store.similarity_search_by_vector(
+                query_vector,
+                k=self.k,
+                filter={"property_id": list(allowlist)},
+                fetch_k=self.vector_store.index.ntotal
+            )
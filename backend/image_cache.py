@@ -0,0 +1,293 @@
+"""
+Hot Image Cache for CribConcierge
+Byte-bounded LRU cache of image bodies and metadata in front of GridFS,
+with an optional shared directory (e.g. /dev/shm) so several workers can
+reuse each other's reads through memory-mapped files.
+
+Deletes reach other workers through tombstone files in the shared directory,
+which every cache hit checks. Without a shared directory each worker only
+knows about its own deletes, so another worker can keep serving a deleted
+image from memory for up to max_age seconds (IMAGE_CACHE_MAX_AGE_SECONDS).
+"""
+
+import json
+import logging
+import mmap
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class CachedImage:
+    """Image body plus the metadata needed to build a response"""
+
+    __slots__ = ('data', 'filename', 'content_type', 'length', 'cached_at')
+
+    def __init__(self, data, filename, content_type='image/jpeg'):
+        self.data = data
+        self.filename = filename
+        self.content_type = content_type
+        self.length = len(data)
+        self.cached_at = time.monotonic()
+
+
+class ImageCache:
+    """
+    Thread-safe LRU cache bounded by total body size in bytes.
+    GridFS files are immutable, so entries only leave the cache through
+    eviction, an invalidate() on delete (local, or a tombstone from another
+    worker) or reaching max_age.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, max_item_bytes=None, shared_dir=None, shared_max_bytes=None,
+                 max_age=3600):
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes or max(1, max_bytes // 8)
+        self.shared_dir = shared_dir
+        self.shared_max_bytes = shared_max_bytes or max_bytes * 4
+        # Bounds how long a delete can go unseen; tombstones are kept twice as long
+        self.max_age = max_age
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+
+        # Hit-rate metrics
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0
+
+        if self.shared_dir:
+            os.makedirs(self.shared_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        """Build a cache from IMAGE_CACHE_* environment variables"""
+        max_mb = int(os.environ.get("IMAGE_CACHE_MAX_MB", "256"))
+        item_mb = os.environ.get("IMAGE_CACHE_MAX_ITEM_MB")
+        shared_mb = os.environ.get("IMAGE_CACHE_SHARED_MAX_MB")
+        return cls(
+            max_bytes=max_mb * 1024 * 1024,
+            max_item_bytes=int(item_mb) * 1024 * 1024 if item_mb else None,
+            shared_dir=os.environ.get("IMAGE_CACHE_DIR") or None,
+            shared_max_bytes=int(shared_mb) * 1024 * 1024 if shared_mb else None,
+            max_age=int(os.environ.get("IMAGE_CACHE_MAX_AGE_SECONDS", "3600"))
+        )
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def accepts(self, length):
+        """Whether an image of this size is worth caching"""
+        return self.enabled and length <= self.max_item_bytes
+
+    def get(self, image_id):
+        """Return a CachedImage or None, promoting hits to most-recently-used"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(image_id)
+            if entry is not None and time.monotonic() - entry.cached_at > self.max_age:
+                self._drop_locked(image_id)
+                entry = None
+
+        if entry is not None:
+            # Deleted through another worker
+            if self._tombstoned(image_id):
+                with self._lock:
+                    self._drop_locked(image_id)
+                    self.misses += 1
+                return None
+            with self._lock:
+                if image_id in self._entries:
+                    self._entries.move_to_end(image_id)
+                self.hits += 1
+            return entry
+
+        entry = self._read_shared(image_id)
+        with self._lock:
+            if entry is not None:
+                self.shared_hits += 1
+            else:
+                self.misses += 1
+        if entry is not None:
+            self._store(image_id, entry)
+        return entry
+
+    def put(self, image_id, data, filename, content_type='image/jpeg'):
+        """Insert an image body, evicting least-recently-used entries as needed"""
+        if not self.accepts(len(data)):
+            with self._lock:
+                self.rejected += 1
+            return None
+
+        entry = CachedImage(bytes(data), filename, content_type)
+        # Read just before another worker deleted it: serve it once, never cache it
+        if self._tombstoned(image_id):
+            return entry
+        self._store(image_id, entry)
+        self._write_shared(image_id, entry)
+        return entry
+
+    def invalidate(self, image_id):
+        """Drop an image from the local and shared cache and tell the other workers"""
+        with self._lock:
+            self._drop_locked(image_id)
+
+        if self.shared_dir:
+            try:
+                with open(self._tombstone_path(image_id), 'w'):
+                    pass
+            except OSError as e:
+                logger.warning(f"⚠️ Could not write cache tombstone for {image_id}: {str(e)}")
+            for path in self._shared_paths(image_id):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"⚠️ Could not remove shared cache file {path}: {str(e)}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        """Snapshot of cache size and hit-rate metrics"""
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'maxBytes': self.max_bytes,
+                'hits': self.hits,
+                'sharedHits': self.shared_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'rejected': self.rejected,
+                'hitRate': round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+                'sharedDir': self.shared_dir
+            }
+
+    # ==================== INTERNALS ====================
+
+    def _drop_locked(self, image_id):
+        entry = self._entries.pop(image_id, None)
+        if entry is not None:
+            self.current_bytes -= entry.length
+
+    def _store(self, image_id, entry):
+        with self._lock:
+            previous = self._entries.pop(image_id, None)
+            if previous is not None:
+                self.current_bytes -= previous.length
+
+            self._entries[image_id] = entry
+            self.current_bytes += entry.length
+
+            while self.current_bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= evicted.length
+                self.evictions += 1
+
+    def _shared_paths(self, image_id):
+        base = os.path.join(self.shared_dir, os.path.basename(str(image_id)))
+        return base + '.bin', base + '.json'
+
+    def _tombstone_path(self, image_id):
+        return os.path.join(self.shared_dir, os.path.basename(str(image_id)) + '.deleted')
+
+    def _tombstoned(self, image_id):
+        """One stat() per hit; always False without a shared directory"""
+        return bool(self.shared_dir) and os.path.exists(self._tombstone_path(image_id))
+
+    def _read_shared(self, image_id):
+        """Load an entry written by another worker, via mmap to avoid an extra copy"""
+        if not self.shared_dir or self._tombstoned(image_id):
+            return None
+
+        body_path, meta_path = self._shared_paths(image_id)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                if size == 0 or size != meta.get('length'):
+                    return None
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    data = mapped[:]
+            os.utime(body_path, None)  # Keep recently used files away from pruning
+            return CachedImage(data, meta.get('filename'), meta.get('contentType', 'image/jpeg'))
+        except (FileNotFoundError, ValueError):
+            return None
+        except OSError as e:
+            logger.warning(f"⚠️ Shared image cache read failed for {image_id}: {str(e)}")
+            return None
+
+    def _write_shared(self, image_id, entry):
+        """Publish an entry for other workers; written to a temp file then renamed atomically"""
+        if not self.shared_dir:
+            return
+
+        body_path, meta_path = self._shared_paths(image_id)
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(body_path + suffix, 'wb') as f:
+                f.write(entry.data)
+            os.replace(body_path + suffix, body_path)
+
+            with open(meta_path + suffix, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'filename': entry.filename,
+                    'contentType': entry.content_type,
+                    'length': entry.length
+                }, f)
+            os.replace(meta_path + suffix, meta_path)
+
+            self._prune_shared()
+        except OSError as e:
+            logger.warning(f"⚠️ Shared image cache write failed for {image_id}: {str(e)}")
+
+    def _prune_shared(self):
+        """Keep the shared directory under its byte budget, oldest access first"""
+        try:
+            bodies = []
+            total = 0
+            # Every worker's copy has expired by now, so the tombstone is no longer needed
+            tombstone_cutoff = time.time() - 2 * self.max_age
+            with os.scandir(self.shared_dir) as it:
+                for item in it:
+                    if item.name.endswith('.deleted'):
+                        if item.stat().st_mtime < tombstone_cutoff:
+                            try:
+                                os.remove(item.path)
+                            except FileNotFoundError:
+                                pass
+                    elif item.name.endswith('.bin'):
+                        st = item.stat()
+                        bodies.append((st.st_mtime, st.st_size, item.path))
+                        total += st.st_size
+
+            if total <= self.shared_max_bytes:
+                return
+
+            for _, size, path in sorted(bodies):
+                if total <= self.shared_max_bytes:
+                    break
+                for stale in (path, path[:-len('.bin')] + '.json'):
+                    try:
+                        os.remove(stale)
+                    except FileNotFoundError:
+                        pass
+                total -= size
+        except OSError as e:
+            logger.warning(f"⚠️ Shared image cache prune failed: {str(e)}")
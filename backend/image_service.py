@@ -9,22 +9,34 @@ from PIL import Image
 import gridfs
 import pymongo
 from bson import ObjectId
+from bson.errors import InvalidId
 import io
 import os
+import re
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
+
+from image_cache import ImageCache
+from single_flight import SingleFlight
+from server_timing import stage
+from metrics import counter
+from mongo_connection import get_connection_manager
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+IMAGE_BYTES_SERVED = counter(
+    "cribconcierge_image_bytes_served_total",
+    "Image bytes sent to clients, by where they were read from",
+    labelnames=("source",)
+)
+
 class ImageService:
     """
     Flask-based image upload service using MongoDB GridFS
     Replaces the Node.js ImageUploadComponent
     """
     
-    def __init__(self, mongo_uri, db_name="imageupload", bucket_name="images"):
+    def __init__(self, mongo_uri, db_name="imageupload", bucket_name="images", cache=None, connection_manager=None):
         self.mongo_uri = mongo_uri
         self.db_name = db_name
         self.bucket_name = bucket_name
@@ -32,26 +44,41 @@ class ImageService:
         self.allowed_extensions = {'jpg', 'jpeg'}
         self.allowed_mime_types = {'image/jpeg', 'image/jpg'}
         
-        # Initialize MongoDB connection
-        self.client = None
-        self.db = None
-        self.fs = None
+        # Shared, pooled MongoDB connection
+        self.connection = connection_manager or get_connection_manager(mongo_uri)
+        self._fs = None
+        self._fs_generation = None
         self.initialized = False
         
+        # Hot image cache in front of GridFS
+        self.cache = cache if cache is not None else ImageCache.from_env()
+        # Concurrent cache misses for the same image share one GridFS read
+        self.flights = SingleFlight("images")
+        
+    @property
+    def client(self):
+        return self.connection.get_client()
+    
+    @property
+    def db(self):
+        return self.connection.get_database(self.db_name)
+    
+    @property
+    def fs(self):
+        """GridFS handle, rebuilt if the shared client was recreated (e.g. after fork)"""
+        db = self.db
+        if self._fs is None or self._fs_generation != self.connection.generation:
+            self._fs = gridfs.GridFS(db, collection=self.bucket_name)
+            self._fs_generation = self.connection.generation
+        return self._fs
+    
     def init(self):
         """Initialize MongoDB connection and GridFS"""
         try:
-            self.client = pymongo.MongoClient(
-                self.mongo_uri,
-                serverSelectionTimeoutMS=5000,
-                connectTimeoutMS=5000,
-                socketTimeoutMS=5000
-            )
             # Test connection
-            self.client.admin.command('ping')
+            self.connection.ping()
             
-            self.db = self.client[self.db_name]
-            self.fs = gridfs.GridFS(self.db, collection=self.bucket_name)
+            self.ensure_indexes()
             self.initialized = True
             logger.info("✅ Image Service initialized successfully")
             return True
@@ -183,7 +210,8 @@ class ImageService:
                 }), 400
             
             # Process image
-            processed_image = self.process_image(file_data)
+            with stage("pillow"):
+                processed_image = self.process_image(file_data)
             
             # Generate unique filename
             timestamp = int(datetime.utcnow().timestamp() * 1000)
@@ -191,18 +219,19 @@ class ImageService:
             filename = f"{timestamp}_{secure_name}"
             
             # Save to GridFS
-            result = self.save_to_gridfs(
-                processed_image['data'],
-                filename,
-                {
-                    'originalName': file.filename,
-                    'mimetype': file.content_type,
-                    'width': processed_image['width'],
-                    'height': processed_image['height'],
-                    'originalSize': processed_image['original_size'],
-                    'processedSize': processed_image['processed_size']
-                }
-            )
+            with stage("gridfs"):
+                result = self.save_to_gridfs(
+                    processed_image['data'],
+                    filename,
+                    {
+                        'originalName': file.filename,
+                        'mimetype': file.content_type,
+                        'width': processed_image['width'],
+                        'height': processed_image['height'],
+                        'originalSize': processed_image['original_size'],
+                        'processedSize': processed_image['processed_size']
+                    }
+                )
             
             logger.info(f"✅ Image uploaded successfully: {result['fileId']}")
             
@@ -244,9 +273,21 @@ class ImageService:
                     'message': 'Invalid image ID'
                 }), 400
             
-            # Get file from GridFS
+            # Serve hot images straight from the cache
+            cached = self.cache.get(image_id)
+            if cached is not None:
+                IMAGE_BYTES_SERVED.inc(cached.length, source="cache")
+                return self._image_response(cached.data, cached.filename, cached.length, cached.content_type)
+            
+            # Get file from GridFS, once for all concurrent requests of a cacheable image
             try:
-                grid_file = self.fs.get(object_id)
+                with stage("gridfs"):
+                    loaded = self.flights.do(image_id, self._load_cacheable, image_id, object_id)
+                    if loaded is None:
+                        grid_file = self.fs.get(object_id)
+                if loaded is not None:
+                    IMAGE_BYTES_SERVED.inc(loaded.length, source="gridfs")
+                    return self._image_response(loaded.data, loaded.filename, loaded.length, loaded.content_type)
             except gridfs.NoFile:
                 return jsonify({
                     'success': False,
@@ -261,14 +302,8 @@ class ImageService:
                         break
                     yield chunk
             
-            return Response(
-                generate(),
-                mimetype='image/jpeg',
-                headers={
-                    'Content-Disposition': f'inline; filename="{grid_file.filename}"',
-                    'Content-Length': str(grid_file.length)
-                }
-            )
+            IMAGE_BYTES_SERVED.inc(grid_file.length, source="gridfs")
+            return self._image_response(generate(), grid_file.filename, grid_file.length)
             
         except Exception as e:
             logger.error(f"❌ Get image error: {str(e)}")
@@ -277,6 +312,24 @@ class ImageService:
                 'message': 'Failed to retrieve image'
             }), 500
     
+    def _load_cacheable(self, image_id, object_id):
+        """Read a small image into the cache; None when it is too large and must be streamed"""
+        grid_file = self.fs.get(object_id)
+        if not self.cache.accepts(grid_file.length):
+            return None
+        return self.cache.put(image_id, grid_file.read(), grid_file.filename)
+    
+    def _image_response(self, body, filename, length, content_type='image/jpeg'):
+        """Build the image response shared by cached and GridFS reads"""
+        return Response(
+            body,
+            mimetype=content_type,
+            headers={
+                'Content-Disposition': f'inline; filename="{filename}"',
+                'Content-Length': str(length)
+            }
+        )
+    
     def delete_image(self, image_id):
         """Delete image by ID - Flask route handler"""
         try:
@@ -298,6 +351,7 @@ class ImageService:
             # Delete from GridFS
             try:
                 self.fs.delete(object_id)
+                self.cache.invalidate(image_id)
                 logger.info(f"✅ Image deleted successfully: {image_id}")
                 
                 return jsonify({
@@ -318,8 +372,45 @@ class ImageService:
                 'message': 'Failed to delete image'
             }), 500
     
+    def ensure_indexes(self):
+        """Create the images.files indexes used by list_images"""
+        files = self.db[f"{self.bucket_name}.files"]
+        files.create_index([('uploadDate', pymongo.DESCENDING), ('_id', pymongo.DESCENDING)], name='uploadDate_id')
+        files.create_index([('metadata.originalName', pymongo.ASCENDING)], name='metadata_originalName')
+        files.create_index([('metadata.width', pymongo.ASCENDING), ('metadata.height', pymongo.ASCENDING)], name='metadata_dimensions')
+    
+    def _encode_cursor(self, file_doc):
+        """Opaque keyset cursor: upload time in ms plus the file id"""
+        upload_ms = int(file_doc['uploadDate'].replace(tzinfo=timezone.utc).timestamp() * 1000)
+        return f"{upload_ms}_{file_doc['_id']}"
+    
+    def _decode_cursor(self, cursor):
+        upload_ms, _, file_id = cursor.partition('_')
+        upload_date = datetime.fromtimestamp(int(upload_ms) / 1000, tz=timezone.utc).replace(tzinfo=None)
+        return upload_date, ObjectId(file_id)
+    
+    def _build_list_filter(self, args):
+        """Metadata filters for list_images, all served by images.files indexes"""
+        conditions = []
+        
+        original_name = args.get('originalName')
+        if original_name:
+            # Anchored prefix match so the metadata.originalName index is usable
+            conditions.append({'metadata.originalName': {'$regex': f"^{re.escape(original_name)}"}})
+        
+        for param, field, op in (
+            ('minWidth', 'metadata.width', '$gte'),
+            ('maxWidth', 'metadata.width', '$lte'),
+            ('minHeight', 'metadata.height', '$gte'),
+            ('maxHeight', 'metadata.height', '$lte')
+        ):
+            if args.get(param) is not None:
+                conditions.append({field: {op: int(args.get(param))}})
+        
+        return conditions
+    
     def list_images(self):
-        """List all images with pagination - Flask route handler"""
+        """List images with keyset pagination and metadata filters - Flask route handler"""
         try:
             if not self.initialized:
                 return jsonify({
@@ -327,38 +418,82 @@ class ImageService:
                     'message': 'Image service not initialized'
                 }), 500
             
-            # Get pagination parameters
-            page = int(request.args.get('page', 1))
-            limit = int(request.args.get('limit', 10))
-            skip = (page - 1) * limit
+            cursor = request.args.get('cursor')
+            page = request.args.get('page')
             
-            # Get files from GridFS
-            files_cursor = self.fs.find().skip(skip).limit(limit)
-            files = list(files_cursor)
+            try:
+                # Get pagination parameters
+                limit = max(1, min(int(request.args.get('limit', 10)), 100))
+                if page and not cursor:
+                    page = max(1, int(page))
+                
+                conditions = self._build_list_filter(request.args)
+                files_filter = {'$and': conditions} if conditions else {}
+                
+                query_conditions = list(conditions)
+                if cursor:
+                    upload_date, file_id = self._decode_cursor(cursor)
+                    query_conditions.append({'$or': [
+                        {'uploadDate': {'$lt': upload_date}},
+                        {'uploadDate': upload_date, '_id': {'$lt': file_id}}
+                    ]})
+            except (ValueError, TypeError, InvalidId):
+                return jsonify({
+                    'success': False,
+                    'message': 'Invalid pagination or filter parameters'
+                }), 400
+            
+            query = {'$and': query_conditions} if query_conditions else {}
+            
+            # Newest first; uploadDate/_id keeps the order stable for cursors
+            files_collection = self.db[f"{self.bucket_name}.files"]
+            files_cursor = files_collection.find(
+                query,
+                {'filename': 1, 'length': 1, 'uploadDate': 1, 'metadata': 1}
+            ).sort([('uploadDate', pymongo.DESCENDING), ('_id', pymongo.DESCENDING)])
+            
+            # Legacy page-number access still works but costs O(offset)
+            if page and not cursor:
+                files_cursor = files_cursor.skip((page - 1) * limit)
+            else:
+                page = None
+            
+            # Fetch one extra document to know whether another page exists
+            files = list(files_cursor.limit(limit + 1))
+            has_more = len(files) > limit
+            files = files[:limit]
             
             # Format response
             formatted_files = []
             for file in files:
                 formatted_files.append({
-                    'id': str(file._id),
-                    'filename': file.filename,
-                    'size': file.length,
-                    'uploadDate': file.upload_date,
-                    'metadata': getattr(file, 'metadata', {})
+                    'id': str(file['_id']),
+                    'filename': file.get('filename'),
+                    'size': file.get('length'),
+                    'uploadDate': file.get('uploadDate'),
+                    'metadata': file.get('metadata', {})
                 })
             
-            # Get total count
-            total_count = self.fs.find().count()
+            # Exact count only when filtering; otherwise use collection metadata
+            if files_filter:
+                total_count = files_collection.count_documents(files_filter)
+            else:
+                total_count = files_collection.estimated_document_count()
+            
+            pagination = {
+                'limit': limit,
+                'total': total_count,
+                'totalPages': (total_count + limit - 1) // limit,
+                'hasMore': has_more,
+                'nextCursor': self._encode_cursor(files[-1]) if has_more and files else None
+            }
+            if page:
+                pagination['page'] = page
             
             return jsonify({
                 'success': True,
                 'data': formatted_files,
-                'pagination': {
-                    'page': page,
-                    'limit': limit,
-                    'total': total_count,
-                    'totalPages': (total_count + limit - 1) // limit
-                }
+                'pagination': pagination
             }), 200
             
         except Exception as e:
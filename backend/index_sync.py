@@ -0,0 +1,322 @@
+"""
+Index Synchronisation for CribConcierge
+Keeps the RAG vector and keyword indexes in step with the properties
+collection without full rebuilds. Changes are read from a MongoDB change
+stream, or by polling updated_at on standalone servers, batched, and applied
+as incremental upserts and deletes to copies of the live indexes.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from vector_index import copy_vector_store
+
+logger = logging.getLogger(__name__)
+
+# MongoDB error code for "$changeStream is only supported on replica sets"
+CHANGE_STREAM_UNSUPPORTED = 40573
+
+def chunk_ids(chunks):
+    """Deterministic docstore IDs ("<property_id>:<n>") so a property's chunks can be replaced"""
+    counters = {}
+    ids = []
+    for chunk in chunks:
+        property_id = str(chunk.metadata.get('property_id', ''))
+        number = counters.get(property_id, 0)
+        counters[property_id] = number + 1
+        ids.append(f"{property_id}:{number}")
+    return ids
+
+
+def indexed_version(vector_store, chunk_map, property_id):
+    """updated_at recorded on a property's first indexed chunk, or None"""
+    rows = chunk_map.positions(vector_store).get(property_id)
+    if not rows:
+        return None
+    doc = vector_store.docstore.search(vector_store.index_to_docstore_id[rows[0]])
+    return getattr(doc, 'metadata', {}).get('updated_at')
+
+
+def apply_property_changes(snapshot, documents, deleted_ids, text_splitter, chunk_map):
+    """
+    Copies of the snapshot's vector and keyword indexes with the chunks of each
+    property in documents (one Document per property) replaced and the chunks
+    of deleted_ids dropped; the snapshot itself is left untouched.
+    Returns (vector_store, keyword_index, stats). Raises RuntimeError if the
+    vector index type cannot remove or copy vectors.
+    Run on the index writer thread, which publishes the result.
+    """
+    vector_store = copy_vector_store(snapshot.vector_store)
+    keyword_index = snapshot.keyword_index.copy()
+    replaced_ids = {str(doc.metadata['property_id']) for doc in documents} | {str(pid) for pid in deleted_ids}
+
+    positions = chunk_map.positions(snapshot.vector_store)
+    stale = [
+        vector_store.index_to_docstore_id[row]
+        for property_id in replaced_ids
+        for row in positions.get(property_id, [])
+    ]
+    if stale:
+        vector_store.delete(stale)
+
+    chunks = text_splitter.split_documents(documents)
+    if chunks:
+        vector_store.add_documents(chunks, ids=chunk_ids(chunks))
+
+    for property_id in deleted_ids:
+        keyword_index.remove(property_id)
+    for doc in documents:
+        keyword_index.add(doc.metadata['property_id'], doc.page_content)
+
+    stats = {"upserted": len(documents), "deleted": len(deleted_ids), "chunks": len(chunks)}
+    return vector_store, keyword_index, stats
+
+
+class PropertyChangeQueue:
+    """
+    Coalesces property upserts and deletes in front of the index writer. Each
+    publish copies the whole vector store, docstore and keyword index, which is
+    O(total listings) however small the change, so changes queued while a
+    publish is waiting or running are merged into the next one (last change
+    per property wins). At most max_batch properties go into one publish;
+    the rest follow in the next.
+    publish_fn(documents, deleted_ids, skip_indexed) runs on the writer and
+    its result is set on the Future of every change in the batch.
+    """
+
+    def __init__(self, index_writer, publish_fn, max_batch=None):
+        self.index_writer = index_writer
+        self.publish_fn = publish_fn
+        self.max_batch = max_batch or int(os.environ.get("RAG_WRITE_BATCH_MAX", "500"))
+        self._lock = threading.Lock()
+        self._queued = []            # (documents, deleted_ids, skip_indexed, future)
+        self._drain_queued = False
+        self._stats = {"changes": 0, "publishes": 0}
+
+    def submit(self, documents, deleted_ids, skip_indexed=False):
+        """Queue a change; returns a Future. Do not wait on it from the writer thread."""
+        future = Future()
+        entry = (list(documents), [str(pid) for pid in deleted_ids], skip_indexed, future)
+        with self._lock:
+            self._queued.append(entry)
+            self._stats["changes"] += 1
+            if self._drain_queued:
+                return future
+            self._drain_queued = True
+        self.index_writer.submit(self._drain)
+        return future
+
+    def apply(self, documents, deleted_ids, skip_indexed=False):
+        """Queue a change and wait for the publish that includes it"""
+        return self.submit(documents, deleted_ids, skip_indexed).result()
+
+    def _take_batch(self):
+        with self._lock:
+            batch, size = [], 0
+            while self._queued and (not batch or size < self.max_batch):
+                entry = self._queued.pop(0)
+                batch.append(entry)
+                size += len(entry[0]) + len(entry[1])
+            more = bool(self._queued)
+            # Changes queued from here on need another drain
+            self._drain_queued = more
+        if more:
+            self.index_writer.submit(self._drain)
+        return batch
+
+    def _drain(self):
+        batch = self._take_batch()
+        if not batch:
+            return
+        changes = {}  # property_id -> (document or None when deleted, skip_indexed)
+        for documents, deleted_ids, skip_indexed, _ in batch:
+            for property_id in deleted_ids:
+                changes[property_id] = (None, False)
+            for doc in documents:
+                changes[str(doc.metadata['property_id'])] = (doc, skip_indexed)
+        documents = [doc for doc, _ in changes.values() if doc is not None]
+        deleted_ids = [property_id for property_id, (doc, _) in changes.items() if doc is None]
+        skip_indexed = {property_id for property_id, (doc, skip) in changes.items() if doc is not None and skip}
+
+        try:
+            result = self.publish_fn(documents, deleted_ids, skip_indexed)
+        except Exception as e:
+            for *_, future in batch:
+                future.set_exception(e)
+            return
+        with self._lock:
+            self._stats["publishes"] += 1
+        for *_, future in batch:
+            future.set_result(result)
+
+    def stats(self):
+        with self._lock:
+            return {"pending": len(self._queued), **self._stats}
+
+
+class PropertyChangeWatcher:
+    """
+    Background thread that collects property inserts, updates and deletes and
+    hands them to on_changes(upsert_ids, delete_ids) in batches. Uses a change
+    stream when the server supports one, otherwise polls. Updates that only
+    set ignore_fields (views derived from the document) are not changes.
+    """
+
+    def __init__(self, collection_fn, on_changes, mode=None, poll_interval=None, batch_window=None,
+                 max_batch=500, delete_scan_every=12, ignore_fields=()):
+        self.collection_fn = collection_fn
+        self.on_changes = on_changes
+        self.ignore_fields = set(ignore_fields)
+        self.mode = (mode or os.environ.get("RAG_SYNC_MODE", "auto")).lower()
+        self.poll_interval = poll_interval or float(os.environ.get("RAG_SYNC_POLL_SECONDS", "5"))
+        self.batch_window = batch_window or float(os.environ.get("RAG_SYNC_BATCH_SECONDS", "1"))
+        self.max_batch = max_batch
+        # Polling finds deletes by diffing the full _id set, so it runs less often
+        self.delete_scan_every = delete_scan_every
+
+        self.active_mode = None
+        self._pending = {}           # _id -> True when deleted, False when upserted
+        self._pending_since = None
+        # Only advanced once every change before it has been applied, so a
+        # reconnect after a failed batch replays it from the change stream
+        self._resume_token = None
+        self._pending_token = None
+        self._retry_at = None
+        self._last_seen = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {"batches": 0, "upserts": 0, "deletes": 0, "errors": 0, "lastBatchAt": None, "lastError": None}
+
+    def start(self):
+        if self.mode == 'off' or self._thread is not None:
+            return False
+        self._last_seen = datetime.utcnow()
+        self._thread = threading.Thread(target=self._run, name="rag-index-sync", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.mode in ('auto', 'changestream'):
+                    self.active_mode = 'changestream'
+                    self._watch_change_stream()
+                else:
+                    self.active_mode = 'poll'
+                    self._poll()
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAM_UNSUPPORTED and self.mode == 'auto':
+                    logger.info("ℹ️ Change streams need a replica set; polling updated_at instead")
+                    self.mode = 'poll'
+                    continue
+                self._record_error(e)
+            except PyMongoError as e:
+                self._record_error(e)
+            self._stop.wait(self.poll_interval)
+
+    def _record_error(self, error):
+        logger.warning(f"⚠️ Index sync error, retrying: {str(error)}")
+        self._stats["errors"] += 1
+        self._stats["lastError"] = str(error)
+
+    def _watch_change_stream(self):
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}}]
+        with self.collection_fn().watch(
+            pipeline,
+            resume_after=self._resume_token,
+            max_await_time_ms=int(self.batch_window * 1000)
+        ) as stream:
+            while not self._stop.is_set():
+                change = stream.try_next()
+                if change is not None and not self._derived_only(change):
+                    self._record(change["documentKey"]["_id"], change["operationType"] == "delete")
+                self._pending_token = stream.resume_token
+                if not self._pending:
+                    # Nothing unapplied behind this point
+                    self._resume_token = self._pending_token
+                self._flush_if_due()
+
+    def _derived_only(self, change):
+        """An update that only rewrote ignore_fields, e.g. on_changes refreshing listing views"""
+        if change["operationType"] != "update" or not self.ignore_fields:
+            return False
+        description = change.get("updateDescription") or {}
+        updated = {name.split('.')[0] for name in description.get("updatedFields", {})}
+        removed = {name.split('.')[0] for name in description.get("removedFields", [])}
+        return bool(updated | removed) and (updated | removed) <= self.ignore_fields
+
+    def _poll(self):
+        collection = self.collection_fn()
+        known_ids = None
+        polls = 0
+        while not self._stop.wait(self.poll_interval):
+            for doc in collection.find({"updated_at": {"$gt": self._last_seen}}, {"updated_at": 1}).sort("updated_at", 1):
+                self._record(doc["_id"], False)
+                self._last_seen = max(self._last_seen, doc["updated_at"])
+
+            if polls % self.delete_scan_every == 0:
+                ids = {doc["_id"] for doc in collection.find({}, {"_id": 1})}
+                if known_ids is not None:
+                    for removed in known_ids - ids:
+                        self._record(removed, True)
+                    # Inserted directly without an updated_at
+                    for added in ids - known_ids:
+                        self._record(added, False)
+                known_ids = ids
+            polls += 1
+            self._flush()
+
+    def _record(self, object_id, deleted):
+        if not self._pending:
+            self._pending_since = time.monotonic()
+        # Last operation per document wins
+        self._pending[object_id] = deleted
+
+    def _flush_if_due(self):
+        if self._retry_at is not None and time.monotonic() < self._retry_at:
+            return
+        if self._pending and (
+            len(self._pending) >= self.max_batch or time.monotonic() - self._pending_since >= self.batch_window
+        ):
+            self._flush()
+
+    def _flush(self):
+        """Hand the pending batch to on_changes; a failed batch is kept and retried"""
+        if not self._pending:
+            return True
+        pending, self._pending = self._pending, {}
+        token = self._pending_token
+        upsert_ids = {object_id for object_id, deleted in pending.items() if not deleted}
+        delete_ids = {object_id for object_id, deleted in pending.items() if deleted}
+        try:
+            self.on_changes(upsert_ids, delete_ids)
+        except Exception as e:
+            self._record_error(e)
+            # Changes recorded since the swap are newer and win
+            for object_id, deleted in pending.items():
+                self._pending.setdefault(object_id, deleted)
+            # Retried after a poll interval instead of on every stream event
+            self._pending_since = time.monotonic()
+            self._retry_at = self._pending_since + self.poll_interval
+            return False
+
+        self._retry_at = None
+        if not self._pending:
+            self._resume_token = token
+        self._stats["batches"] += 1
+        self._stats["upserts"] += len(upsert_ids)
+        self._stats["deletes"] += len(delete_ids)
+        self._stats["lastBatchAt"] = datetime.utcnow()
+        return True
+
+    def stats(self):
+        return {"mode": self.active_mode or self.mode, "running": bool(self._thread and self._thread.is_alive()), **self._stats}
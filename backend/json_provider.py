@@ -0,0 +1,77 @@
+"""
+JSON Provider for CribConcierge
+Flask JSON provider built on orjson that serializes MongoDB ObjectIds and
+datetimes natively, falling back to the standard library when orjson is missing
+"""
+
+import json
+from datetime import date, datetime, timezone
+
+from bson import ObjectId
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional dependency: stdlib json is used without it
+    orjson = None
+
+
+def _default(obj):
+    """Types neither encoder handles on its own"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, datetime):
+        # MongoDB hands back naive UTC datetimes
+        if obj.tzinfo is None:
+            obj = obj.replace(tzinfo=timezone.utc)
+        return obj.isoformat()
+    if isinstance(obj, date):
+        return obj.isoformat()
+    return DefaultJSONProvider.default(obj)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Drop-in replacement for Flask's provider used by jsonify and app.json"""
+
+    # Key order is preserved as built; sorting only costs time
+    sort_keys = False
+
+    def dumps_bytes(self, obj, **kwargs):
+        """Serialize straight to UTF-8 bytes, skipping the str round trip"""
+        if orjson is not None:
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC
+            if kwargs.get('indent'):
+                option |= orjson.OPT_INDENT_2
+            if kwargs.get('sort_keys'):
+                option |= orjson.OPT_SORT_KEYS
+            return orjson.dumps(obj, default=_default, option=option)
+        return self.dumps(obj, **kwargs).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None:
+            return self.dumps_bytes(obj, **kwargs).decode('utf-8')
+        kwargs.setdefault('default', _default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        dump_args = {}
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            dump_args['indent'] = 2
+        return self._app.response_class(
+            self.dumps_bytes(obj, **dump_args),
+            mimetype=self.mimetype
+        )
+
+
+def install_json_provider(app):
+    """Use the fast provider for jsonify and app.json on this app"""
+    app.json = FastJSONProvider(app)
+    return app.json
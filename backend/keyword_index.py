@@ -0,0 +1,176 @@
+"""
+Keyword Index for CribConcierge
+In-memory BM25 inverted index over per-property documents, so exact terms
+(locality names, "gym", "parking") rank well where MiniLM embeddings blur them
+"""
+
+import math
+import re
+import threading
+from collections import Counter
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or the to with n
+""".split())
+
+# Field labels of the get_properties_as_documents template; only the label is
+# dropped, so "kitchen" or "area" in a value or a query still counts
+_LABEL_PATTERN = re.compile(
+    r'^\s*-?\s*(?:Property Name|Property Address|Property Cost|Bedrooms|Bathrooms|Area|Description|Features|Status)\s*:',
+    re.IGNORECASE
+)
+# Placeholders, IDs and timestamps: whole lines with nothing to match on
+_DROP_LINE_PATTERN = re.compile(
+    r'^\s*-?\s*(?:Property ID|Created|Updated)\s*:|Photo:\s*Not available\s*$|^\s*Available Images.*:\s*$',
+    re.IGNORECASE
+)
+# "Kitchen Photo ID: 66b..." -> the listing has a VR tour photo of the kitchen
+_PHOTO_ID_PATTERN = re.compile(r'^\s*-?\s*([\w ]+?) Photo ID\s*:', re.IGNORECASE)
+
+
+def tokenize(text):
+    """Lowercased alphanumeric terms minus stopwords"""
+    return [token for token in _TOKEN_PATTERN.findall((text or '').lower()) if token not in STOPWORDS]
+
+
+def document_terms(text):
+    """Terms of a property document without its template labels, IDs and placeholders"""
+    parts = []
+    photo_rooms = []
+    for line in (text or '').splitlines():
+        photo = _PHOTO_ID_PATTERN.match(line)
+        if photo:
+            photo_rooms.append(photo.group(1))
+        elif not _DROP_LINE_PATTERN.search(line):
+            parts.append(_LABEL_PATTERN.sub('', line))
+    if photo_rooms:
+        parts.append("vr tour " + " ".join(photo_rooms))
+    return tokenize("\n".join(parts))
+
+
+class BM25Index:
+    """
+    Okapi BM25 over one document per property. Documents are added, replaced
+    and removed individually; collection statistics are kept incrementally so
+    updates never require a rebuild.
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = {}      # term -> {doc_id: term frequency}
+        self._doc_lengths = {}   # doc_id -> token count
+        self._doc_terms = {}     # doc_id -> distinct terms, for removal without a vocabulary scan
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._doc_lengths)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._doc_lengths
+
+    def add(self, doc_id, text):
+        """Index a document, replacing any previous version with the same ID"""
+        doc_id = str(doc_id)
+        frequencies = Counter(document_terms(text))
+        with self._lock:
+            self._remove_locked(doc_id)
+            for term, count in frequencies.items():
+                self._postings.setdefault(term, {})[doc_id] = count
+            length = sum(frequencies.values())
+            self._doc_lengths[doc_id] = length
+            self._doc_terms[doc_id] = tuple(frequencies)
+            self._total_length += length
+
+    def remove(self, doc_id):
+        """Drop a document; returns False if it was not indexed"""
+        with self._lock:
+            return self._remove_locked(str(doc_id))
+
+    def _remove_locked(self, doc_id):
+        length = self._doc_lengths.pop(doc_id, None)
+        if length is None:
+            return False
+        self._total_length -= length
+        for term in self._doc_terms.pop(doc_id, ()):
+            docs = self._postings[term]
+            del docs[doc_id]
+            if not docs:
+                del self._postings[term]
+        return True
+
+    def clear(self):
+        with self._lock:
+            self._postings = {}
+            self._doc_lengths = {}
+            self._doc_terms = {}
+            self._total_length = 0
+
+    def copy(self):
+        """Independent copy, so changes can be prepared while this index keeps serving"""
+        with self._lock:
+            clone = BM25Index(self.k1, self.b)
+            clone._postings = {term: dict(docs) for term, docs in self._postings.items()}
+            clone._doc_lengths = dict(self._doc_lengths)
+            clone._doc_terms = dict(self._doc_terms)
+            clone._total_length = self._total_length
+        return clone
+
+    def rebuild(self, documents):
+        """Replace the whole index from (doc_id, text) pairs"""
+        with self._lock:
+            self.clear()
+            for doc_id, text in documents:
+                self.add(doc_id, text)
+
+    def search(self, query, k=10, allowlist=None):
+        """Top-k (doc_id, score) pairs; allowlist restricts the candidate IDs"""
+        terms = set(tokenize(query))
+        with self._lock:
+            count = len(self._doc_lengths)
+            if not terms or count == 0:
+                return []
+            average_length = self._total_length / count
+
+            scores = {}
+            for term in terms:
+                docs = self._postings.get(term)
+                if not docs:
+                    continue
+                idf = math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+                if allowlist is None:
+                    matches = docs.items()
+                elif len(allowlist) < len(docs):
+                    # Only allowed documents are visited, whichever side is smaller
+                    matches = ((doc_id, docs[doc_id]) for doc_id in allowlist if doc_id in docs)
+                else:
+                    matches = ((doc_id, frequency) for doc_id, frequency in docs.items() if doc_id in allowlist)
+                for doc_id, frequency in matches:
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "documents": len(self._doc_lengths),
+                "terms": len(self._postings),
+                "averageLength": round(self._total_length / len(self._doc_lengths), 1) if self._doc_lengths else 0
+            }
+
+
+def reciprocal_rank_fusion(rankings, k=60, weights=None):
+    """
+    Fuse ranked ID lists: score(id) = sum(weight / (k + rank)). Rank-based, so
+    BM25 and L2 scores never need to be put on a common scale.
+    """
+    weights = weights or [1.0] * len(rankings)
+    fused = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc_id in enumerate(ranking, 1):
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
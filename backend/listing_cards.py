@@ -0,0 +1,115 @@
+"""
+Listing Card Views for CribConcierge
+Builds the denormalized frontend projections of a property once, at write time,
+so read endpoints can return them without reshaping every document per request
+"""
+
+from server_timing import stage
+
+PHOTO_FIELDS = ('roomPhotoId', 'bathroomPhotoId', 'drawingRoomPhotoId', 'kitchenPhotoId')
+
+# Stored alongside the property document
+CARD_FIELD = 'listingCard'
+DETAIL_FIELD = 'listingDetail'
+VIEW_FIELDS = (CARD_FIELD, DETAIL_FIELD)
+
+
+def flatten_description(description_data):
+    """Plain-text description from either the JSON or the legacy string format"""
+    if isinstance(description_data, dict):
+        return description_data.get('text', '')
+    if description_data is None:
+        return ''
+    return str(description_data)
+
+
+def build_listing_card(prop):
+    """Card used by the listing page and the chat property cards"""
+    photos = {field: prop.get(field) for field in PHOTO_FIELDS}
+
+    return {
+        "id": str(prop.get('_id', '')),
+        "title": prop.get('propertyName', ''),
+        "price": f"₹{prop.get('propertyCostRange', '')}",
+        "location": prop.get('propertyAddress', ''),
+        "bedrooms": prop.get('bedrooms', 2),
+        "bathrooms": prop.get('bathrooms', 1),
+        "area": prop.get('area', ''),
+        "features": prop.get('features', []),
+        **photos,
+        "description": flatten_description(prop.get('description', '')),
+        "descriptionJson": prop.get('description'),  # Include full JSON for advanced features
+        # VR Tour data - include both individual props and nested object
+        "hasVRTour": any(photos.values()),
+        "vrTourData": dict(photos),
+        # Use a placeholder image or the first available room image
+        "image": f"/api/images/{photos['roomPhotoId']}" if photos['roomPhotoId'] else "/placeholder-property.jpg",
+        "created_at": prop.get('created_at'),
+        "updated_at": prop.get('updated_at')
+    }
+
+
+def build_property_detail(prop):
+    """Single-property view used by the VR tour page"""
+    return {
+        "id": str(prop.get('_id', '')),
+        "propertyName": prop.get('propertyName', ''),
+        "propertyAddress": prop.get('propertyAddress', ''),
+        "propertyCostRange": prop.get('propertyCostRange', ''),
+        **{field: prop.get(field) for field in PHOTO_FIELDS},
+        "description": flatten_description(prop.get('description', '')),
+        "descriptionJson": prop.get('description'),  # Include full JSON structure
+        "bedrooms": prop.get('bedrooms', 2),
+        "bathrooms": prop.get('bathrooms', 1),
+        "area": prop.get('area', ''),
+        "features": prop.get('features', [])
+    }
+
+
+def build_listing_views(prop):
+    """All precomputed views, keyed by the field they are stored under"""
+    return {
+        CARD_FIELD: build_listing_card(prop),
+        DETAIL_FIELD: build_property_detail(prop)
+    }
+
+
+def backfill_listing_views(collection, object_ids):
+    """Compute and store views for documents written before they existed"""
+    views_by_id = {}
+    for prop in collection.find({"_id": {"$in": list(object_ids)}}, {field: 0 for field in VIEW_FIELDS}):
+        views = build_listing_views(prop)
+        collection.update_one({"_id": prop['_id']}, {"$set": views})
+        views_by_id[prop['_id']] = views
+    return views_by_id
+
+
+def refresh_listing_views(collection, object_id):
+    """Recompute a property's views after an update"""
+    return backfill_listing_views(collection, [object_id]).get(object_id)
+
+
+def load_listing_cards(collection, query=None):
+    """Listing cards (all by default), reading only the precomputed card field"""
+    with stage("cards"):
+        docs = list(collection.find(query or {}, {CARD_FIELD: 1}))
+
+        missing = [doc['_id'] for doc in docs if CARD_FIELD not in doc]
+        backfilled = backfill_listing_views(collection, missing) if missing else {}
+
+        return [
+            doc[CARD_FIELD] if CARD_FIELD in doc else backfilled[doc['_id']][CARD_FIELD]
+            for doc in docs
+            if CARD_FIELD in doc or doc['_id'] in backfilled
+        ]
+
+
+def load_listing_view(collection, query, field=DETAIL_FIELD):
+    """A single property's precomputed view, or None if it does not exist"""
+    doc = collection.find_one(query, {field: 1})
+    if doc is None:
+        return None
+    if field not in doc:
+        views = refresh_listing_views(collection, doc['_id'])
+        return views[field] if views else None
+    return doc[field]
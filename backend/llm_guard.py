@@ -0,0 +1,171 @@
+"""
+LLM Guard for CribConcierge
+Protects request threads from a slow or failing Gemini API: a bounded number
+of calls run at once (callers wait at most LLM_QUEUE_TIMEOUT_SECONDS for a
+slot), each call has a deadline, and a circuit breaker stops sending calls
+after repeated failures until a trial call succeeds. Callers catch
+LLMUnavailable and answer from the database or search instead.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from metrics import histogram
+
+logger = logging.getLogger(__name__)
+
+# Measured on the worker, so calls that outlive their deadline are still counted in full
+LLM_CALL_SECONDS = histogram(
+    "cribconcierge_llm_call_duration_seconds",
+    "Gemini API call latency",
+    labelnames=("outcome",)
+)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class LLMUnavailable(Exception):
+    """The LLM was not called or did not answer in time; reason is busy, circuit_open, timeout or error"""
+
+    def __init__(self, reason, message=None):
+        super().__init__(message or f"LLM unavailable ({reason})")
+        self.reason = reason
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures. While open every call
+    is rejected; after reset_timeout seconds one trial call is let through
+    (half open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                logger.info("✅ Gemini circuit closed")
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    logger.warning(f"⚠️ Gemini circuit opened after {self.failures} failure(s)")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+
+
+class LLMGuard:
+    """
+    Runs LLM calls through the concurrency gate, deadline and circuit breaker.
+    A call that misses its deadline keeps its slot until it actually returns,
+    so a stalled API can never have more than max_concurrent calls in flight.
+    """
+
+    def __init__(self, max_concurrent=None, queue_timeout=None, call_timeout=None, breaker=None):
+        self.max_concurrent = max_concurrent or int(os.environ.get("LLM_MAX_CONCURRENT", "4"))
+        self.queue_timeout = queue_timeout if queue_timeout is not None else float(os.environ.get("LLM_QUEUE_TIMEOUT_SECONDS", "2"))
+        self.call_timeout = call_timeout or float(os.environ.get("LLM_CALL_TIMEOUT_SECONDS", "20"))
+        self.breaker = breaker or CircuitBreaker(
+            failure_threshold=int(os.environ.get("LLM_BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.environ.get("LLM_BREAKER_RESET_SECONDS", "30"))
+        )
+        self._slots = threading.BoundedSemaphore(self.max_concurrent)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="llm-call")
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "succeeded": 0, "busy": 0, "circuitOpen": 0, "timeouts": 0, "errors": 0}
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _timed(self, fn, args, kwargs):
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            result = fn(*args, **kwargs)
+            outcome = 'ok'
+            return result
+        finally:
+            LLM_CALL_SECONDS.observe(time.perf_counter() - started, outcome=outcome)
+
+    def _release(self, _future):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def call(self, fn, *args, **kwargs):
+        """fn(*args, **kwargs) within the limits; raises LLMUnavailable instead of waiting indefinitely"""
+        self._count("calls")
+        if not self.breaker.allow():
+            self._count("circuitOpen")
+            raise LLMUnavailable('circuit_open')
+
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self._count("busy")
+            # The breaker let this call through; a rejected trial must not wedge it half open
+            if self.breaker.state == HALF_OPEN:
+                self.breaker.record_failure()
+            raise LLMUnavailable('busy')
+
+        with self._lock:
+            self._in_flight += 1
+        future = self._executor.submit(self._timed, fn, args, kwargs)
+        future.add_done_callback(self._release)
+
+        try:
+            result = future.result(timeout=self.call_timeout)
+        except FutureTimeout:
+            self._count("timeouts")
+            self.breaker.record_failure()
+            logger.warning(f"⏱ Gemini call exceeded {self.call_timeout:g}s")
+            raise LLMUnavailable('timeout')
+        except Exception as e:
+            self._count("errors")
+            self.breaker.record_failure()
+            logger.warning(f"⚠️ Gemini call failed: {str(e)}")
+            raise LLMUnavailable('error', str(e)) from e
+
+        self._count("succeeded")
+        self.breaker.record_success()
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                "circuit": self.breaker.state,
+                "inFlight": self._in_flight,
+                "maxConcurrent": self.max_concurrent,
+                "queueTimeoutSeconds": self.queue_timeout,
+                "callTimeoutSeconds": self.call_timeout,
+                **self._stats
+            }
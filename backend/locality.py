@@ -0,0 +1,52 @@
+"""
+Locality Extraction for CribConcierge
+Derives a normalized locality ("baner", "andheri west") from a free-form
+propertyAddress. It is stored on each listing as an indexed field, so
+locality filters are an equality match instead of an address regex.
+"""
+
+import re
+
+LOCALITY_FIELD = 'locality'
+
+# City, state and country fragments name an area far wider than a locality
+REGION_NAMES = frozenset([
+    'mumbai', 'pune', 'bangalore', 'bengaluru', 'delhi', 'new delhi', 'hyderabad', 'chennai', 'kolkata',
+    'ahmedabad', 'gurgaon', 'gurugram', 'noida', 'jaipur', 'lucknow', 'chandigarh', 'indore', 'nagpur', 'kochi',
+    'coimbatore', 'maharashtra', 'karnataka', 'telangana', 'tamil nadu', 'west bengal', 'gujarat', 'haryana',
+    'uttar pradesh', 'rajasthan', 'kerala', 'goa', 'punjab', 'madhya pradesh', 'india'
+])
+
+# Street, plot and building parts of an address ("Lane 4", "Sector 3", "ABC Society")
+_STREET_PATTERN = re.compile(
+    r'\b(?:lane|road|rd|street|st|marg|path|sector|plot|flat|house|h\.?\s*no|block|phase|wing|floor|tower|'
+    r'building|bldg|society|apartments?|residency|complex|near|opp|opposite|behind|next to)\b'
+)
+_PIN_PATTERN = re.compile(r'\b\d{6}\b')
+_SPACE_PATTERN = re.compile(r'\s+')
+
+
+def normalize_locality(name):
+    """Lowercase, single-spaced form used for storage and lookups"""
+    return _SPACE_PATTERN.sub(' ', str(name or '').strip().lower()) or None
+
+
+def extract_locality(address):
+    """
+    The locality of an address, or None. Addresses run from the most to the
+    least specific part, so the locality is the last fragment before the
+    city, state and PIN code that is not a street, plot or building.
+    """
+    fragments = [normalize_locality(_PIN_PATTERN.sub(' ', part)) for part in str(address or '').split(',')]
+    for fragment in reversed([part for part in fragments if part]):
+        if fragment in REGION_NAMES:
+            continue
+        if any(char.isdigit() for char in fragment) or _STREET_PATTERN.search(fragment):
+            continue
+        return fragment
+    return None
+
+
+def locality_fields(property_data):
+    """Normalized locality to store alongside propertyAddress"""
+    return {LOCALITY_FIELD: extract_locality(property_data.get('propertyAddress'))}
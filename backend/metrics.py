@@ -0,0 +1,204 @@
+"""
+Metrics for CribConcierge
+Thread-safe in-process counters and histograms with optional labels, kept in
+a module registry so any backend module can record into them cheaply.
+Values that already live elsewhere (cache and pool stats, index sizes) are
+read at scrape time by registered collectors. render_prometheus() produces
+the Prometheus text exposition format served at /metrics.
+"""
+
+import threading
+from bisect import bisect_left
+
+# Seconds; covers cache hits (sub-millisecond) through slow LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_registry = {}
+_collectors = []
+_registry_lock = threading.Lock()
+
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(name, '')) for name in labelnames)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values)) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+class Counter:
+    """Monotonic counter per label combination"""
+
+    def __init__(self, name, description, labelnames=()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self):
+        with self._lock:
+            return dict(self._values)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label combination"""
+
+    def __init__(self, name, description, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}   # label values -> [bucket counts..., +Inf count], sum
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def collect(self):
+        """{label values: (cumulative bucket counts incl. +Inf, sum, count)}"""
+        with self._lock:
+            series = {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+        collected = {}
+        for key, (counts, total) in series.items():
+            cumulative = []
+            running = 0
+            for count in counts:
+                running += count
+                cumulative.append(running)
+            collected[key] = (cumulative, total, running)
+        return collected
+
+    def quantile(self, q, cumulative):
+        """Upper bound of the bucket holding the q-quantile (Prometheus-style estimate)"""
+        count = cumulative[-1]
+        if not count:
+            return 0.0
+        rank = q * count
+        for bound, seen in zip(self.buckets, cumulative):
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+    def summary(self):
+        """Count, mean and p50/p95 in milliseconds per label combination"""
+        result = {}
+        for key, (cumulative, total, count) in self.collect().items():
+            label = ",".join(key) or "all"
+            result[label] = {
+                "count": count,
+                "avgMs": round(total / count * 1000, 2) if count else 0.0,
+                "p50Ms": self.quantile(0.5, cumulative) * 1000,
+                "p95Ms": self.quantile(0.95, cumulative) * 1000
+            }
+        return result
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        bounds = self.buckets + (float('inf'),)
+        for key, (cumulative, total, count) in sorted(self.collect().items()):
+            for bound, seen in zip(bounds, cumulative):
+                labels = _format_labels(self.labelnames, key, {"le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{labels} {seen}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+def histogram(name, description, labelnames=(), buckets=DEFAULT_BUCKETS):
+    """Registered histogram by name, created on first use"""
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = Histogram(name, description, labelnames, buckets)
+        return metric
+
+
+def counter(name, description, labelnames=()):
+    """Registered counter by name, created on first use"""
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = Counter(name, description, labelnames)
+        return metric
+
+
+def registered():
+    with _registry_lock:
+        return list(_registry.values())
+
+
+def register_collector(collect):
+    """
+    collect() is called on every scrape and yields
+    (name, 'gauge' | 'counter', description, labels dict, value) samples
+    """
+    with _registry_lock:
+        _collectors.append(collect)
+
+
+def render_prometheus():
+    """All registered metrics and collector samples in Prometheus text format"""
+    lines = []
+    for metric in registered():
+        lines.extend(metric.render())
+
+    with _registry_lock:
+        collectors = list(_collectors)
+    families = {}
+    for collect in collectors:
+        try:
+            samples = list(collect())
+        except Exception as e:
+            # One failing source must not take the whole scrape down
+            lines.append(f"# collector error: {str(e).splitlines()[0] if str(e) else type(e).__name__}")
+            continue
+        for name, kind, description, labels, value in samples:
+            if value is None:
+                continue
+            family = families.setdefault(name, (kind, description, []))
+            family[2].append((labels, value))
+
+    for name, (kind, description, samples) in families.items():
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            labels = labels or {}
+            lines.append(f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,202 @@
+"""
+MongoDB Connection Manager for CribConcierge
+One pooled MongoClient per URI shared by ImageService and PropertyDatabase,
+recreated after a worker fork and instrumented with pool metrics
+"""
+
+import logging
+import os
+import threading
+
+import pymongo
+from pymongo import monitoring
+from pymongo.uri_parser import parse_uri
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MONGODB_URI = "mongodb://localhost:27017/imageupload"
+DEFAULT_DB_NAME = "imageupload"
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Counts connection pool events for the stats endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.created = 0
+            self.closed = 0
+            self.checked_out = 0
+            self.checked_in = 0
+            self.checkout_failures = 0
+            self.pools_cleared = 0
+
+    def _incr(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._incr('pools_cleared')
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._incr('created')
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._incr('closed')
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._incr('checkout_failures')
+
+    def connection_checked_out(self, event):
+        self._incr('checked_out')
+
+    def connection_checked_in(self, event):
+        self._incr('checked_in')
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'open': self.created - self.closed,
+                'inUse': self.checked_out - self.checked_in,
+                'created': self.created,
+                'closed': self.closed,
+                'checkouts': self.checked_out,
+                'checkoutFailures': self.checkout_failures,
+                'poolsCleared': self.pools_cleared
+            }
+
+
+class MongoConnectionManager:
+    """Lazily created, fork-safe MongoClient with configurable pooling"""
+
+    def __init__(self, mongo_uri=None, max_pool_size=None, min_pool_size=None):
+        self.mongo_uri = mongo_uri or os.environ.get("MONGODB_URI", DEFAULT_MONGODB_URI)
+        self.options = {
+            'maxPoolSize': max_pool_size if max_pool_size is not None else int(os.environ.get("MONGODB_MAX_POOL_SIZE", "50")),
+            'minPoolSize': min_pool_size if min_pool_size is not None else int(os.environ.get("MONGODB_MIN_POOL_SIZE", "0")),
+            'maxIdleTimeMS': int(os.environ.get("MONGODB_MAX_IDLE_TIME_MS", "60000")),
+            'waitQueueTimeoutMS': int(os.environ.get("MONGODB_WAIT_QUEUE_TIMEOUT_MS", "5000")),
+            'serverSelectionTimeoutMS': int(os.environ.get("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+            'connectTimeoutMS': int(os.environ.get("MONGODB_CONNECT_TIMEOUT_MS", "5000")),
+            'socketTimeoutMS': int(os.environ.get("MONGODB_SOCKET_TIMEOUT_MS", "20000"))
+        }
+        self.pool_metrics = PoolMetricsListener()
+
+        # Bumped whenever the client is recreated so dependants can drop stale handles
+        self.generation = 0
+        self._client = None
+        self._pid = None
+        self._databases = {}
+        self._lock = threading.Lock()
+
+    @property
+    def default_db_name(self):
+        try:
+            return parse_uri(self.mongo_uri).get('database') or DEFAULT_DB_NAME
+        except Exception:
+            return DEFAULT_DB_NAME
+
+    def get_client(self):
+        """Shared client for this process, created on first use or after a fork"""
+        client = self._client
+        if client is not None and self._pid == os.getpid():
+            return client
+
+        with self._lock:
+            if self._client is None or self._pid != os.getpid():
+                self._client = pymongo.MongoClient(
+                    self.mongo_uri,
+                    event_listeners=[self.pool_metrics],
+                    **self.options
+                )
+                self._pid = os.getpid()
+                self._databases = {}
+                self.generation += 1
+                logger.info(f"✅ MongoDB client created (maxPoolSize={self.options['maxPoolSize']}, pid={self._pid})")
+            return self._client
+
+    def get_database(self, db_name=None):
+        """Database handle on the shared client"""
+        client = self.get_client()
+        name = db_name or self.default_db_name
+        database = self._databases.get(name)
+        if database is None:
+            database = client[name]
+            self._databases[name] = database
+        return database
+
+    def ping(self):
+        return self.get_client().admin.command('ping')
+
+    def reset_after_fork(self):
+        """
+        Forget the parent's client in a forked child. The parent still owns its
+        sockets, so the child must not close them; it simply builds a new pool.
+        """
+        self._client = None
+        self._pid = None
+        self._databases = {}
+        self._lock = threading.Lock()
+        self.pool_metrics.reset()
+
+    def close(self):
+        with self._lock:
+            if self._client is not None and self._pid == os.getpid():
+                self._client.close()
+            self._client = None
+            self._databases = {}
+
+    def stats(self):
+        """Pool configuration and live usage counters"""
+        return {
+            'connected': self._client is not None and self._pid == os.getpid(),
+            'pid': os.getpid(),
+            'generation': self.generation,
+            'maxPoolSize': self.options['maxPoolSize'],
+            'minPoolSize': self.options['minPoolSize'],
+            **self.pool_metrics.snapshot()
+        }
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_connection_manager(mongo_uri=None):
+    """Process-wide manager for a URI, so every service shares one pool"""
+    uri = mongo_uri or os.environ.get("MONGODB_URI", DEFAULT_MONGODB_URI)
+    with _managers_lock:
+        manager = _managers.get(uri)
+        if manager is None:
+            manager = MongoConnectionManager(uri)
+            _managers[uri] = manager
+        return manager
+
+
+def _reset_managers_after_fork():
+    global _managers_lock
+    _managers_lock = threading.Lock()
+    for manager in _managers.values():
+        manager.reset_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_managers_after_fork)
@@ -60,7 +60,7 @@ def check_database_access(client, db_name="imageupload"):
         print("✅ GridFS setup successful")
         
         # Check existing files
-        file_count = fs.find().count()
+        file_count = db["images.files"].count_documents({})
         print(f"📁 GridFS contains {file_count} files")
         
         return True
@@ -69,6 +69,51 @@ def check_database_access(client, db_name="imageupload"):
         print(f"❌ Database access error: {e}")
         return False
 
+def find_collection_scans(plan):
+    """Walk an explain plan tree and return the stages that scan the whole collection"""
+    scans = []
+    if isinstance(plan, dict):
+        if plan.get('stage') == 'COLLSCAN':
+            scans.append(plan)
+        for key in ('inputStage', 'queryPlan'):
+            scans.extend(find_collection_scans(plan.get(key)))
+        for child in plan.get('inputStages', []):
+            scans.extend(find_collection_scans(child))
+    return scans
+
+def check_query_plans(client, db_name="imageupload"):
+    """Explain the hot property queries and flag collection scans"""
+    print(f"\n🔍 Checking query plans on {db_name}.properties")
+    
+    try:
+        from db_migrations import HOT_PROPERTY_QUERIES
+        
+        properties = client[db_name].properties
+        index_names = sorted(properties.index_information().keys())
+        print(f"📇 Indexes: {', '.join(index_names)}")
+        
+        all_indexed = True
+        for label, query, sort in HOT_PROPERTY_QUERIES:
+            cursor = properties.find(query)
+            if sort:
+                cursor = cursor.sort(sort)
+            winning_plan = cursor.explain().get('queryPlanner', {}).get('winningPlan', {})
+            
+            if find_collection_scans(winning_plan):
+                all_indexed = False
+                print(f"❌ {label}: COLLSCAN")
+            else:
+                print(f"✅ {label}: uses an index")
+        
+        if not all_indexed:
+            print("💡 Run 'python db_migrations.py' (or start the app) to create the missing indexes")
+        
+        return all_indexed
+        
+    except Exception as e:
+        print(f"❌ Query plan check error: {e}")
+        return False
+
 def check_environment_config():
     """Check environment configuration"""
     print("\n🔍 Checking environment configuration...")
@@ -129,10 +174,14 @@ def main():
         # Check database access
         db_ok = check_database_access(client)
         
+        # Check that hot queries are index-backed
+        plans_ok = check_query_plans(client)
+        
         # Close connection
         client.close()
     else:
         db_ok = False
+        plans_ok = False
     
     # Test image service
     if env_ok and mongo_ok:
@@ -145,6 +194,7 @@ def main():
     print(f"✅ Environment Config: {'✅ OK' if env_ok else '❌ FAILED'}")
     print(f"✅ MongoDB Service: {'✅ OK' if mongo_ok else '❌ FAILED'}")
     print(f"✅ Database Access: {'✅ OK' if db_ok else '❌ FAILED'}")
+    print(f"✅ Query Plans: {'✅ OK' if plans_ok else '⚠️ COLLECTION SCANS'}")
     print(f"✅ Image Service: {'✅ OK' if service_ok else '❌ FAILED'}")
     
     if all([env_ok, mongo_ok, db_ok, service_ok]):
@@ -0,0 +1,103 @@
+"""
+Price Normalization for CribConcierge
+Parses free-form propertyCostRange strings ("45 lakhs", "1.2 Cr", "50-75L",
+"₹85,00,000") into numeric rupee bounds that MongoDB can index and range-query
+"""
+
+import re
+
+from listing_cards import CARD_FIELD
+from locality import LOCALITY_FIELD, normalize_locality
+
+UNIT_MULTIPLIERS = {
+    'crore': 10_000_000,
+    'crores': 10_000_000,
+    'cr': 10_000_000,
+    'lakh': 100_000,
+    'lakhs': 100_000,
+    'lac': 100_000,
+    'lacs': 100_000,
+    'l': 100_000,
+    'million': 1_000_000,
+    'mn': 1_000_000,
+    'm': 1_000_000,
+    'thousand': 1_000,
+    'k': 1_000,
+}
+
+PRICE_MIN_FIELD = 'priceMin'
+PRICE_MAX_FIELD = 'priceMax'
+
+_NUMBER_PATTERN = re.compile(
+    r'(\d[\d,]*(?:\.\d+)?)\s*(crores?|cr|lakhs?|lacs?|lac|million|mn|thousand|l|m|k)?(?![a-z])'
+)
+
+
+def parse_amount(number_text, unit=None):
+    """Rupee value of a single number with an optional Indian/metric unit"""
+    value = float(number_text.replace(',', ''))
+    return int(round(value * UNIT_MULTIPLIERS.get(unit, 1)))
+
+
+def parse_price_range(text):
+    """
+    Numeric (min, max) in rupees for a free-form price, or (None, None).
+    A unit written only after the last number applies to the bare numbers
+    before it, so "50-75 lakhs" means 50 to 75 lakhs.
+    """
+    if text is None:
+        return None, None
+    if isinstance(text, (int, float)):
+        return int(text), int(text)
+
+    normalized = str(text).lower().replace('₹', ' ').replace('rs.', ' ').replace('inr', ' ')
+    matches = _NUMBER_PATTERN.findall(normalized)
+    if not matches:
+        return None, None
+
+    values = []
+    pending_unit = None
+    for number_text, unit in reversed(matches):
+        if unit:
+            pending_unit = unit
+        values.append(parse_amount(number_text, unit or pending_unit))
+
+    return min(values), max(values)
+
+
+def price_fields(property_data):
+    """Normalized price fields to store alongside propertyCostRange"""
+    price_min, price_max = parse_price_range(property_data.get('propertyCostRange'))
+    return {PRICE_MIN_FIELD: price_min, PRICE_MAX_FIELD: price_max}
+
+
+def build_property_filter(min_price=None, max_price=None, bedrooms=None, min_bedrooms=None, status=None,
+                          locality=None, has_vr_tour=None):
+    """
+    MongoDB filter for structured listing queries. Price bounds match listings
+    whose range overlaps the requested range.
+    """
+    query = {}
+
+    if max_price is not None:
+        query[PRICE_MIN_FIELD] = {'$lte': max_price}
+    if min_price is not None:
+        query[PRICE_MAX_FIELD] = {'$gte': min_price}
+
+    if bedrooms is not None:
+        query['bedrooms'] = bedrooms
+    elif min_bedrooms is not None:
+        query['bedrooms'] = {'$gte': min_bedrooms}
+
+    if status is not None:
+        query['status'] = status
+
+    if locality:
+        # Indexed equality on the stored locality, not a regex over every address
+        query[LOCALITY_FIELD] = normalize_locality(locality)
+
+    if has_vr_tour is not None:
+        # Precomputed with the listing card
+        query[f'{CARD_FIELD}.hasVRTour'] = has_vr_tour
+
+    return query
@@ -0,0 +1,62 @@
+"""
+Property Search for CribConcierge
+LLM-free ranking of properties: FAISS similarity and BM25 keyword matches
+fused by reciprocal rank fusion
+"""
+
+from hybrid_retrieval import PropertyChunkMap, embed_query, search_allowlisted
+from keyword_index import reciprocal_rank_fusion
+from server_timing import stage
+
+# Chunks fetched from FAISS per requested result; several chunks can share a property
+DENSE_FETCH_MULTIPLIER = 3
+
+
+def _unique_property_ids(docs):
+    ranking = []
+    for doc in docs:
+        property_id = doc.metadata.get('property_id')
+        if property_id and property_id not in ranking:
+            ranking.append(property_id)
+    return ranking
+
+
+def dense_property_ranking(vector_store, query_vector, fetch_k, allowlist=None, chunk_map=None):
+    """Property IDs in order of their best-matching chunk"""
+    if vector_store is None:
+        return []
+    if allowlist is None:
+        return _unique_property_ids(vector_store.similarity_search_by_vector(query_vector, k=fetch_k))
+    try:
+        docs = search_allowlisted(vector_store, query_vector, allowlist, fetch_k, chunk_map or PropertyChunkMap())
+    except RuntimeError:
+        # Index types without reconstruct support fall back to a filtered scan
+        docs = vector_store.similarity_search_by_vector(
+            query_vector,
+            k=fetch_k,
+            filter={"property_id": list(allowlist)},
+            fetch_k=vector_store.index.ntotal
+        )
+    return _unique_property_ids(docs)
+
+
+def hybrid_search(query, vector_store, keyword_index, k=10, query_embeddings=None, allowlist=None, chunk_map=None):
+    """
+    Top-k (property_id, fused score) pairs. allowlist restricts both rankings
+    to the given property IDs; an empty allowlist means nothing can match.
+    """
+    if allowlist is not None and not allowlist:
+        return []
+
+    fetch_k = k * DENSE_FETCH_MULTIPLIER
+    dense = []
+    if vector_store is not None:
+        if query_embeddings is not None:
+            query_vector = query_embeddings.embed_query(query)
+        else:
+            query_vector = embed_query(vector_store, query)
+        with stage("faiss"):
+            dense = dense_property_ranking(vector_store, query_vector, fetch_k, allowlist, chunk_map)
+    with stage("bm25"):
+        sparse = [doc_id for doc_id, _ in keyword_index.search(query, k=fetch_k, allowlist=allowlist)]
+    return reciprocal_rank_fusion([dense, sparse])[:k]
@@ -0,0 +1,118 @@
+"""
+Query Understanding for CribConcierge
+Extracts hard constraints (budget, bedrooms, locality, VR tour) from a
+natural-language question so retrieval can pre-filter listings without an LLM
+"""
+
+import re
+
+from pricing import parse_amount
+
+_AMOUNT = r'(\d[\d,]*(?:\.\d+)?)\s*(crores?|cr|lakhs?|lacs?|lac|million|mn|thousand|l|m|k)?(?![a-z])'
+
+_BETWEEN_PATTERN = re.compile(r'(?:between|from)\s+(?:₹|rs\.?\s*)?' + _AMOUNT + r'\s*(?:and|to|-)\s*(?:₹|rs\.?\s*)?' + _AMOUNT)
+_RANGE_PATTERN = re.compile(r'(?:₹|rs\.?\s*)?' + _AMOUNT + r'\s*(?:-|to)\s*(?:₹|rs\.?\s*)?' + _AMOUNT)
+_MAX_PATTERN = re.compile(
+    r'(?:under|below|less than|cheaper than|upto|up to|within|max(?:imum)?|not more than|budget(?: of| is)?)\s+(?:₹|rs\.?\s*)?' + _AMOUNT
+)
+_MIN_PATTERN = re.compile(r'(?:above|over|more than|at least|minimum|min|starting)\s+(?:₹|rs\.?\s*)?' + _AMOUNT)
+
+_NUMBER_WORDS = {'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6}
+_BEDROOM_PATTERN = re.compile(
+    r'(\d+|' + '|'.join(_NUMBER_WORDS) + r')\s*(\+|or more)?\s*(?:-\s*)?(?:bhk|bed(?:room)?s?|br)\b'
+)
+_BEDROOM_RANGE_PATTERN = re.compile(r'(\d+)\s*(?:-|to|or)\s*\d+\s*(?:bhk|bed(?:room)?s?|br)\b')
+_MIN_BEDROOM_PATTERN = re.compile(r'(?:at least|minimum|min)\s+(\d+|' + '|'.join(_NUMBER_WORDS) + r')\s*(?:bhk|bed(?:room)?s?|br)\b')
+
+_VR_PATTERN = re.compile(r'\b(?:vr|3d|virtual tour|360|panoram\w*|walkthrough)\b')
+
+class QueryConstraints:
+    """Hard filters understood from a question; None means unconstrained"""
+
+    def __init__(self, min_price=None, max_price=None, bedrooms=None, min_bedrooms=None,
+                 locality=None, has_vr_tour=None):
+        self.min_price = min_price
+        self.max_price = max_price
+        self.bedrooms = bedrooms
+        self.min_bedrooms = min_bedrooms
+        self.locality = locality
+        self.has_vr_tour = has_vr_tour
+
+    def is_empty(self):
+        return not any(value is not None for value in self.to_dict().values())
+
+    def to_dict(self):
+        return {
+            'min_price': self.min_price,
+            'max_price': self.max_price,
+            'bedrooms': self.bedrooms,
+            'min_bedrooms': self.min_bedrooms,
+            'locality': self.locality,
+            'has_vr_tour': self.has_vr_tour
+        }
+
+    def __repr__(self):
+        active = {key: value for key, value in self.to_dict().items() if value is not None}
+        return f"QueryConstraints({active})"
+
+
+def _amount(number_text, unit, fallback_unit=None):
+    value = parse_amount(number_text, unit or fallback_unit)
+    # Bare numbers under 10,000 are not plausible property prices
+    return value if value >= 10_000 else None
+
+
+def _count(token):
+    return _NUMBER_WORDS.get(token) or int(token)
+
+
+def extract_constraints(question, known_localities=()):
+    """
+    Parse budget, bedroom, locality and VR tour constraints from a question;
+    known_localities are the stored locality values (locality.extract_locality)
+    """
+    text = (question or '').lower()
+    constraints = QueryConstraints()
+
+    for pattern in (_BETWEEN_PATTERN, _RANGE_PATTERN):
+        for between in pattern.finditer(text):
+            low_num, low_unit, high_num, high_unit = between.groups()
+            low = _amount(low_num, low_unit, high_unit)
+            high = _amount(high_num, high_unit)
+            if low is not None and high is not None:
+                constraints.min_price, constraints.max_price = min(low, high), max(low, high)
+                break
+        if constraints.max_price is not None:
+            break
+
+    if constraints.max_price is None:
+        match = _MAX_PATTERN.search(text)
+        if match:
+            constraints.max_price = _amount(*match.groups())
+
+    if constraints.min_price is None:
+        match = _MIN_PATTERN.search(text)
+        if match:
+            constraints.min_price = _amount(*match.groups())
+
+    match = _MIN_BEDROOM_PATTERN.search(text) or _BEDROOM_RANGE_PATTERN.search(text)
+    if match:
+        constraints.min_bedrooms = _count(match.group(1))
+    else:
+        match = _BEDROOM_PATTERN.search(text)
+        if match:
+            if match.group(2):
+                constraints.min_bedrooms = _count(match.group(1))
+            else:
+                constraints.bedrooms = _count(match.group(1))
+
+    # Longest match wins so "andheri west" beats "andheri"
+    for locality in sorted(known_localities, key=len, reverse=True):
+        if re.search(r'\b' + re.escape(locality) + r'\b', text):
+            constraints.locality = locality
+            break
+
+    if _VR_PATTERN.search(text):
+        constraints.has_vr_tour = True
+
+    return constraints
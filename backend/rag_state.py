@@ -0,0 +1,105 @@
+"""
+RAG State for CribConcierge
+Immutable-by-convention snapshots of the RAG components. A rebuild assembles a
+complete snapshot off to the side and publishes it with a single reference
+swap, so readers see either the old or the new knowledge base, never a mix.
+Incremental changes are copy-on-write: the index writer thread applies them
+to copies of the indexes and publishes the result as a new snapshot.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class RagSnapshot:
+    """Vector store, keyword index, chain and memory that belong together"""
+
+    def __init__(self, vector_store=None, keyword_index=None, chain=None, memory=None, property_count=0,
+                 built_at=None):
+        self.vector_store = vector_store
+        self.keyword_index = keyword_index
+        self.chain = chain
+        self.memory = memory
+        self.property_count = property_count
+        self.built_at = built_at
+        # Set by RagState.publish; unique per published snapshot, unlike id()
+        self.version = None
+
+    @property
+    def ready(self):
+        return self.chain is not None and self.vector_store is not None
+
+
+class RagState:
+    """
+    Holder of the current snapshot. Readers take rag_state.snapshot once per
+    request and use only that object; they never lock.
+    """
+
+    def __init__(self, snapshot=None):
+        self.snapshot = snapshot or RagSnapshot()
+        self.snapshot.version = 0
+        self.generation = 0
+        self._publish_lock = threading.Lock()
+
+    def publish(self, snapshot):
+        """Atomically replace the current snapshot; returns the previous one"""
+        if snapshot.built_at is None:
+            snapshot.built_at = datetime.utcnow()
+        with self._publish_lock:
+            previous = self.snapshot
+            self.generation += 1
+            snapshot.version = self.generation
+            self.snapshot = snapshot
+        return previous
+
+
+class IndexWriter:
+    """
+    The single thread that publishes RAG state. Rebuild swaps and incremental
+    updates are queued here and run one at a time, so a change is always
+    applied to the latest snapshot and never lost to a concurrent publish.
+    """
+
+    def __init__(self, name="rag-index-writer"):
+        self.name = name
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._stats = {"queued": 0, "applied": 0, "failed": 0}
+
+    def _in_writer(self):
+        return threading.current_thread().name.startswith(self.name)
+
+    def _run(self, fn, args, kwargs):
+        with self._lock:
+            self._stats["queued"] -= 1
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            logger.warning(f"⚠️ Index writer task failed: {str(e)}")
+            with self._lock:
+                self._stats["failed"] += 1
+            raise
+        with self._lock:
+            self._stats["applied"] += 1
+        return result
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(*args, **kwargs) on the writer thread; returns a Future"""
+        with self._lock:
+            self._stats["queued"] += 1
+        return self._executor.submit(self._run, fn, args, kwargs)
+
+    def apply(self, fn, *args, **kwargs):
+        """Run fn on the writer thread and wait for its result (inline when already on it)"""
+        if self._in_writer():
+            return fn(*args, **kwargs)
+        return self.submit(fn, *args, **kwargs).result()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
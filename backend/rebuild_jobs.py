@@ -0,0 +1,130 @@
+"""
+Background Rebuild Jobs for CribConcierge
+Runs RAG knowledge base rebuilds on a worker thread and tracks their progress
+by job ID, so /rebuildRAG returns immediately instead of blocking for minutes
+"""
+
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+
+class RebuildJob:
+    """One rebuild run; the build function reports progress through update()"""
+
+    def __init__(self, reason=None):
+        self.id = uuid.uuid4().hex
+        self.reason = reason
+        self.status = QUEUED
+        self.stage = None
+        self.progress = 0.0
+        self.error = None
+        self.result = None
+        self.created_at = datetime.utcnow()
+        self.started_at = None
+        self.finished_at = None
+
+    def update(self, stage, progress=None):
+        self.stage = stage
+        if progress is not None:
+            self.progress = round(min(max(progress, 0.0), 1.0), 3)
+        logger.info(f"🔄 Rebuild {self.id[:8]}: {stage} ({self.progress:.0%})")
+
+    @property
+    def done(self):
+        return self.status in (SUCCEEDED, FAILED)
+
+    def to_dict(self):
+        return {
+            "jobId": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "reason": self.reason,
+            "error": self.error,
+            "result": self.result,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at
+        }
+
+
+class RebuildJobManager:
+    """
+    At most one rebuild runs at a time. Requests made while one is running
+    are coalesced into a single follow-up run, because the running build may
+    have read the catalog before the change that triggered them.
+    """
+
+    def __init__(self, build_fn, history=20):
+        self.build_fn = build_fn
+        self.history = history
+        self._jobs = OrderedDict()
+        self._running = None
+        self._pending = None
+        self._lock = threading.Lock()
+
+    def submit(self, reason=None):
+        """Start a rebuild, or queue one behind the running rebuild; returns its job"""
+        with self._lock:
+            if self._running is None:
+                job = self._track(RebuildJob(reason))
+                self._start_locked(job)
+                return job
+            if self._pending is None:
+                self._pending = self._track(RebuildJob(reason))
+            return self._pending
+
+    def _track(self, job):
+        self._jobs[job.id] = job
+        while len(self._jobs) > self.history:
+            oldest = next(iter(self._jobs.values()))
+            if not oldest.done:
+                break
+            self._jobs.popitem(last=False)
+        return job
+
+    def _start_locked(self, job):
+        self._running = job
+        thread = threading.Thread(target=self._run, args=(job,), name=f"rag-rebuild-{job.id[:8]}", daemon=True)
+        thread.start()
+
+    def _run(self, job):
+        job.status = RUNNING
+        job.started_at = datetime.utcnow()
+        try:
+            job.result = self.build_fn(job)
+            job.status = SUCCEEDED
+            job.update('done', 1.0)
+        except Exception as e:
+            logger.error(f"❌ Rebuild {job.id[:8]} failed: {str(e)}")
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = datetime.utcnow()
+            with self._lock:
+                self._running = None
+                if self._pending is not None:
+                    pending, self._pending = self._pending, None
+                    self._start_locked(pending)
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    @property
+    def running(self):
+        return self._running
+
+    def latest(self):
+        """Most recently created job, if any"""
+        with self._lock:
+            return next(reversed(self._jobs.values()), None)
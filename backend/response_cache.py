@@ -0,0 +1,155 @@
+"""
+Response Cache for CribConcierge
+Pre-serialized, precompressed JSON responses keyed by a catalog version counter,
+with ETag / If-None-Match support so unchanged listings cost a hash compare
+"""
+
+import gzip
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from flask import Response, request
+from pymongo import ReturnDocument
+from pymongo.collection import Collection
+
+try:
+    import brotli
+except ImportError:  # Optional dependency: gzip is always available
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogVersion:
+    """
+    Monotonic version of the property catalog, bumped on every add/update/delete.
+    Stored in MongoDB so writes made by other workers invalidate this one's
+    cache; reads are memoized for a short TTL to keep the hot path query-free.
+    """
+
+    def __init__(self, collection, key="properties", ttl_seconds=None):
+        self._collection = collection  # Collection, or a callable returning one
+        self.key = key
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.environ.get("CATALOG_VERSION_TTL_SECONDS", "1"))
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def collection(self):
+        if isinstance(self._collection, Collection) or not callable(self._collection):
+            return self._collection
+        return self._collection()
+
+    def current(self):
+        """Current catalog version, refreshed from MongoDB at most once per TTL"""
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.ttl_seconds:
+            return self._version
+
+        doc = self.collection.find_one({"_id": self.key}, {"version": 1})
+        with self._lock:
+            self._version = doc.get("version", 0) if doc else 0
+            self._checked_at = now
+            return self._version
+
+    def bump(self):
+        """Invalidate every response built from the previous catalog"""
+        doc = self.collection.find_one_and_update(
+            {"_id": self.key},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        with self._lock:
+            self._version = doc["version"]
+            self._checked_at = time.monotonic()
+            return self._version
+
+
+class CachedResponse:
+    """Serialized body plus its compressed variants and validator"""
+
+    __slots__ = ('version', 'body', 'etag', 'encoded')
+
+    def __init__(self, version, body):
+        self.version = version
+        self.body = body
+        self.etag = f"{version}-{hashlib.sha1(body).hexdigest()[:20]}"
+        self.encoded = {'gzip': gzip.compress(body, compresslevel=6)}
+        if brotli is not None:
+            self.encoded['br'] = brotli.compress(body, quality=5)
+
+
+class ResponseCache:
+    """JSON responses cached per key until the catalog version changes"""
+
+    def __init__(self, dumps):
+        self.dumps = dumps  # Returns str or UTF-8 bytes
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.not_modified = 0
+        self.misses = 0
+
+    def get_or_build(self, key, version, build_payload):
+        """Return the cached entry for this version, building it on a miss"""
+        entry = self._entries.get(key)
+        if entry is not None and entry.version == version:
+            with self._lock:
+                self.hits += 1
+            return entry
+
+        body = self.dumps(build_payload())
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        entry = CachedResponse(version, body)
+        with self._lock:
+            self.misses += 1
+            current = self._entries.get(key)
+            if current is None or current.version <= version:
+                self._entries[key] = entry
+        return entry
+
+    def respond(self, key, version, build_payload):
+        """Flask response for the cached entry, honouring If-None-Match and Accept-Encoding"""
+        entry = self.get_or_build(key, version, build_payload)
+        headers = {
+            'ETag': f'W/"{entry.etag}"',
+            'Cache-Control': 'no-cache',
+            'Vary': 'Accept-Encoding'
+        }
+
+        if request.if_none_match.contains_weak(entry.etag):
+            with self._lock:
+                self.not_modified += 1
+            return Response(status=304, headers=headers)
+
+        for encoding in ('br', 'gzip'):
+            if encoding in entry.encoded and request.accept_encodings[encoding]:
+                headers['Content-Encoding'] = encoding
+                return Response(entry.encoded[encoding], status=200, mimetype='application/json', headers=headers)
+
+        return Response(entry.body, status=200, mimetype='application/json', headers=headers)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'notModified': self.not_modified,
+                'hitRate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'brotli': brotli is not None
+            }
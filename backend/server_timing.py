@@ -0,0 +1,63 @@
+"""
+Server-Timing for CribConcierge
+stage() times a block of work, adds it to the request's Server-Timing
+response header (visible in browser devtools) and records it in the
+per-stage latency histogram. Outside a request (rebuilds, the index sync
+thread) only the histogram is updated.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+
+from metrics import histogram
+
+STAGE_SECONDS = histogram(
+    "cribconcierge_stage_duration_seconds",
+    "Time spent in hot request stages (mongo, embed, faiss, llm, postprocess, cards, gridfs, pillow)",
+    labelnames=("stage",)
+)
+
+
+@contextmanager
+def stage(name):
+    """Time the enclosed block as stage `name` (a token: letters, digits, _ or -)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        if has_request_context():
+            timings = g.setdefault('server_timings', {})
+            # Repeated stages within one request add up
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+
+def server_timing_header(timings, total=None):
+    entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items()]
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def install_server_timing(app):
+    """Emit Server-Timing on every response (disable with SERVER_TIMING=0)"""
+    if os.environ.get("SERVER_TIMING", "1").lower() in ('0', 'false', 'no'):
+        return
+
+    @app.before_request
+    def _start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def _add_server_timing(response):
+        started = g.get('request_started')
+        total = time.perf_counter() - started if started is not None else None
+        response.headers['Server-Timing'] = server_timing_header(g.get('server_timings', {}), total)
+        # Lets the frontend (another origin) read the timings through the Performance API
+        if request.headers.get('Origin'):
+            response.headers['Timing-Allow-Origin'] = request.headers['Origin']
+        return response
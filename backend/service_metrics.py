@@ -0,0 +1,93 @@
+"""
+Service Metrics for CribConcierge
+Per-route request metrics and the Prometheus /metrics endpoint for the Flask
+apps, plus helpers that turn the stats() of existing components (caches,
+Mongo pool, LLM guard, RAG indexes) into gauge and counter samples
+"""
+
+import time
+
+from flask import Response, g, request
+
+from metrics import histogram, register_collector, render_prometheus
+
+REQUEST_SECONDS = histogram(
+    "cribconcierge_http_request_duration_seconds",
+    "HTTP request latency by route; the _count series gives the request rate",
+    labelnames=("method", "route", "status")
+)
+
+
+def install_metrics(app, *collectors):
+    """Time every request by route template and serve GET /metrics"""
+    for collect in collectors:
+        register_collector(collect)
+
+    @app.before_request
+    def _start_metrics_timer():
+        g.metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _observe_request(response):
+        started = g.get('metrics_started')
+        if started is not None:
+            # The URL rule, not the path, so /getProperty/<id> is one series
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=request.method,
+                route=route,
+                status=response.status_code
+            )
+        return response
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        """Prometheus scrape endpoint"""
+        return Response(render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def cache_samples(cache, stats):
+    """Hit/miss counters, hit ratio and size of a cache's stats() dict"""
+    labels = {"cache": cache}
+    yield ("cribconcierge_cache_hits_total", "counter", "Cache hits", labels,
+           stats.get('hits', 0) + stats.get('sharedHits', 0))
+    yield ("cribconcierge_cache_misses_total", "counter", "Cache misses", labels, stats.get('misses'))
+    yield ("cribconcierge_cache_hit_ratio", "gauge", "Cache hit ratio since start", labels, stats.get('hitRate'))
+    yield ("cribconcierge_cache_entries", "gauge", "Entries held in the cache", labels, stats.get('entries'))
+    yield ("cribconcierge_cache_bytes", "gauge", "Bytes held in the cache", labels, stats.get('bytes'))
+
+
+def mongo_pool_samples(stats):
+    yield ("cribconcierge_mongo_pool_connections", "gauge", "Open MongoDB connections", {}, stats.get('open'))
+    yield ("cribconcierge_mongo_pool_in_use", "gauge", "MongoDB connections checked out", {}, stats.get('inUse'))
+    yield ("cribconcierge_mongo_pool_max_size", "gauge", "MongoDB pool maxPoolSize", {}, stats.get('maxPoolSize'))
+    yield ("cribconcierge_mongo_pool_checkouts_total", "counter", "MongoDB connection checkouts", {},
+           stats.get('checkouts'))
+    yield ("cribconcierge_mongo_pool_checkout_failures_total", "counter", "Failed MongoDB connection checkouts", {},
+           stats.get('checkoutFailures'))
+
+
+def llm_guard_samples(stats):
+    for outcome, key in (('succeeded', 'succeeded'), ('busy', 'busy'), ('circuit_open', 'circuitOpen'),
+                         ('timeout', 'timeouts'), ('error', 'errors')):
+        yield ("cribconcierge_llm_calls_total", "counter", "Gemini calls by outcome", {"outcome": outcome},
+               stats.get(key))
+    yield ("cribconcierge_llm_in_flight", "gauge", "Gemini calls currently running", {}, stats.get('inFlight'))
+    yield ("cribconcierge_llm_circuit_open", "gauge", "1 while the Gemini circuit breaker is not closed", {},
+           stats.get('circuit') != 'closed')
+
+
+def vector_index_samples(description, keyword_documents=None, properties=None):
+    """Sizes of the live RAG indexes; description is vector_index.describe_index() or None"""
+    description = description or {}
+    labels = {"type": description.get('type', 'none')}
+    yield ("cribconcierge_rag_vectors", "gauge", "Vectors in the live FAISS index", labels,
+           description.get('vectors', 0))
+    yield ("cribconcierge_rag_index_bytes", "gauge", "Estimated in-memory size of the FAISS index", labels,
+           description.get('indexBytes', 0))
+    yield ("cribconcierge_rag_mapped_vector_bytes", "gauge", "Full vectors memory-mapped for re-ranking", labels,
+           description.get('mappedVectorBytes', 0))
+    yield ("cribconcierge_rag_keyword_documents", "gauge", "Documents in the BM25 keyword index", {},
+           keyword_documents)
+    yield ("cribconcierge_rag_properties", "gauge", "Properties in the live knowledge base", {}, properties)
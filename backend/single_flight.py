@@ -0,0 +1,68 @@
+"""
+Single-Flight Request Coalescing for CribConcierge
+Concurrent calls for the same key share one execution: the first caller runs
+the work, the others wait for its result (or its exception). Nothing is kept
+after the call finishes, so this only removes duplicate in-flight work
+(GridFS reads, property lookups, index builds, identical questions) and
+never serves stale data.
+"""
+
+import threading
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Thread-safe group of in-flight calls keyed by any hashable value"""
+
+    def __init__(self, name=None):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """Return fn(*args, **kwargs), sharing the run with concurrent callers for the same key"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            # Later callers start a fresh execution
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "inFlight": len(self._calls),
+                "executions": self.executions,
+                "coalesced": self.coalesced
+            }
@@ -0,0 +1,167 @@
+"""
+Structured Logging for CribConcierge
+One logging setup shared by every backend module. Records carry a level, the
+request ID and structured fields, and are written by a background listener
+thread behind a bounded queue, so request threads never block on stdout.
+High-volume events (one per question, listing or search) are logged with
+sampled=True and only LOG_SAMPLE_RATE of them are kept; warnings and errors
+are always kept.
+
+Environment: LOG_LEVEL (INFO), LOG_FORMAT (json | text), LOG_SAMPLE_RATE
+(0.1), LOG_QUEUE_SIZE (10000)
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request
+
+from metrics import counter
+
+LOG_RECORDS_DROPPED = counter(
+    "cribconcierge_log_records_dropped_total",
+    "Log records not written, by reason (sampled out or queue full)",
+    labelnames=("reason",)
+)
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+_listener = None
+_configure_lock = threading.Lock()
+
+# LogRecord attributes that are not structured fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+def fields(sampled=False, **values):
+    """extra= for a structured record: logger.info("RAG answer", extra=fields(sampled=True, properties=3))"""
+    return {"fields": values, "sampled": sampled}
+
+
+def current_request_id():
+    if has_request_context():
+        return g.get('request_id', '-')
+    return '-'
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps the Flask request ID on records created inside a request"""
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = current_request_id()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps sample_rate of the records logged with sampled=True below WARNING"""
+
+    def __init__(self, sample_rate):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record):
+        if not getattr(record, 'sampled', False) or record.levelno >= logging.WARNING:
+            return True
+        if random.random() < self.sample_rate:
+            return True
+        LOG_RECORDS_DROPPED.inc(reason="sampled")
+        return False
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Drops (and counts) records when the queue is full instead of blocking the caller"""
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc(reason="queue_full")
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, request ID, message and fields"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            "level": record.levelname,
+            "logger": record.name,
+            "requestId": getattr(record, 'request_id', '-'),
+            "message": record.getMessage()
+        }
+        entry.update(getattr(record, 'fields', None) or {})
+        # Ad-hoc extra= attributes are kept as fields too
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key not in ('fields', 'sampled', 'request_id'):
+                entry.setdefault(key, value)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines for local development, with fields as key=value"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s")
+
+    def format(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = '-'
+        line = super().format(record)
+        values = getattr(record, 'fields', None)
+        if values:
+            line += " " + " ".join(f"{key}={value}" for key, value in values.items())
+        return line
+
+
+def configure_logging(level=None, log_format=None, sample_rate=None, queue_size=None):
+    """Route the root logger through the sampling queue handler (idempotent)"""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            return
+        level = (level or os.environ.get("LOG_LEVEL", "INFO")).upper()
+        log_format = log_format or os.environ.get("LOG_FORMAT", "json")
+        sample_rate = sample_rate if sample_rate is not None else float(os.environ.get("LOG_SAMPLE_RATE", "0.1"))
+        queue_size = queue_size or int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(TextFormatter() if log_format == "text" else JSONFormatter())
+
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+        # Filters run on the calling thread so dropped records never reach the queue
+        handler.addFilter(SamplingFilter(sample_rate))
+        handler.addFilter(RequestIdFilter())
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(handler)
+        root.setLevel(level)
+
+        _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+        _listener.start()
+        # Flush whatever is still queued on shutdown
+        atexit.register(_listener.stop)
+
+
+def install_request_ids(app):
+    """Reuse the caller's X-Request-ID (or mint one) and echo it on the response"""
+
+    @app.before_request
+    def _assign_request_id():
+        g.request_id = request.headers.get(REQUEST_ID_HEADER, '')[:128] or uuid.uuid4().hex
+
+    @app.after_request
+    def _echo_request_id(response):
+        response.headers[REQUEST_ID_HEADER] = g.get('request_id', '')
+        return response
@@ -10,9 +10,11 @@ import os
 import requests
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+from json_provider import install_json_provider
 
 app = Flask(__name__)
 CORS(app)
+install_json_provider(app)
 
 # In-memory storage for testing (replace with database in production)
 property_listings = []
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Embedding Backend Parity Tests for CribConcierge
+The ONNX and ONNX int8 backends must produce vectors close to the PyTorch
+embeddings the RAG index is built with. Skipped when onnxruntime, the
+PyTorch stack or the exported model (python embedding_backends.py export)
+is not available.
+
+Usage: python -m pytest test_embedding_parity.py
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("langchain_core")
+pytest.importorskip("sentence_transformers")
+
+from embedding_backends import create_embedder, default_onnx_dir, onnx_model_path  # noqa: E402
+
+# Same threshold benchmark_embeddings.py enforces by default
+MIN_COSINE = 0.98
+
+TEXTS = [
+    "2 BHK under 50 lakh in Baner",
+    "show me flats with a VR tour",
+    "luxury villa with swimming pool",
+    "Property Name: 3 BHK Residence\nProperty Address: Lane 4, Kothrud, Pune\n"
+    "Property Cost: ₹1.2 Cr\nFeatures: modular kitchen, covered parking",
+]
+
+
+@pytest.fixture(scope="module")
+def reference():
+    return np.array(create_embedder("torch").embed_documents(TEXTS), dtype=np.float32)
+
+
+@pytest.mark.parametrize("backend,quantized", [("onnx", False), ("onnx-int8", True)])
+def test_onnx_cosine_parity(reference, backend, quantized):
+    if not os.path.exists(onnx_model_path(default_onnx_dir(), quantized)):
+        pytest.skip(f"{backend} model not exported")
+
+    embedder = create_embedder(backend, fallback=False)
+    vectors = np.array(embedder.embed_documents(TEXTS), dtype=np.float32)
+    assert vectors.shape == reference.shape
+
+    cosines = np.sum(vectors * reference, axis=1) / (
+        np.linalg.norm(vectors, axis=1) * np.linalg.norm(reference, axis=1)
+    )
+    assert cosines.min() >= MIN_COSINE
+
+    query = np.array(embedder.embed_query(TEXTS[0]), dtype=np.float32)
+    assert np.allclose(query, vectors[0], atol=1e-4)
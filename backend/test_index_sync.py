@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Index Sync Tests for CribConcierge
+A batch whose on_changes call fails must be retried, not dropped, and the
+change stream resume token must not move past changes that were never applied.
+Writes queued behind a publish are merged into one copy-on-write publish.
+
+Usage: python -m pytest test_index_sync.py
+"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from index_sync import PropertyChangeQueue, PropertyChangeWatcher
+
+
+class FlakyHandler:
+    """on_changes that raises on its first call"""
+
+    def __init__(self, failures=1):
+        self.failures = failures
+        self.batches = []
+
+    def __call__(self, upsert_ids, delete_ids):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("mongo unavailable")
+        self.batches.append((set(upsert_ids), set(delete_ids)))
+
+
+class FakeStream:
+    """Change stream yielding queued events, then None, with a token per event"""
+
+    def __init__(self, watcher, events):
+        self.watcher = watcher
+        self.events = list(events)
+        self.resume_token = {"_data": 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def try_next(self):
+        if self.events:
+            self.resume_token = {"_data": self.resume_token["_data"] + 1}
+            return self.events.pop(0)
+        time.sleep(0.002)
+        self.watcher._stop_after_idle -= 1
+        if self.watcher._stop_after_idle <= 0:
+            self.watcher.stop()
+        return None
+
+
+class FakeCollection:
+    def __init__(self, watcher, events):
+        self.watcher = watcher
+        self.events = events
+        self.resumed_from = []
+
+    def watch(self, pipeline, resume_after=None, max_await_time_ms=None):
+        self.resumed_from.append(resume_after)
+        return FakeStream(self.watcher, self.events)
+
+
+def change(object_id, operation="update"):
+    return {"operationType": operation, "documentKey": {"_id": object_id}, "updateDescription": {"updatedFields": {"x": 1}}}
+
+
+def test_failed_batch_is_retried():
+    handler = FlakyHandler()
+    watcher = PropertyChangeWatcher(None, handler, mode="poll", poll_interval=0.01)
+    watcher._record("a", False)
+    watcher._record("b", True)
+
+    assert watcher._flush() is False
+    assert watcher.stats()["errors"] == 1
+    assert watcher._flush() is True
+    assert handler.batches == [({"a"}, {"b"})]
+    assert watcher.stats()["batches"] == 1
+
+
+def test_newer_change_wins_over_failed_batch():
+    handler = FlakyHandler()
+    watcher = PropertyChangeWatcher(None, handler, mode="poll", poll_interval=0.01)
+    watcher._record("a", False)
+
+    def record_delete_then_fail(upsert_ids, delete_ids):
+        # "a" is deleted while its upsert batch is being applied
+        watcher._record("a", True)
+        raise RuntimeError("mongo unavailable")
+
+    watcher.on_changes = record_delete_then_fail
+    assert watcher._flush() is False
+    assert watcher._pending == {"a": True}
+
+
+def test_resume_token_waits_for_applied_batch():
+    handler = FlakyHandler()
+    watcher = PropertyChangeWatcher(None, handler, mode="changestream", batch_window=0.001, poll_interval=0.001)
+    watcher._stop_after_idle = 20
+    collection = FakeCollection(watcher, [change("a"), change("b", "delete")])
+    watcher.collection_fn = lambda: collection
+
+    watcher._watch_change_stream()
+
+    # The first flush failed; the retry carried its change along with the later one
+    applied = set().union(*(upserts | deletes for upserts, deletes in handler.batches))
+    assert applied == {"a", "b"}
+    assert watcher.stats()["errors"] == 1
+    assert watcher._pending == {}
+    assert watcher._resume_token == {"_data": 2}
+
+
+def test_resume_token_not_advanced_while_batch_fails():
+    handler = FlakyHandler(failures=100)
+    watcher = PropertyChangeWatcher(None, handler, mode="changestream", batch_window=0.001, poll_interval=0.001)
+    watcher._stop_after_idle = 20
+    collection = FakeCollection(watcher, [change("a")])
+    watcher.collection_fn = lambda: collection
+
+    watcher._watch_change_stream()
+
+    assert handler.batches == []
+    assert watcher._pending == {"a": False}
+    # A reconnect resumes before the unapplied change
+    assert watcher._resume_token is None
+
+
+
+class HeldWriter:
+    """Index writer whose tasks run only when the test says so"""
+
+    def __init__(self):
+        self.tasks = []
+
+    def submit(self, fn, *args):
+        self.tasks.append((fn, args))
+
+    def run_all(self):
+        while self.tasks:
+            fn, args = self.tasks.pop(0)
+            fn(*args)
+
+
+def doc(property_id, text="listing"):
+    return SimpleNamespace(metadata={"property_id": property_id}, page_content=text)
+
+
+def test_queued_writes_share_one_publish():
+    publishes = []
+    writer = HeldWriter()
+    changes = PropertyChangeQueue(writer, lambda *batch: publishes.append(batch) or len(publishes))
+
+    first = changes.submit([doc("a", "old")], [])
+    second = changes.submit([doc("a", "new"), doc("b")], [], skip_indexed=True)
+    third = changes.submit([], ["c"])
+    assert len(writer.tasks) == 1
+    writer.run_all()
+
+    assert len(publishes) == 1
+    documents, deleted_ids, skip_indexed = publishes[0]
+    # Last change per property wins
+    assert [(d.metadata["property_id"], d.page_content) for d in documents] == [("a", "new"), ("b", "listing")]
+    assert deleted_ids == ["c"]
+    assert skip_indexed == {"a", "b"}
+    assert first.result() == second.result() == third.result() == 1
+    assert changes.stats() == {"pending": 0, "changes": 3, "publishes": 1}
+
+
+def test_delete_after_upsert_in_one_batch():
+    publishes = []
+    writer = HeldWriter()
+    changes = PropertyChangeQueue(writer, lambda *batch: publishes.append(batch))
+
+    changes.submit([doc("a")], [])
+    changes.submit([], ["a"])
+    writer.run_all()
+
+    assert publishes == [([], ["a"], set())]
+
+
+def test_batches_are_bounded():
+    publishes = []
+    writer = HeldWriter()
+    changes = PropertyChangeQueue(writer, lambda *batch: publishes.append(batch), max_batch=2)
+
+    for property_id in "abcde":
+        changes.submit([doc(property_id)], [])
+    writer.run_all()
+
+    assert [len(documents) for documents, _, _ in publishes] == [2, 2, 1]
+
+
+def test_failed_publish_fails_every_change_in_batch():
+    writer = HeldWriter()
+
+    def publish(*batch):
+        raise RuntimeError("index type cannot remove vectors")
+
+    changes = PropertyChangeQueue(writer, publish)
+    futures = [changes.submit([], ["a"]), changes.submit([doc("b")], [])]
+    writer.run_all()
+
+    assert all(isinstance(future.exception(), RuntimeError) for future in futures)
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -42,7 +42,7 @@ def test_mongodb():
         
         # Count existing files
         try:
-            file_count = fs.find().count()
+            file_count = db["images.files"].count_documents({})
             print(f"📁 Found {file_count} existing files in GridFS")
         except Exception as e:
             print(f"⚠️ GridFS count warning: {e}")
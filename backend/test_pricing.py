@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Price Parsing Tests for CribConcierge
+Budget filters compare against priceMin/priceMax, so a misparsed
+propertyCostRange silently hides a listing from search and chat
+
+Usage: python -m pytest test_pricing.py
+"""
+
+import pytest
+
+from pricing import PRICE_MAX_FIELD, PRICE_MIN_FIELD, build_property_filter, parse_price_range, price_fields
+
+LAKH = 100_000
+CRORE = 10_000_000
+
+
+@pytest.mark.parametrize("text,expected", [
+    # Lakh spellings
+    ("45 lakhs", (45 * LAKH, 45 * LAKH)),
+    ("45 Lakh", (45 * LAKH, 45 * LAKH)),
+    ("45 lacs", (45 * LAKH, 45 * LAKH)),
+    ("45L", (45 * LAKH, 45 * LAKH)),
+    # Crore spellings, decimals
+    ("1.2 Cr", (12 * CRORE // 10, 12 * CRORE // 10)),
+    ("1.2cr", (12 * CRORE // 10, 12 * CRORE // 10)),
+    ("2.5 Crores", (25 * CRORE // 10, 25 * CRORE // 10)),
+    # Indian comma grouping and currency prefixes
+    ("₹85,00,000", (85 * LAKH, 85 * LAKH)),
+    ("Rs. 85,00,000", (85 * LAKH, 85 * LAKH)),
+    ("INR 1,20,00,000", (12 * CRORE // 10, 12 * CRORE // 10)),
+    # Ranges: a trailing unit applies to the bare number before it
+    ("50-75L", (50 * LAKH, 75 * LAKH)),
+    ("50 - 75 lakhs", (50 * LAKH, 75 * LAKH)),
+    ("1 crore - 1.5 crore", (CRORE, 15 * CRORE // 10)),
+    ("80 lakh to 1.2 crore", (80 * LAKH, 12 * CRORE // 10)),
+    # Rents
+    ("25,000 per month", (25_000, 25_000)),
+    ("₹25k/month", (25_000, 25_000)),
+    # Metric units
+    ("1.5 million", (1_500_000, 1_500_000)),
+])
+def test_parse_price_range(text, expected):
+    assert parse_price_range(text) == expected
+
+
+@pytest.mark.parametrize("text", [None, "", "N/A", "Price on request", "Contact owner"])
+def test_unparseable_price_is_none(text):
+    assert parse_price_range(text) == (None, None)
+
+
+def test_numeric_price_is_exact():
+    assert parse_price_range(4_500_000) == (4_500_000, 4_500_000)
+    assert parse_price_range(45.0) == (45, 45)
+
+
+def test_price_fields():
+    assert price_fields({"propertyCostRange": "50-75L"}) == {PRICE_MIN_FIELD: 50 * LAKH, PRICE_MAX_FIELD: 75 * LAKH}
+    assert price_fields({}) == {PRICE_MIN_FIELD: None, PRICE_MAX_FIELD: None}
+
+
+def test_price_filter_matches_overlapping_ranges():
+    query = build_property_filter(min_price=50 * LAKH, max_price=80 * LAKH)
+    assert query == {PRICE_MIN_FIELD: {"$lte": 80 * LAKH}, PRICE_MAX_FIELD: {"$gte": 50 * LAKH}}
+
+
+def test_empty_filter_matches_everything():
+    assert build_property_filter() == {}
+
+
+def test_locality_filter_is_normalized_equality():
+    assert build_property_filter(locality="  Andheri  West ") == {"locality": "andheri west"}
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
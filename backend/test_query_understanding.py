@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Query Understanding Tests for CribConcierge
+Constraints extracted from a question become hard retrieval filters, so a
+wrong budget, bedroom count or locality silently drops matching listings
+
+Usage: python -m pytest test_query_understanding.py
+"""
+
+import pytest
+
+from locality import extract_locality
+from query_understanding import extract_constraints
+
+LAKH = 100_000
+CRORE = 10_000_000
+LOCALITIES = {"baner", "andheri", "andheri west"}
+
+
+def constraints(question):
+    active = extract_constraints(question, LOCALITIES).to_dict()
+    return {key: value for key, value in active.items() if value is not None}
+
+
+@pytest.mark.parametrize("question,expected", [
+    ("2 bhk under 80 lakhs", {"max_price": 80 * LAKH, "bedrooms": 2}),
+    ("under ₹80,00,000", {"max_price": 80 * LAKH}),
+    ("budget of 90 lakh", {"max_price": 90 * LAKH}),
+    ("above 1.5 cr", {"min_price": 15 * CRORE // 10}),
+    ("between 50 lakh and 1 crore", {"min_price": 50 * LAKH, "max_price": CRORE}),
+    # The unit after the upper bound applies to the lower one too
+    ("50-75 lakh flats", {"min_price": 50 * LAKH, "max_price": 75 * LAKH}),
+    ("rent under 25k per month", {"max_price": 25_000}),
+])
+def test_budget(question, expected):
+    assert constraints(question) == expected
+
+
+def test_implausible_bare_number_is_not_a_budget():
+    assert constraints("flats under 50") == {}
+
+
+@pytest.mark.parametrize("question,expected", [
+    ("3 bhk", {"bedrooms": 3}),
+    ("2bhk apartment", {"bedrooms": 2}),
+    ("three bedroom flat", {"bedrooms": 3}),
+    ("3+ bhk", {"min_bedrooms": 3}),
+    ("at least two bedrooms", {"min_bedrooms": 2}),
+    ("2 to 3 bhk", {"min_bedrooms": 2}),
+])
+def test_bedrooms(question, expected):
+    assert constraints(question) == expected
+
+
+def test_locality_longest_match_wins():
+    assert constraints("flat in Andheri West") == {"locality": "andheri west"}
+    assert constraints("three bedroom in Baner") == {"bedrooms": 3, "locality": "baner"}
+
+
+def test_locality_needs_a_whole_word_match():
+    assert constraints("bannerghatta flats") == {}
+
+
+@pytest.mark.parametrize("question", ["show me vr tours", "homes with a 3d walkthrough", "360 view please"])
+def test_vr_tour(question):
+    assert constraints(question) == {"has_vr_tour": True}
+
+
+@pytest.mark.parametrize("question", [None, "", "cheapest flat", "what is the best area to live?"])
+def test_no_constraints(question):
+    assert extract_constraints(question, LOCALITIES).is_empty()
+
+
+def test_combined_constraints():
+    assert constraints("budget of 90 lakh 2bhk in baner with 3d walkthrough") == {
+        "max_price": 90 * LAKH, "bedrooms": 2, "locality": "baner", "has_vr_tour": True
+    }
+
+
+@pytest.mark.parametrize("address,expected", [
+    ("Lane 4, Kothrud, Pune", "kothrud"),
+    ("Flat 12, ABC Society, Baner Road, Baner, Pune, Maharashtra 411045", "baner"),
+    ("Andheri West, Mumbai", "andheri west"),
+    ("12 MG Road, Indiranagar, Bengaluru, Karnataka, India", "indiranagar"),
+    ("Downtown District", "downtown district"),
+    # Street/sector numbers and city names are never localities
+    ("Sector 3, Noida", None),
+    ("Pune", None),
+    (None, None),
+])
+def test_extract_locality(address, expected):
+    assert extract_locality(address) == expected
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,338 @@
+"""
+Vector Index Factory for CribConcierge
+Builds the FAISS index behind the RAG vector store. FAISS.from_documents always
+creates an exact flat index whose query cost grows linearly with the catalog;
+RAG_INDEX_TYPE selects an approximate index (IVF or HNSW) for large catalogs,
+or a quantized one (int8 SQ or PQ) that keeps only compact codes in RAM and
+re-ranks its candidates against full vectors in a memory-mapped file.
+"""
+
+import copy
+import logging
+import math
+import os
+import tempfile
+import threading
+import uuid
+
+import faiss
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = ('flat', 'ivf', 'hnsw', 'sq8', 'pq')
+QUANTIZED_TYPES = ('sq8', 'pq')
+
+
+class IndexConfig:
+    """Index type and tuning knobs, read from the environment by default"""
+
+    def __init__(self, index_type='flat', nlist=0, nprobe=8, hnsw_m=32, ef_construction=80, ef_search=64,
+                 min_vectors=10_000, pq_m=96, rerank_factor=None, vectors_dir=None):
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type '{index_type}', expected one of {', '.join(INDEX_TYPES)}")
+        self.index_type = index_type
+        self.nlist = nlist                    # IVF cells; 0 picks ~4*sqrt(n)
+        self.nprobe = nprobe                  # IVF cells visited per query
+        self.hnsw_m = hnsw_m                  # HNSW graph degree
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search            # HNSW candidate list size per query
+        # Below this many vectors an exact scan is already fast and IVF has too little to train on
+        self.min_vectors = min_vectors
+        self.pq_m = pq_m                      # PQ sub-quantizers (bytes per vector); must divide the dimension
+        # Quantized candidates re-ranked per requested result; 0 disables. PQ codes
+        # are coarse (recall@k ~0.87 at 4x in benchmark_vector_index.py), so pq
+        # re-ranks 16x by default and sq8 4x
+        if rerank_factor is None:
+            rerank_factor = 16 if index_type == 'pq' else 4
+        self.rerank_factor = rerank_factor
+        self.vectors_dir = vectors_dir        # Where full vectors for re-ranking are memory-mapped
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            index_type=os.environ.get("RAG_INDEX_TYPE", "flat").lower(),
+            nlist=int(os.environ.get("RAG_IVF_NLIST", "0")),
+            nprobe=int(os.environ.get("RAG_IVF_NPROBE", "8")),
+            hnsw_m=int(os.environ.get("RAG_HNSW_M", "32")),
+            ef_construction=int(os.environ.get("RAG_HNSW_EF_CONSTRUCTION", "80")),
+            ef_search=int(os.environ.get("RAG_HNSW_EF_SEARCH", "64")),
+            min_vectors=int(os.environ.get("RAG_ANN_MIN_VECTORS", "10000")),
+            pq_m=int(os.environ.get("RAG_PQ_M", "96")),
+            rerank_factor=int(os.environ["RAG_RERANK_FACTOR"]) if os.environ.get("RAG_RERANK_FACTOR") else None,
+            vectors_dir=os.environ.get("RAG_VECTORS_DIR") or None
+        )
+
+    def effective_type(self, vector_count):
+        """Index type actually used for a catalog of this size"""
+        return self.index_type if vector_count >= self.min_vectors else 'flat'
+
+    def ivf_cells(self, vector_count):
+        if self.nlist:
+            return self.nlist
+        # ~39 training points per centroid is the FAISS minimum
+        return max(1, min(int(4 * math.sqrt(vector_count)), vector_count // 39))
+
+    def to_dict(self):
+        return {
+            "type": self.index_type,
+            "nlist": self.nlist,
+            "nprobe": self.nprobe,
+            "hnswM": self.hnsw_m,
+            "efConstruction": self.ef_construction,
+            "efSearch": self.ef_search,
+            "minVectors": self.min_vectors,
+            "pqM": self.pq_m,
+            "rerankFactor": self.rerank_factor
+        }
+
+
+def create_index(dimension, config, training_vectors):
+    """Empty (but trained) FAISS index of the configured type"""
+    index_type = config.effective_type(len(training_vectors))
+
+    if index_type == 'ivf':
+        nlist = config.ivf_cells(len(training_vectors))
+        quantizer = faiss.IndexFlatL2(dimension)
+        index = faiss.IndexIVFFlat(quantizer, dimension, nlist, faiss.METRIC_L2)
+        index.train(training_vectors)
+        # Lets allowlisted search reconstruct vectors by row
+        index.make_direct_map()
+    elif index_type == 'hnsw':
+        index = faiss.IndexHNSWFlat(dimension, config.hnsw_m, faiss.METRIC_L2)
+        index.hnsw.efConstruction = config.ef_construction
+    elif index_type == 'sq8':
+        # 1 byte per dimension: 384 B instead of 1.5 KB for MiniLM
+        index = faiss.IndexScalarQuantizer(dimension, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2)
+        index.train(training_vectors)
+    elif index_type == 'pq':
+        # pq_m bytes per vector
+        index = faiss.IndexPQ(dimension, config.pq_m, 8, faiss.METRIC_L2)
+        index.train(training_vectors)
+    else:
+        index = faiss.IndexFlatL2(dimension)
+
+    apply_search_params(index, config)
+    return index
+
+
+def apply_search_params(index, config):
+    """Set the query-time accuracy/latency knob for the index type"""
+    if isinstance(index, faiss.IndexIVF):
+        index.nprobe = min(config.nprobe, index.nlist)
+    elif isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = config.ef_search
+
+
+class MappedVectors:
+    """
+    Append-only float32 matrix in an unlinked temporary file, read through
+    np.memmap. Pages live in the OS page cache and are evicted under memory
+    pressure instead of sitting on the Python heap. Each process builds its
+    own file, so separate workers do not share the vectors.
+    """
+
+    def __init__(self, dimension, directory=None):
+        self.dimension = dimension
+        # Unlinked on creation; the open handle keeps it alive for the index's lifetime
+        self._file = tempfile.TemporaryFile(prefix="rag_vectors_", dir=directory)
+        self._count = 0
+        self._rows = np.empty((0, dimension), dtype=np.float32)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, rows):
+        return self._rows[rows]
+
+    @property
+    def nbytes(self):
+        return self._count * self.dimension * 4
+
+    def append(self, vectors):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.dimension)
+        with self._lock:
+            self._file.seek(0, os.SEEK_END)
+            self._file.write(vectors.tobytes())
+            self._file.flush()
+            self._count += len(vectors)
+            # Readers keep using the previous map until this assignment
+            self._rows = np.memmap(self._file, dtype=np.float32, mode='r', shape=(self._count, self.dimension))
+
+
+class RerankingIndex:
+    """
+    Quantized FAISS index whose top rerank_factor*k candidates are re-scored
+    with exact L2 distances from the memory-mapped full vectors. Exposes the
+    parts of the faiss.Index interface the LangChain FAISS store uses.
+    """
+
+    def __init__(self, base, full_vectors, rerank_factor):
+        self.base = base
+        self.full_vectors = full_vectors
+        self.rerank_factor = rerank_factor
+
+    @property
+    def d(self):
+        return self.base.d
+
+    @property
+    def ntotal(self):
+        return self.base.ntotal
+
+    @property
+    def is_trained(self):
+        return self.base.is_trained
+
+    def add(self, vectors):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.full_vectors.append(vectors)
+        self.base.add(vectors)
+
+    def reconstruct(self, key):
+        # Exact vector rather than the lossy decoded code
+        return np.array(self.full_vectors[int(key)])
+
+    def remove_ids(self, ids):
+        raise RuntimeError("Re-ranking index does not support removal; rebuild instead")
+
+    def clone(self):
+        """
+        Copy with its own quantized index. The append-only full vectors are
+        shared: rows past this index's ntotal are invisible to it, so the copy
+        can grow without affecting readers of the original.
+        """
+        if len(self.full_vectors) != self.base.ntotal:
+            raise RuntimeError("Re-ranking index vectors out of step with its codes; rebuild instead")
+        return RerankingIndex(faiss.clone_index(self.base), self.full_vectors, self.rerank_factor)
+
+    def search(self, queries, k):
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        _, candidates = self.base.search(queries, max(k, k * self.rerank_factor))
+
+        distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+        labels = np.full((len(queries), k), -1, dtype=np.int64)
+        for row, (query, ids) in enumerate(zip(queries, candidates)):
+            # Sorted row order keeps memory-mapped reads sequential
+            ids = np.sort(ids[ids >= 0])
+            if not len(ids):
+                continue
+            exact = np.sum((self.full_vectors[ids] - query) ** 2, axis=1)
+            order = np.argsort(exact)[:k]
+            distances[row, :len(order)] = exact[order]
+            labels[row, :len(order)] = ids[order]
+        return distances, labels
+
+
+def build_index(vectors, config):
+    """Trained index containing all vectors (row i is vectors[i])"""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    index = create_index(vectors.shape[1], config, vectors)
+    if config.effective_type(len(vectors)) in QUANTIZED_TYPES and config.rerank_factor > 0:
+        index = RerankingIndex(index, MappedVectors(vectors.shape[1], config.vectors_dir), config.rerank_factor)
+    index.add(vectors)
+    return index
+
+
+def index_memory_bytes(index):
+    """
+    Approximate resident size of the FAISS structure, excluding memory-mapped
+    full vectors. Computed from code sizes rather than serializing the index.
+    """
+    base = index.base if isinstance(index, RerankingIndex) else index
+    if isinstance(base, faiss.IndexHNSW):
+        # Stored vectors plus 2*M int32 neighbour links per vector on the base layer
+        return base.ntotal * (base.storage.sa_code_size() + base.hnsw.nb_neighbors(0) * 4)
+    if isinstance(base, faiss.IndexIVF):
+        # Codes plus int64 ids in the inverted lists, plus the centroids
+        return base.ntotal * (base.code_size + 8) + base.nlist * base.d * 4
+    if isinstance(base, faiss.IndexPQ):
+        # Codes plus the sub-quantizer codebooks
+        return base.ntotal * base.code_size + base.pq.M * base.pq.ksub * base.pq.dsub * 4
+    return base.ntotal * base.sa_code_size()
+
+
+def describe_index(index):
+    """Index type, size and memory footprint for status endpoints"""
+    base = index.base if isinstance(index, RerankingIndex) else index
+    if isinstance(base, faiss.IndexIVF):
+        kind = 'ivf'
+    elif isinstance(base, faiss.IndexHNSW):
+        kind = 'hnsw'
+    elif isinstance(base, faiss.IndexScalarQuantizer):
+        kind = 'sq8'
+    elif isinstance(base, faiss.IndexPQ):
+        kind = 'pq'
+    else:
+        kind = 'flat'
+    description = {
+        "type": kind,
+        "vectors": index.ntotal,
+        "dimension": index.d,
+        "indexBytes": index_memory_bytes(index)
+    }
+    if isinstance(index, RerankingIndex):
+        description["rerankFactor"] = index.rerank_factor
+        description["mappedVectorBytes"] = index.full_vectors.nbytes
+    return description
+
+
+EMBED_BATCH_SIZE = 256
+
+
+def embed_texts(embedder, texts, progress=None):
+    """Document embeddings in batches, reporting the completed fraction"""
+    vectors = []
+    for start in range(0, len(texts), EMBED_BATCH_SIZE):
+        vectors.extend(embedder.embed_documents(texts[start:start + EMBED_BATCH_SIZE]))
+        if progress:
+            progress(min(start + EMBED_BATCH_SIZE, len(texts)) / len(texts))
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def clone_index(index):
+    """Independent copy of a FAISS or re-ranking index"""
+    if isinstance(index, RerankingIndex):
+        return index.clone()
+    return faiss.clone_index(index)
+
+
+def copy_vector_store(vector_store):
+    """
+    Copy of a LangChain FAISS store that can be modified while the original
+    keeps serving searches. Documents are shared; they are never mutated.
+    """
+    from langchain.docstore.in_memory import InMemoryDocstore
+
+    clone = copy.copy(vector_store)
+    clone.index = clone_index(vector_store.index)
+    clone.docstore = InMemoryDocstore(dict(vector_store.docstore._dict))
+    clone.index_to_docstore_id = dict(vector_store.index_to_docstore_id)
+    return clone
+
+
+def build_vector_store(documents, embedder, config=None, progress=None, ids=None):
+    """
+    LangChain FAISS store over documents using the configured index type.
+    Drop-in replacement for FAISS.from_documents(documents, embedder).
+    progress(fraction) is called as embedding batches complete; ids are the
+    docstore IDs (random UUIDs by default).
+    """
+    # Imported here so the benchmark script runs without LangChain installed
+    from langchain.vectorstores import FAISS
+    from langchain.docstore.in_memory import InMemoryDocstore
+
+    config = config or IndexConfig.from_env()
+    vectors = embed_texts(embedder, [doc.page_content for doc in documents], progress)
+    index = build_index(vectors, config)
+
+    ids = ids or [str(uuid.uuid4()) for _ in documents]
+    store = FAISS(
+        embedding_function=embedder,
+        index=index,
+        docstore=InMemoryDocstore(dict(zip(ids, documents))),
+        index_to_docstore_id=dict(enumerate(ids))
+    )
+    logger.info(f"✅ Vector index built: {describe_index(index)}")
+    return store